@@ -1,32 +1,102 @@
 # backend/app/auth.py
-from fastapi import Depends, HTTPException, status, Header
-from .security import decode_token  # must exist in security.py (make_token uses same secret/alg)
+import os
+from typing import NamedTuple, Optional
+from fastapi import Depends, HTTPException, status, Header, Request
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from .cache import LRUCache
+from .db import User
+from .security import verify_token  # cached decode_token (same secret/alg as make_token)
+
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL_S = float(os.getenv("USER_CACHE_TTL_S", "60"))  # bounds staleness of settings changed elsewhere
+
+def _bearer(auth: Optional[str]) -> Optional[str]:
+    if not auth or not auth.lower().startswith("bearer "):
+        return None
+    return auth.split(" ", 1)[1]
 
 def bearer_token(auth: str = Header(None, alias="Authorization")) -> str:
     """
     Extracts the Bearer token from the Authorization header.
     Raises 401 if header is missing or not a Bearer token.
     """
-    if not auth or not auth.lower().startswith("bearer "):
+    token = _bearer(auth)
+    if not token:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Missing bearer token"
         )
-    return auth.split(" ", 1)[1]
+    return token
 
-def current_user_sub(token: str = Depends(bearer_token)) -> str:
+def request_claims(request: Request, token: Optional[str] = None) -> Optional[dict]:
     """
-    Decodes JWT and returns the 'sub' (user UID).
-    Raises 401 if token is invalid.
+    Verifies the request's bearer token at most once per request and stashes
+    the result on request.state, so the rate-limit middleware and the auth
+    dependencies share one check; across requests verify_token's cache skips
+    the jwt.decode. Returns None if missing/invalid.
     """
+    if token is None:
+        token = _bearer(request.headers.get("authorization"))
+        if not token:
+            return None
+    cached = getattr(request.state, "jwt", None)
+    if cached and cached[0] == token:
+        return cached[1]
     try:
-        payload = decode_token(token)
-        sub = payload.get("sub")
-        if not sub:
-            raise ValueError("No 'sub' in token")
-        return sub
+        claims = verify_token(token)
     except Exception:
+        claims = None
+    request.state.jwt = (token, claims)
+    return claims
+
+class CachedUser(NamedTuple):
+    """The User fields request handlers need, safe to share between requests."""
+    id: int
+    uid: str
+    username: str
+    full_name: Optional[str]
+    email: str
+    agent_name: Optional[str]
+    crisis_opt_in: bool
+    trusted_contact_name: Optional[str]
+    trusted_contact_phone: Optional[str]
+
+USER_CACHE = LRUCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL_S)  # uid -> CachedUser
+
+class Principal:
+    """The authenticated caller of one request: uid + verified claims, user row on demand."""
+    __slots__ = ("uid", "claims")
+
+    def __init__(self, uid: str, claims: dict):
+        self.uid = uid
+        self.claims = claims
+
+    async def user(self, s: AsyncSession) -> Optional[CachedUser]:
+        """User snapshot from USER_CACHE; one query on a miss."""
+        cached = USER_CACHE.get(self.uid)
+        if cached is None:
+            row = (await s.exec(select(User).where(User.uid == self.uid))).first()
+            if row is None:
+                return None
+            cached = CachedUser(**{f: getattr(row, f) for f in CachedUser._fields})
+            USER_CACHE.set(self.uid, cached)
+        return cached
+
+def current_principal(request: Request, token: str = Depends(bearer_token)) -> Principal:
+    """
+    Verifies the JWT (or reuses the middleware's check) and returns the caller.
+    Raises 401 if token is invalid.
+    """
+    claims = request_claims(request, token) or {}
+    sub = claims.get("sub")
+    if not sub:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token"
         )
+    return Principal(sub, claims)
+
+def current_user_sub(principal: Principal = Depends(current_principal)) -> str:
+    """Returns the 'sub' (user UID) of the caller. Raises 401 if token is invalid."""
+    return principal.uid
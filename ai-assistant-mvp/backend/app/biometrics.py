@@ -1,14 +1,29 @@
 # backend/app/biometrics.py
+import json
+import math
+import os
+import threading
+import time
 from datetime import datetime
-from typing import Optional, List, Tuple
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional, List, Tuple, NamedTuple, Dict
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from pydantic import ValidationError
+from sqlalchemy import Index, LargeBinary, bindparam
 from sqlmodel import SQLModel, Field, Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from .schemas import (
     FacePayload, VoiceEnrollPayload, SessionStartPayload, SessionStartOut,
-    VoicePingPayload, VoicePingOut
+    VoicePingPayload, VoicePingOut, VoiceSessionSummaryOut, FaceVerifyOut, FaceIdentifyOut
 )
-from .db import get_session, get_engine
+from .db import get_session, get_engine, get_async_session, get_async_engine
 from .auth import current_user_sub
+from .security import verify_token
+from .rate_limit import RATE_LIMIT_ENABLED, acheck, policy_for
+from .write_behind import WriteBehindBuffer
+from .cache import LRUCache
+from .face_index import FaceIndex, normalize, pack_signature, unpack_signature
+from .voice_stats import VoiceSessionStats, apply_pings, summarize
 
 router = APIRouter(prefix="/biometrics", tags=["biometrics"])
 
@@ -18,7 +33,9 @@ class BiometricFace(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     user_uid: str = Field(index=True, unique=True)
     version: str = "v1"
-    signature_json: str  # store as JSON string
+    signature_blob: Optional[bytes] = Field(default=None, sa_type=LargeBinary)  # packed float32, see face_index
+    signature_size: Optional[int] = None     # width = height
+    signature_json: str = ""                 # legacy JSON copy; migrated to signature_blob
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -29,6 +46,13 @@ class BiometricVoiceProfile(SQLModel, table=True):
     avg_pitch_hz: float = 0.0
     avg_rms: float = 0.0
     condition_tag: Optional[str] = None  # NEW
+    # Adaptive baseline: EWMA mean/variance learned from owner pings (see BASELINE_*)
+    baseline_pitch_hz: Optional[float] = None
+    baseline_pitch_var: Optional[float] = None
+    baseline_rms: Optional[float] = None
+    baseline_rms_var: Optional[float] = None
+    baseline_n: int = 0
+    baseline_updated_at: Optional[datetime] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -40,9 +64,23 @@ class VoiceSession(SQLModel, table=True):
     started_at: datetime = Field(default_factory=datetime.utcnow)
     ended_at: Optional[datetime] = None
 
+EPOCH = datetime(1970, 1, 1)
+
+def day_of(ts: datetime) -> int:
+    """Partition key: whole UTC days since the epoch."""
+    return (ts - EPOCH).days
+
 class VoicePing(SQLModel, table=True):
+    # `day` is the retention key: old days are deleted in chunks, and
+    # per-user / time-range reads use (user_uid, ts) instead of a full scan.
+    __table_args__ = (
+        Index("ix_voiceping_user_ts", "user_uid", "ts"),
+        Index("ix_voiceping_day_session", "day", "session_id"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     session_id: int = Field(index=True)
+    user_uid: Optional[str] = None           # denormalized from VoiceSession
+    day: Optional[int] = None                # day_of(ts)
     ts: datetime = Field(default_factory=datetime.utcnow)
     pitch_hz: float = 0.0
     rms: float = 0.0
@@ -54,26 +92,21 @@ class VoicePing(SQLModel, table=True):
     matched_profile_tag: Optional[str] = None  # NEW
     health_flag: bool = False                  # NEW
 
-# -------------------- Startup: Ensure Tables & Columns --------------------
+# -------------------- Ping write-behind --------------------
+# Pings are queued in memory and bulk-inserted on a size/time trigger, so the
+# ping request never waits on a commit. Up to PING_FLUSH_INTERVAL_S of pings
+# can be lost if the process is killed without a clean shutdown.
 
-def ensure_migrations():
-    engine = get_engine()
-    SQLModel.metadata.create_all(engine)  # create missing tables
-    # Add new columns for SQLite if missing (safe no-op if already added)
-    with engine.connect() as con:
-        def add(col_stmt: str):
-            try:
-                con.exec_driver_sql(col_stmt)
-            except Exception:
-                pass  # ignore if exists
+PING_FLUSH_SIZE = int(os.getenv("PING_FLUSH_SIZE", "200"))
+PING_FLUSH_INTERVAL_S = float(os.getenv("PING_FLUSH_INTERVAL_S", "0.5"))
 
-        # VoicePing new columns
-        add("ALTER TABLE voiceping ADD COLUMN snr_db REAL")
-        add("ALTER TABLE voiceping ADD COLUMN matched_profile_tag TEXT")
-        add("ALTER TABLE voiceping ADD COLUMN health_flag INTEGER")
+def _insert_pings(rows: List[dict]):
+    # raw rows and the per-session running stats commit (or retry) together
+    with get_engine().begin() as con:
+        con.execute(VoicePing.__table__.insert(), rows)
+        apply_pings(con, rows)
 
-        # BiometricVoiceProfile new column
-        add("ALTER TABLE biometricvoiceprofile ADD COLUMN condition_tag TEXT")
+PING_BUFFER = WriteBehindBuffer("voiceping", _insert_pings, max_batch=PING_FLUSH_SIZE, max_delay=PING_FLUSH_INTERVAL_S)
 
 # -------------------- Helpers --------------------
 
@@ -96,7 +129,10 @@ def _sim_from_distance(d: float) -> float:
 def _owner_similarity(sample: Tuple[float, float], base: Tuple[float, float]) -> float:
     sp, sr = sample
     bp, br = base
-    d = ((sp - bp) ** 2 + (sr - br) ** 2) ** 0.5
+    # plain mul + sqrt (not ** / pow) so the NumPy scorer is bit-for-bit identical
+    dp = sp - bp
+    dr = sr - br
+    d = math.sqrt(dp * dp + dr * dr)
     return _sim_from_distance(d)
 
 def _choose_best_profile(pitch: float, rms: float, profiles: List[BiometricVoiceProfile]) -> Tuple[Optional[BiometricVoiceProfile], float]:
@@ -115,6 +151,21 @@ def _choose_best_profile(pitch: float, rms: float, profiles: List[BiometricVoice
             best = pr
     return best, best_sim
 
+# Vectorized twins of the helpers above. np.fmin/np.fmax treat NaN like
+# Python's min/max do here (the non-NaN bound wins), so results match exactly.
+
+def _norm_pitch_vec(p: np.ndarray) -> np.ndarray:
+    p = np.fmax(0.0, np.fmin(500.0, p))
+    return np.fmin(450.0, np.fmax(60.0, p)) / 450.0
+
+def _norm_rms_vec(r: np.ndarray) -> np.ndarray:
+    r = np.fmax(0.0, np.fmin(0.25, r))
+    return r / 0.20
+
+def _sim_from_distance_vec(d: np.ndarray) -> np.ndarray:
+    mx = 1.414213562
+    return np.maximum(0.0, np.minimum(1.0, 1.0 - (d / mx)))
+
 def _classify_emotion(pitch: float, rms: float, snr_db: Optional[float]) -> str:
     # Simple, SNR-aware heuristic
     if snr_db is not None and snr_db < 8.0:
@@ -137,23 +188,320 @@ def _health_flag(pitch: float, rms: float, base_pitch: Optional[float], base_rms
         return True  # low-energy + low pitch without baseline
     return False
 
+# -------------------- Adaptive baseline --------------------
+# Each profile tracks an exponentially weighted mean/variance of pitch and RMS,
+# learned only from clean owner pings, so slow drift (mic distance, season)
+# follows the user instead of eroding similarity. Once a profile has
+# BASELINE_MIN_N updates it is scored with a variance-normalized distance.
+# Updates happen in memory on the cached ProfileSet; the DB copy is written
+# in batches every BASELINE_FLUSH_INTERVAL_S (with several workers the last
+# flush wins, which is fine for a slowly moving average). A write only lands
+# while the profile's updated_at is the one the ProfileSet was loaded with,
+# so updates learned before a re-enrollment cannot undo its reset.
+
+BASELINE_ALPHA = float(os.getenv("BASELINE_ALPHA", "0.02"))            # EWMA weight of one ping
+BASELINE_MIN_N = int(os.getenv("BASELINE_MIN_N", "30"))                # updates before the baseline is trusted
+BASELINE_MIN_SNR_DB = float(os.getenv("BASELINE_MIN_SNR_DB", "15"))    # learn only from clean audio
+BASELINE_K = float(os.getenv("BASELINE_K", "6.0"))                      # sim = 1 / (1 + d^2 / K)
+BASELINE_PRIOR_PITCH_SD = float(os.getenv("BASELINE_PRIOR_PITCH_SD", "25.0"))
+BASELINE_PRIOR_RMS_SD = float(os.getenv("BASELINE_PRIOR_RMS_SD", "0.02"))
+BASELINE_MIN_PITCH_SD = float(os.getenv("BASELINE_MIN_PITCH_SD", "5.0"))   # variance floors keep a
+BASELINE_MIN_RMS_SD = float(os.getenv("BASELINE_MIN_RMS_SD", "0.004"))     # steady voice from scoring 0
+BASELINE_FLUSH_INTERVAL_S = float(os.getenv("BASELINE_FLUSH_INTERVAL_S", "10"))
+
+# -------------------- Profile / session cache --------------------
+# Enrolled profiles and session ownership barely change during a session, so
+# the ping hot path reads them from memory. enroll_voice and stop_session
+# invalidate explicitly; the TTL bounds staleness across workers.
+
+VOICE_CACHE_SIZE = int(os.getenv("VOICE_CACHE_SIZE", "10000"))
+VOICE_CACHE_TTL_S = float(os.getenv("VOICE_CACHE_TTL_S", "300"))
+
+class CachedProfile(NamedTuple):
+    condition_tag: Optional[str]
+    avg_pitch_hz: float
+    avg_rms: float
+    norm_pitch: float
+    norm_rms: float
+    id: Optional[int] = None
+    baseline_pitch_hz: Optional[float] = None
+    baseline_pitch_var: Optional[float] = None
+    baseline_rms: Optional[float] = None
+    baseline_rms_var: Optional[float] = None
+    baseline_n: int = 0
+    updated_at: Optional[datetime] = None
+
+class ProfileSet:
+    """
+    A user's profiles plus their normalized (pitch, rms) as one contiguous
+    array, and the live adaptive baselines. `base`/`base_n` are updated in
+    place by _update_baseline; the rest is immutable.
+    """
+    __slots__ = ("profiles", "norms", "base", "base_n", "n_adapted")
+
+    def __init__(self, profiles: Tuple[CachedProfile, ...]):
+        self.profiles = profiles
+        # shape (2, P): row 0 = norm pitch, row 1 = norm rms, each row contiguous
+        self.norms = np.array(
+            [[pr.norm_pitch for pr in profiles], [pr.norm_rms for pr in profiles]],
+            dtype=np.float64,
+        ).reshape(2, len(profiles))
+        # shape (4, P): pitch mean, pitch var, rms mean, rms var (raw units).
+        # Profiles without a learned baseline start at the enrolled values with the prior variance.
+        self.base = np.array(
+            [
+                [pr.baseline_pitch_hz if pr.baseline_pitch_hz is not None else pr.avg_pitch_hz for pr in profiles],
+                [pr.baseline_pitch_var or BASELINE_PRIOR_PITCH_SD ** 2 for pr in profiles],
+                [pr.baseline_rms if pr.baseline_rms is not None else pr.avg_rms for pr in profiles],
+                [pr.baseline_rms_var or BASELINE_PRIOR_RMS_SD ** 2 for pr in profiles],
+            ],
+            dtype=np.float64,
+        ).reshape(4, len(profiles))
+        self.base_n = np.array([pr.baseline_n or 0 for pr in profiles], dtype=np.int64)
+        self.n_adapted = int((self.base_n >= BASELINE_MIN_N).sum())
+
+    def __len__(self) -> int:
+        return len(self.profiles)
+
+# Adaptive baseline state lives on ProfileSet; writes are batched.
+
+def _flush_baselines(items: List[tuple]):
+    latest = {}
+    for item in items:
+        latest[item[0]] = item  # only the newest state per profile matters
+    now = datetime.utcnow()
+    t = BiometricVoiceProfile.__table__
+    with get_engine().begin() as con:
+        con.execute(
+            t.update().where(t.c.id == bindparam("b_id"), t.c.updated_at == bindparam("b_updated_at")),
+            [
+                dict(b_id=pid, b_updated_at=enrolled_at, baseline_pitch_hz=mp, baseline_pitch_var=vp,
+                     baseline_rms=mr, baseline_rms_var=vr, baseline_n=n, baseline_updated_at=now)
+                for pid, mp, vp, mr, vr, n, enrolled_at in latest.values()
+            ],
+        )
+
+BASELINE_BUFFER = WriteBehindBuffer("baseline", _flush_baselines, max_batch=50_000, max_delay=BASELINE_FLUSH_INTERVAL_S)
+
+def _update_baseline(pset: ProfileSet, i: int, pitch: float, rms: float):
+    b = pset.base
+    a = BASELINE_ALPHA
+    for m, v, x, floor in ((0, 1, pitch, BASELINE_MIN_PITCH_SD ** 2), (2, 3, rms, BASELINE_MIN_RMS_SD ** 2)):
+        diff = x - b[m, i]
+        incr = a * diff
+        b[m, i] += incr
+        b[v, i] = max(floor, (1.0 - a) * (b[v, i] + diff * incr))
+    pset.base_n[i] += 1
+    if pset.base_n[i] == BASELINE_MIN_N:
+        pset.n_adapted += 1
+    pr = pset.profiles[i]
+    if pr.id is not None:
+        BASELINE_BUFFER.add((pr.id, float(b[0, i]), float(b[1, i]), float(b[2, i]), float(b[3, i]),
+                             int(pset.base_n[i]), pr.updated_at))
+
+PROFILE_CACHE = LRUCache(maxsize=VOICE_CACHE_SIZE, ttl=VOICE_CACHE_TTL_S)   # user_uid -> ProfileSet
+SESSION_CACHE = LRUCache(maxsize=VOICE_CACHE_SIZE, ttl=VOICE_CACHE_TTL_S)   # session_id -> user_uid
+
+async def _load_profiles(s: AsyncSession, uid: str) -> ProfileSet:
+    pset = PROFILE_CACHE.get(uid)
+    if pset is None:
+        rows = (await s.exec(select(BiometricVoiceProfile).where(BiometricVoiceProfile.user_uid == uid))).all()
+        pset = ProfileSet(tuple(
+            CachedProfile(
+                condition_tag=pr.condition_tag,
+                avg_pitch_hz=pr.avg_pitch_hz,
+                avg_rms=pr.avg_rms,
+                norm_pitch=_norm_pitch(pr.avg_pitch_hz),
+                norm_rms=_norm_rms(pr.avg_rms),
+                id=pr.id,
+                baseline_pitch_hz=pr.baseline_pitch_hz,
+                baseline_pitch_var=pr.baseline_pitch_var,
+                baseline_rms=pr.baseline_rms,
+                baseline_rms_var=pr.baseline_rms_var,
+                baseline_n=pr.baseline_n or 0,
+                updated_at=pr.updated_at,
+            )
+            for pr in rows
+        ))
+        PROFILE_CACHE.set(uid, pset)
+    return pset
+
+async def _session_owner(s: AsyncSession, session_id: int) -> Optional[str]:
+    owner = SESSION_CACHE.get(session_id)
+    if owner is None:
+        sess = await s.get(VoiceSession, session_id)
+        if not sess:
+            return None  # not cached: the session may be created on another worker
+        owner = sess.user_uid
+        SESSION_CACHE.set(session_id, owner)
+    return owner
+
+OWNER_THRESHOLD = 0.55  # tune later
+PING_BATCH_MAX = int(os.getenv("PING_BATCH_MAX", "256"))
+
+# Below this many profiles a plain loop beats NumPy's per-call overhead
+VECTORIZE_MIN_PROFILES = int(os.getenv("VECTORIZE_MIN_PROFILES", "16"))
+
+def _score_profiles(pitch, rms, pset: ProfileSet) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Score N pings against all P profiles in one pass.
+    Returns (best_index[N], best_similarity[N]); ties go to the first profile,
+    exactly like _choose_best_profile. `pset` must be non-empty.
+    """
+    pitch = np.asarray(pitch, dtype=np.float64).reshape(-1, 1)
+    rms = np.asarray(rms, dtype=np.float64).reshape(-1, 1)
+    sp = _norm_pitch_vec(pitch)
+    sr = _norm_rms_vec(rms)
+    dp = sp - pset.norms[0]
+    dr = sr - pset.norms[1]
+    sim = _sim_from_distance_vec(np.sqrt(dp * dp + dr * dr))  # (N, P)
+    if pset.n_adapted:
+        # Mahalanobis-style (diagonal) distance to the learned baseline, same clamps as _norm_*
+        bp = np.fmax(0.0, np.fmin(500.0, pitch)) - pset.base[0]
+        br = np.fmax(0.0, np.fmin(0.25, rms)) - pset.base[2]
+        d2 = bp * bp / pset.base[1] + br * br / pset.base[3]
+        sim = np.where(pset.base_n >= BASELINE_MIN_N, 1.0 / (1.0 + d2 / BASELINE_K), sim)
+    idx = sim.argmax(axis=1)
+    return idx, sim[np.arange(idx.shape[0]), idx]
+
+def _match_cached(pitch: float, rms: float, pset: ProfileSet) -> Tuple[Optional[int], float]:
+    """Index of the best profile (None if there are none) and its similarity."""
+    if not pset:
+        return None, 0.0
+    if pset.n_adapted or len(pset) >= VECTORIZE_MIN_PROFILES:
+        idx, sim = _score_profiles(pitch, rms, pset)
+        return int(idx[0]), float(sim[0])
+    # Same scoring as _choose_best_profile, on pre-normalized profiles
+    sample = (_norm_pitch(pitch), _norm_rms(rms))
+    best = None
+    best_sim = -1.0
+    for i, pr in enumerate(pset.profiles):
+        sim = _owner_similarity(sample, (pr.norm_pitch, pr.norm_rms))
+        if sim > best_sim:
+            best_sim = sim
+            best = i
+    return best, best_sim
+
+def _choose_best_cached(pitch: float, rms: float, pset: ProfileSet) -> Tuple[Optional[CachedProfile], float]:
+    i, sim = _match_cached(pitch, rms, pset)
+    return (pset.profiles[i] if i is not None else None), sim
+
+# -------------------- Face index --------------------
+# Normalized face signatures live in an in-memory FaceIndex per signature
+# dimension. Each worker catches up with rows saved elsewhere by reading only
+# rows whose updated_at moved, at most every FACE_SYNC_INTERVAL_S.
+
+FACE_MATCH_THRESHOLD = float(os.getenv("FACE_MATCH_THRESHOLD", "0.90"))   # centered cosine
+FACE_IDENTIFY_ENABLED = os.getenv("FACE_IDENTIFY_ENABLED", "0") == "1"    # 1:N search reveals other users
+FACE_SYNC_INTERVAL_S = float(os.getenv("FACE_SYNC_INTERVAL_S", "5"))
+
+def _face_data(blob: Optional[bytes], legacy_json: str) -> List[float]:
+    if blob:
+        return unpack_signature(blob)
+    return json.loads(legacy_json)["data"] if legacy_json else []
+
+class FaceStore:
+    def __init__(self):
+        self.indexes: Dict[int, FaceIndex] = {}
+        self._lock = threading.Lock()
+        self._synced_to: Optional[datetime] = None   # newest updated_at loaded
+        self._checked = 0.0
+
+    def index(self, dim: int) -> Optional[FaceIndex]:
+        return self.indexes.get(dim)
+
+    def put(self, uid: str, data) -> Optional[np.ndarray]:
+        unit = normalize(data)
+        dim = unit.shape[0] if unit is not None else None
+        if unit is not None:
+            idx = self.indexes.get(dim)
+            if idx is None:
+                idx = self.indexes.setdefault(dim, FaceIndex(dim))
+            idx.upsert(uid, unit)
+        # re-enrolled at another signature size: drop the old row
+        for other_dim, idx in list(self.indexes.items()):
+            if other_dim != dim:
+                idx.remove(uid)
+        return unit
+
+    def sync(self, s: Session, force: bool = False):
+        now = time.monotonic()
+        if not force and self._checked and now - self._checked < FACE_SYNC_INTERVAL_S:
+            return
+        with self._lock:
+            q = select(BiometricFace.user_uid, BiometricFace.signature_blob,
+                       BiometricFace.signature_json, BiometricFace.updated_at)
+            if self._synced_to is not None:
+                q = q.where(BiometricFace.updated_at >= self._synced_to)  # >=: re-putting a row is harmless
+            for uid, blob, legacy, updated_at in s.exec(q):
+                self.put(uid, _face_data(blob, legacy))
+                if self._synced_to is None or updated_at > self._synced_to:
+                    self._synced_to = updated_at
+            self._checked = now
+
+FACES = FaceStore()
+
+def _face_unit(payload: FacePayload) -> np.ndarray:
+    sig = payload.signature
+    if len(sig.data) != sig.size * sig.size:
+        raise HTTPException(400, "signature.data must have size*size values")
+    unit = normalize(sig.data)
+    if unit is None:
+        raise HTTPException(400, "Face signature is blank")
+    return unit
+
 # -------------------- Routes --------------------
 
 @router.post("/face")
 def save_face(payload: FacePayload, uid: str = Depends(current_user_sub), s: Session = Depends(get_session)):
-    import json
+    _face_unit(payload)  # reject malformed / blank signatures before storing
     now = datetime.utcnow()
     row = s.exec(select(BiometricFace).where(BiometricFace.user_uid == uid)).first()
-    sig_json = json.dumps(payload.signature.dict())
+    blob = pack_signature(payload.signature.data)
     if row:
-        row.signature_json = sig_json
+        row.version = payload.version
+        row.signature_blob = blob
+        row.signature_size = payload.signature.size
+        row.signature_json = ""
         row.updated_at = now
         s.add(row)
     else:
-        s.add(BiometricFace(user_uid=uid, version=payload.version, signature_json=sig_json))
+        s.add(BiometricFace(user_uid=uid, version=payload.version, signature_blob=blob,
+                            signature_size=payload.signature.size))
     s.commit()
+    FACES.put(uid, payload.signature.data)
     return {"ok": True}
 
+@router.post("/face/verify", response_model=FaceVerifyOut)
+def verify_face(payload: FacePayload, uid: str = Depends(current_user_sub), s: Session = Depends(get_session)):
+    """1:1 check of a fresh capture against the caller's enrolled signature."""
+    unit = _face_unit(payload)
+    FACES.sync(s)
+    idx = FACES.index(unit.shape[0])
+    score = idx.verify(uid, unit) if idx else None
+    if score is None:
+        FACES.sync(s, force=True)  # enrolled on another worker since the last sync?
+        idx = FACES.index(unit.shape[0])
+        score = idx.verify(uid, unit) if idx else None
+        if score is None:
+            raise HTTPException(404, "No face enrolled at this signature size")
+    return {"match": score >= FACE_MATCH_THRESHOLD, "score": score, "threshold": FACE_MATCH_THRESHOLD}
+
+@router.post("/face/identify", response_model=FaceIdentifyOut)
+def identify_face(payload: FacePayload, k: int = Query(1, ge=1, le=10),
+                  uid: str = Depends(current_user_sub), s: Session = Depends(get_session)):
+    """1:N search over every enrolled face (off unless FACE_IDENTIFY_ENABLED=1)."""
+    if not FACE_IDENTIFY_ENABLED:
+        raise HTTPException(404, "Not Found")
+    unit = _face_unit(payload)
+    FACES.sync(s)
+    idx = FACES.index(unit.shape[0])
+    hits = idx.identify(unit, k) if idx else []
+    return {
+        "matches": [{"user_uid": u, "score": sc} for u, sc in hits if sc >= FACE_MATCH_THRESHOLD],
+        "threshold": FACE_MATCH_THRESHOLD,
+    }
+
 @router.post("/voice/enroll")
 def enroll_voice(payload: VoiceEnrollPayload, uid: str = Depends(current_user_sub), s: Session = Depends(get_session)):
     now = datetime.utcnow()
@@ -167,8 +515,12 @@ def enroll_voice(payload: VoiceEnrollPayload, uid: str = Depends(current_user_su
             )
         ).first()
     if existing:
+        # new updated_at: baseline updates still queued for the old one are dropped
         existing.avg_pitch_hz = payload.avg_pitch_hz
         existing.avg_rms = payload.avg_rms
+        existing.baseline_pitch_hz = existing.baseline_pitch_var = None
+        existing.baseline_rms = existing.baseline_rms_var = None
+        existing.baseline_n = 0
         existing.updated_at = now
         s.add(existing)
     else:
@@ -178,38 +530,42 @@ def enroll_voice(payload: VoiceEnrollPayload, uid: str = Depends(current_user_su
             condition_tag=payload.condition_tag
         ))
     s.commit()
+    PROFILE_CACHE.pop(uid)
     return {"ok": True}
 
 @router.post("/voice/session/start", response_model=SessionStartOut)
 def start_session(payload: SessionStartPayload, uid: str = Depends(current_user_sub), s: Session = Depends(get_session)):
     row = VoiceSession(user_uid=uid, origin=payload.origin, device_label=payload.device_label)
     s.add(row); s.commit(); s.refresh(row)
+    SESSION_CACHE.set(row.id, uid)
     return {"session_id": row.id}
 
-@router.post("/voice/ping", response_model=VoicePingOut)
-def voice_ping(payload: VoicePingPayload, uid: str = Depends(current_user_sub), s: Session = Depends(get_session)):
-    # Validate session belongs to user
-    sess = s.get(VoiceSession, payload.session_id)
-    if not sess or sess.user_uid != uid:
-        raise HTTPException(404, "Session not found")
-
-    # Load all profiles for user
-    profiles = s.exec(select(BiometricVoiceProfile).where(BiometricVoiceProfile.user_uid == uid)).all()
-
-    # Pick best profile & similarity
-    best, sim = _choose_best_profile(payload.pitch_hz, payload.rms, profiles)
-    is_owner = sim >= 0.55  # threshold; tune later
+def _record_ping(uid: str, payload: VoicePingPayload, pset: ProfileSet, i: Optional[int], sim: float) -> VoicePingOut:
+    is_owner = sim >= OWNER_THRESHOLD
+    best = pset.profiles[i] if i is not None else None
 
-    # Emotion & Health
+    # Emotion & Health (against the learned baseline once there is one)
     emo = _classify_emotion(payload.pitch_hz, payload.rms, payload.snr_db)
-    base_pitch = best.avg_pitch_hz if best else None
-    base_rms = best.avg_rms if best else None
+    base_pitch = base_rms = None
+    if best:
+        adapted = pset.base_n[i] >= BASELINE_MIN_N
+        base_pitch = float(pset.base[0, i]) if adapted else best.avg_pitch_hz
+        base_rms = float(pset.base[2, i]) if adapted else best.avg_rms
     health = _health_flag(payload.pitch_hz, payload.rms, base_pitch, base_rms, payload.snr_db)
 
-    # Persist ping
+    # Learn from clean, confident owner pings only (never from flagged ones)
+    if (is_owner and not health and payload.snr_db is not None
+            and payload.snr_db >= BASELINE_MIN_SNR_DB and payload.pitch_hz > 0):
+        _update_baseline(pset, i, payload.pitch_hz, payload.rms)
+
+    # Persist ping (write-behind, flushed in bulk)
     pr_tag = best.condition_tag if best else None
-    ping = VoicePing(
+    now = datetime.utcnow()
+    PING_BUFFER.add(dict(
         session_id=payload.session_id,
+        user_uid=uid,
+        day=day_of(now),
+        ts=now,
         pitch_hz=payload.pitch_hz,
         rms=payload.rms,
         zcr=payload.zcr,
@@ -219,8 +575,7 @@ def voice_ping(payload: VoicePingPayload, uid: str = Depends(current_user_sub),
         is_owner=is_owner,
         matched_profile_tag=pr_tag,
         health_flag=health,
-    )
-    s.add(ping); s.commit()
+    ))
 
     return VoicePingOut(
         emotion=emo,
@@ -231,12 +586,155 @@ def voice_ping(payload: VoicePingPayload, uid: str = Depends(current_user_sub),
         snr_db=payload.snr_db,
     )
 
+async def _process_pings(s: AsyncSession, uid: str, payloads: List[VoicePingPayload]) -> List[VoicePingOut]:
+    """
+    Shared by the single, batch and WebSocket ping endpoints. Warm calls are
+    served from memory; a cache miss awaits the async engine instead of
+    holding a threadpool worker.
+    """
+    # Validate sessions belong to user (cached)
+    for session_id in {p.session_id for p in payloads}:
+        if await _session_owner(s, session_id) != uid:
+            raise HTTPException(404, "Session not found")
+
+    # Load all profiles for user (cached, pre-normalized)
+    pset = await _load_profiles(s, uid)
+
+    # Pick best profile & similarity; batches are scored in one vectorized pass
+    # (against the baseline as it stood when the batch arrived)
+    if len(payloads) > 1 and pset:
+        idx, sims = _score_profiles([p.pitch_hz for p in payloads], [p.rms for p in payloads], pset)
+        matches = list(zip(idx.tolist(), sims.tolist()))
+    else:
+        matches = [_match_cached(p.pitch_hz, p.rms, pset) for p in payloads]
+
+    return [_record_ping(uid, p, pset, i, sim) for p, (i, sim) in zip(payloads, matches)]
+
+@router.post("/voice/ping", response_model=VoicePingOut)
+async def voice_ping(payload: VoicePingPayload, uid: str = Depends(current_user_sub),
+                     s: AsyncSession = Depends(get_async_session)):
+    return (await _process_pings(s, uid, [payload]))[0]
+
+@router.post("/voice/ping/batch", response_model=List[VoicePingOut])
+async def voice_ping_batch(payloads: List[VoicePingPayload], uid: str = Depends(current_user_sub),
+                           s: AsyncSession = Depends(get_async_session)):
+    if len(payloads) > PING_BATCH_MAX:
+        raise HTTPException(413, f"At most {PING_BATCH_MAX} pings per batch")
+    if not payloads:
+        return []
+    return await _process_pings(s, uid, payloads)
+
+@router.websocket("/voice/ws")
+async def voice_ping_ws(ws: WebSocket, token: Optional[str] = None):
+    """
+    Streaming pings. Authenticate once with ?token=<jwt> (or a first message
+    {"token": "..."}), then send a ping object or a list of them per message;
+    each message is answered with the matching VoicePingOut (or list).
+    Bad messages get an {"error", "status"} frame and the stream stays open;
+    every message spends one token of the caller's `ping` rate-limit bucket.
+    """
+    await ws.accept()
+    try:
+        if not token:
+            token = (await ws.receive_json() or {}).get("token")
+        uid = verify_token(token).get("sub") if token else None
+    except WebSocketDisconnect:
+        return
+    except Exception:
+        uid = None
+    if not uid:
+        await ws.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    ip = ws.client.host if ws.client else "unknown"
+    policy = policy_for("/biometrics/voice/ping")
+    try:
+        while True:
+            frame = await ws.receive()
+            if frame["type"] == "websocket.disconnect":
+                break
+            text = frame.get("text")
+            if text is None:
+                await ws.close(code=status.WS_1003_UNSUPPORTED_DATA)  # binary frame
+                break
+            try:
+                decision = await acheck(policy, ip, uid) if RATE_LIMIT_ENABLED else None
+                if decision is not None and not decision.allowed:
+                    await ws.send_json({"error": "Rate limit", "status": 429,
+                                        "retry_after": math.ceil(decision.retry_after)})
+                    continue
+                msg = json.loads(text)
+                many = isinstance(msg, list)
+                payloads = [VoicePingPayload(**m) for m in (msg if many else [msg])]
+                if len(payloads) > PING_BATCH_MAX:
+                    raise HTTPException(413, f"At most {PING_BATCH_MAX} pings per batch")
+                if not payloads:
+                    await ws.send_json([])
+                    continue
+                async with AsyncSession(get_async_engine(), expire_on_commit=False) as s:
+                    out = await _process_pings(s, uid, payloads)
+            except HTTPException as e:
+                await ws.send_json({"error": e.detail, "status": e.status_code})
+                continue
+            except (ValidationError, TypeError, ValueError) as e:
+                # ValueError covers json.JSONDecodeError for non-JSON frames
+                await ws.send_json({"error": str(e), "status": 422})
+                continue
+            data = [o.model_dump() for o in out]
+            await ws.send_json(data if many else data[0])
+    except WebSocketDisconnect:
+        pass
+
 @router.post("/voice/session/stop")
 def stop_session(session_id: int, uid: str = Depends(current_user_sub), s: Session = Depends(get_session)):
     row = s.get(VoiceSession, session_id)
     if not row or row.user_uid != uid:
         raise HTTPException(404, "Session not found")
+    # Make sure every ping of this session is on disk before it is closed
+    PING_BUFFER.flush()
+    SESSION_CACHE.pop(session_id)
+    # Write the learned baselines before dropping the ProfileSet that holds
+    # them, so the next load reads them back instead of an older row
+    BASELINE_BUFFER.flush()
+    PROFILE_CACHE.pop(uid)
     if not row.ended_at:
-        row.ended_at = datetime.utcnow()
-        s.add(row); s.commit()
+        now = datetime.utcnow()
+        row.ended_at = now
+        stats = s.get(VoiceSessionStats, session_id) or VoiceSessionStats(session_id=session_id, user_uid=uid)
+        stats.finalized_at = now
+        s.add(row); s.add(stats); s.commit()
     return {"ok": True}
+
+# Both read the running aggregates kept by the ping sink; never the ping table.
+
+@router.get("/voice/session/{session_id}/summary", response_model=VoiceSessionSummaryOut)
+def session_summary(session_id: int, uid: str = Depends(current_user_sub), s: Session = Depends(get_session)):
+    row = s.get(VoiceSession, session_id)
+    if not row or row.user_uid != uid:
+        raise HTTPException(404, "Session not found")
+    if not row.ended_at:
+        PING_BUFFER.flush()  # include this worker's queued pings in a live session
+    return summarize(s.get(VoiceSessionStats, session_id), row)
+
+@router.get("/voice/history", response_model=List[VoiceSessionSummaryOut])
+def voice_history(limit: int = Query(20, ge=1, le=200), before: Optional[int] = None,
+                  uid: str = Depends(current_user_sub), s: Session = Depends(get_session)):
+    """The caller's sessions, newest first. Page with ?before=<last session_id seen>."""
+    q = (
+        select(VoiceSession, VoiceSessionStats)
+        .join(VoiceSessionStats, VoiceSessionStats.session_id == VoiceSession.id, isouter=True)
+        .where(VoiceSession.user_uid == uid)
+    )
+    if before is not None:
+        q = q.where(VoiceSession.id < before)
+    rows = s.exec(q.order_by(VoiceSession.id.desc()).limit(limit)).all()
+    return [summarize(stats, sess) for sess, stats in rows]
+
+@router.get("/voice/ingest/stats")
+def ingest_stats(_: str = Depends(current_user_sub)):
+    """Buffer and cache internals; signed-in callers only (the same numbers are on /metrics)."""
+    stats = PING_BUFFER.stats()
+    stats["profile_cache"] = PROFILE_CACHE.stats()
+    stats["baseline"] = BASELINE_BUFFER.stats()
+    stats["session_cache"] = SESSION_CACHE.stats()
+    return stats
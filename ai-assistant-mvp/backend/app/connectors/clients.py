@@ -0,0 +1,111 @@
+import asyncio, os, time
+from email.message import EmailMessage
+from typing import TYPE_CHECKING, List, Optional
+
+import httpx
+
+if TYPE_CHECKING:
+    import aiosmtplib  # imported on the first email send
+
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_USER = os.getenv("SMTP_USER")
+SMTP_PASS = os.getenv("SMTP_PASS")
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "1") == "1"
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "2"))
+SMTP_IDLE_S = float(os.getenv("SMTP_IDLE_S", "60"))  # servers drop idle sessions; reconnect past this
+
+# One keep-alive HTTP client shared by the Telegram and Twilio connectors
+_http: Optional[httpx.AsyncClient] = None
+
+def http_client() -> httpx.AsyncClient:
+    global _http
+    if _http is None or _http.is_closed:
+        _http = httpx.AsyncClient(
+            timeout=15,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30),
+        )
+    return _http
+
+
+class SMTPPool:
+    """
+    Up to `size` logged-in SMTP sessions reused across messages. A session
+    that fails mid-send, or sat idle longer than SMTP_IDLE_S, is replaced by a
+    fresh connect + STARTTLS + login and the message is retried once.
+    """
+
+    def __init__(self, size: int = SMTP_POOL_SIZE):
+        self.size = size
+        self._idle: List[tuple] = []  # (client, last_used)
+        self._sem: Optional[asyncio.Semaphore] = None
+
+    async def _connect(self) -> "aiosmtplib.SMTP":
+        import aiosmtplib
+        client = aiosmtplib.SMTP(hostname=SMTP_HOST, port=SMTP_PORT, start_tls=SMTP_STARTTLS, timeout=15)
+        await client.connect()
+        if SMTP_USER and SMTP_PASS:
+            await client.login(SMTP_USER, SMTP_PASS)
+        return client
+
+    async def _acquire(self) -> "aiosmtplib.SMTP":
+        now = time.monotonic()
+        while self._idle:
+            client, last = self._idle.pop()
+            if client.is_connected and now - last < SMTP_IDLE_S:
+                return client
+            await self._discard(client)
+        return await self._connect()
+
+    async def _discard(self, client: "aiosmtplib.SMTP"):
+        try:
+            if client.is_connected:
+                await client.quit()
+        except Exception:
+            client.close()
+
+    async def send(self, msg: EmailMessage):
+        import aiosmtplib
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.size)
+        async with self._sem:
+            client = await self._acquire()
+            try:
+                await client.send_message(msg)
+            except (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPConnectError, ConnectionError):
+                client.close()
+                client = await self._connect()
+                try:
+                    await client.send_message(msg)
+                except Exception:
+                    await self._discard(client)
+                    raise
+            except Exception:
+                await self._discard(client)
+                raise
+            self._idle.append((client, time.monotonic()))
+
+    async def close(self):
+        idle, self._idle = self._idle, []
+        for client, _ in idle:
+            await self._discard(client)
+        self._sem = None
+
+
+SMTP_POOL = SMTPPool()
+
+
+async def open_connectors():
+    # Warm the shared client only when a channel that uses it is configured;
+    # otherwise it is built on first use (TLS setup is ~50 ms of cold start).
+    from .telegram_bot import TELEGRAM_BOT_TOKEN
+    from .whatsapp_twilio import TWILIO_ACCOUNT_SID
+    if TELEGRAM_BOT_TOKEN or TWILIO_ACCOUNT_SID:
+        http_client()
+
+async def close_connectors():
+    global _http
+    if _http is not None:
+        await _http.aclose()
+        _http = None
+    await SMTP_POOL.close()
@@ -1,18 +1,18 @@
-import aiosmtplib, os
+import os
 from email.message import EmailMessage
+from .clients import SMTP_POOL, SMTP_USER, SMTP_PASS
+from ..metrics import track_upstream
 
-SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
-SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
-SMTP_USER = os.getenv("SMTP_USER")
-SMTP_PASS = os.getenv("SMTP_PASS")
 SMTP_FROM = os.getenv("SMTP_FROM", SMTP_USER)
+EMAIL_CONFIGURED = bool(SMTP_USER and SMTP_PASS)
 
+@track_upstream("smtp")
 async def send_email(to: str, text: str):
-    if not (SMTP_USER and SMTP_PASS):
+    if not EMAIL_CONFIGURED:
         raise RuntimeError("SMTP credentials not set")
     msg = EmailMessage()
     msg["From"] = SMTP_FROM
     msg["To"] = to
     msg["Subject"] = "AI Assistant Message"
     msg.set_content(text)
-    await aiosmtplib.send(msg, hostname=SMTP_HOST, port=SMTP_PORT, start_tls=True, username=SMTP_USER, password=SMTP_PASS)
+    await SMTP_POOL.send(msg)
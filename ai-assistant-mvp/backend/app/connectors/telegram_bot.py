@@ -1,12 +1,16 @@
-import os, httpx
+import os
+from .clients import http_client
+from ..metrics import track_upstream
 
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
+TELEGRAM_API_BASE = os.getenv("TELEGRAM_API_BASE", "https://api.telegram.org")
+TELEGRAM_CONFIGURED = bool(TELEGRAM_BOT_TOKEN)
 
+@track_upstream("telegram")
 async def send_telegram(chat_id: str, text: str):
-    if not TELEGRAM_BOT_TOKEN:
+    if not TELEGRAM_CONFIGURED:
         raise RuntimeError("TELEGRAM_BOT_TOKEN not set")
-    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-    async with httpx.AsyncClient(timeout=15) as client:
-        r = await client.post(url, json={"chat_id": chat_id, "text": text})
-        r.raise_for_status()
-        return r.json()
+    url = f"{TELEGRAM_API_BASE}/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
+    r = await http_client().post(url, json={"chat_id": chat_id, "text": text})
+    r.raise_for_status()
+    return r.json()
@@ -1,16 +1,20 @@
-import os, httpx
+import os
+from .clients import http_client
+from ..metrics import track_upstream
 
 TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
 TWILIO_WHATSAPP_FROM = os.getenv("TWILIO_WHATSAPP_FROM")  # e.g. 'whatsapp:+14155238886'
+TWILIO_API_BASE = os.getenv("TWILIO_API_BASE", "https://api.twilio.com")
+WHATSAPP_CONFIGURED = all([TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_WHATSAPP_FROM])
 
+@track_upstream("twilio")
 async def send_whatsapp(to: str, text: str):
-    if not all([TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_WHATSAPP_FROM]):
+    if not WHATSAPP_CONFIGURED:
         raise RuntimeError("Twilio WhatsApp env not set")
-    url = f"https://api.twilio.com/2010-04-01/Accounts/{TWILIO_ACCOUNT_SID}/Messages.json"
+    url = f"{TWILIO_API_BASE}/2010-04-01/Accounts/{TWILIO_ACCOUNT_SID}/Messages.json"
     auth = (TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
     data = {"From": TWILIO_WHATSAPP_FROM, "To": f"whatsapp:{to}", "Body": text}
-    async with httpx.AsyncClient(timeout=15, auth=auth) as client:
-        r = await client.post(url, data=data)
-        r.raise_for_status()
-        return r.json()
+    r = await http_client().post(url, data=data, auth=auth)
+    r.raise_for_status()
+    return r.json()
@@ -1,20 +1,222 @@
+import os
+import threading
+import time
+from collections import Counter, deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import UniqueConstraint
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import SQLModel, Field, Session, select
+
+from .cache import LRUCache
+from .db import get_engine
+from .write_behind import WriteBehindBuffer
+
 CRISIS_KEYWORDS = {
     "suicide", "kill myself", "end my life", "harm myself",
     "murder", "kill someone", "rape",
 }
 
-class CrisisCounter:
-    def __init__(self):
-        self.count = 0
-    def record(self, text: str) -> int:
-        lower = text.lower()
-        if any(k in lower for k in CRISIS_KEYWORDS):
-            self.count += 1
-        return self.count
-
-COUNTERS = {}
-
-def get_counter(user_uid: str) -> CrisisCounter:
-    if user_uid not in COUNTERS:
-        COUNTERS[user_uid] = CrisisCounter()
-    return COUNTERS[user_uid]
+CRISIS_WINDOW_S = float(os.getenv("CRISIS_WINDOW_S", "86400"))   # hits older than this stop counting
+CRISIS_MAX_USERS = int(os.getenv("CRISIS_MAX_USERS", "100000"))  # users cached in memory
+CRISIS_BUCKET_S = float(os.getenv("CRISIS_BUCKET_S", "3600"))     # window granularity
+CRISIS_FLUSH_INTERVAL_S = float(os.getenv("CRISIS_FLUSH_INTERVAL_S", "2.0"))
+CRISIS_THRESHOLD = 3  # matching messages in the window before the trusted contact is alerted
+
+# -------------------- Keyword automaton --------------------
+
+def _needs_boundary(ch: str) -> bool:
+    # Scripts written without spaces (CJK and up) have no word boundaries to check
+    return ch.isalnum() and ord(ch) < 0x2E80
+
+def _is_word(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick matcher: finds every keyword occurrence in one pass over the
+    text, case-insensitively (casefold) and with runs of whitespace treated as
+    a single space. A keyword must start at a word boundary but may carry a
+    suffix, so inflected forms still count while words that merely contain
+    a keyword do not:
+
+    >>> m = KeywordAutomaton(["murder", "rape", "kill myself"])
+    >>> [m.search(t) for t in ("He was murdered", "a murderer", "she was raped")]
+    [True, True, True]
+    >>> [m.search(t) for t in ("grapes", "skill myself", "Kill   MYSELF")]
+    [False, False, True]
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self._goto: List[dict] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[str, ...]] = [()]
+        for kw in keywords:
+            kw = " ".join(kw.casefold().split())
+            if kw:
+                self._add(kw)
+        self._link()
+
+    def _add(self, kw: str):
+        node = 0
+        for ch in kw:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            node = nxt
+        self._out[node] = self._out[node] + (kw,)
+
+    def _link(self):
+        # BFS over the trie; fail links point at the longest proper suffix state
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find_all(self, text: str) -> List[Tuple[int, str]]:
+        """Return (start, keyword) for every match, offsets into the normalized text."""
+        goto, fail, out = self._goto, self._fail, self._out
+        norm = []
+        hits = []
+        node = 0
+        for ch in text.casefold():
+            if ch.isspace():
+                if norm and norm[-1] == " ":
+                    continue
+                ch = " "
+            norm.append(ch)
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for kw in out[node]:
+                hits.append((len(norm) - len(kw), kw))
+
+        if not hits:
+            return hits
+        # only the start is checked: "murdered" and "raped" must still match
+        return [
+            (start, kw) for start, kw in hits
+            if not (_needs_boundary(kw[0]) and start > 0 and _is_word(norm[start - 1]))
+        ]
+
+    def search(self, text: str) -> bool:
+        return bool(self.find_all(text))
+
+
+CRISIS_MATCHER = KeywordAutomaton(CRISIS_KEYWORDS)
+
+# -------------------- Persistent per-user counts --------------------
+# Matching messages are counted per user in CRISIS_BUCKET_S wall-clock buckets
+# stored in the shared DB, so every worker (and a restarted one) sees the same
+# window. Each worker keeps a write-through copy of recent buckets; upserts are
+# batched, and only an escalation decision forces a flush + read.
+
+class CrisisCount(SQLModel, table=True):
+    __table_args__ = (UniqueConstraint("user_uid", "bucket"),)
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_uid: str = Field(index=True)
+    bucket: int = Field(index=True)   # unix time // CRISIS_BUCKET_S
+    count: int = 0
+
+
+class CrisisStore:
+    def __init__(self, window_s: float = CRISIS_WINDOW_S, bucket_s: float = CRISIS_BUCKET_S,
+                 max_users: int = CRISIS_MAX_USERS):
+        self.window_s = window_s
+        self.bucket_s = bucket_s
+        self._cache = LRUCache(maxsize=max_users, ttl=window_s)  # user_uid -> {bucket: count}
+        self._lock = threading.Lock()
+        self._purged_below = 0
+        self.buffer = WriteBehindBuffer("crisis", self._upsert, max_batch=500, max_delay=CRISIS_FLUSH_INTERVAL_S)
+
+    def _bucket(self, now: float) -> int:
+        return int(now // self.bucket_s)
+
+    def _first_bucket(self, now: float) -> int:
+        return int((now - self.window_s) // self.bucket_s) + 1
+
+    def _upsert(self, items: List[Tuple[str, int]]):
+        totals = Counter(items)
+        table = CrisisCount.__table__
+        engine = get_engine()
+        if engine.dialect.name == "mysql":
+            stmt = mysql_insert(table)
+            stmt = stmt.on_duplicate_key_update(count=table.c.count + stmt.inserted.count)
+        elif engine.dialect.name in ("postgresql", "sqlite"):
+            stmt = (pg_insert if engine.dialect.name == "postgresql" else sqlite_insert)(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["user_uid", "bucket"],
+                set_={"count": table.c.count + stmt.excluded.count},
+            )
+        else:
+            raise NotImplementedError(f"crisis count upsert not implemented for {engine.dialect.name}")
+        first = self._first_bucket(time.time())
+        with engine.begin() as con:
+            con.execute(stmt, [{"user_uid": u, "bucket": b, "count": n} for (u, b), n in totals.items()])
+            if first > self._purged_below:
+                con.execute(table.delete().where(table.c.bucket < first))
+                self._purged_below = first
+
+    def _window_sum(self, buckets: Dict[int, int], now: float) -> int:
+        first = self._first_bucket(now)
+        for b in [b for b in buckets if b < first]:
+            del buckets[b]
+        return sum(buckets.values())
+
+    def count(self, user_uid: str) -> int:
+        """Window count as this worker last knew it (no DB access)."""
+        with self._lock:
+            return self._window_sum(self._cache.get(user_uid) or {}, time.time())
+
+    def record_hit(self, user_uid: str, sync: bool = False) -> int:
+        """
+        Count one crisis-matching message. With sync=True the pending batch is
+        flushed and the count re-read from the DB, so hits recorded by other
+        workers are included; use it when the result may trigger escalation.
+        """
+        now = time.time()
+        bucket = self._bucket(now)
+        with self._lock:
+            buckets = self._cache.get(user_uid) or {}
+            buckets[bucket] = buckets.get(bucket, 0) + 1
+            self._cache.set(user_uid, buckets)
+        self.buffer.add((user_uid, bucket))
+        if not sync:
+            return self.count(user_uid)
+
+        self.buffer.flush()
+        first = self._first_bucket(now)
+        with Session(get_engine()) as s:
+            rows = s.exec(
+                select(CrisisCount.bucket, CrisisCount.count).where(
+                    (CrisisCount.user_uid == user_uid) & (CrisisCount.bucket >= first)
+                )
+            ).all()
+        buckets = {b: n for b, n in rows}
+        with self._lock:
+            self._cache.set(user_uid, buckets)
+        return sum(buckets.values())
+
+    def reset(self, user_uid: str):
+        """Clear the user's window on every worker (the DB rows are the shared state)."""
+        self.buffer.flush()
+        with self._lock:
+            self._cache.pop(user_uid)
+        with get_engine().begin() as con:
+            con.execute(CrisisCount.__table__.delete().where(CrisisCount.__table__.c.user_uid == user_uid))
+
+
+CRISIS_STORE = CrisisStore()
@@ -4,16 +4,126 @@
 import os
 from typing import Optional
 
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlmodel import SQLModel, Field, Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 # --- Database URL + Engine ---
 # Prefer DATABASE_URL, fallback to legacy DB_URL, then default to local SQLite
 DATABASE_URL = os.getenv("DATABASE_URL") or os.getenv("DB_URL") or "sqlite:///./ai_assistant.db"
 
-# For SQLite, allow cross-thread access for FastAPI dev server
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
+DB_ECHO = os.getenv("DB_ECHO", "0") == "1"
 
-engine = create_engine(DATABASE_URL, echo=False, connect_args=connect_args)
+# Connection pool (server databases; SQLite file DBs use the same sizing)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT_S = float(os.getenv("DB_POOL_TIMEOUT_S", "30"))
+DB_POOL_RECYCLE_S = int(os.getenv("DB_POOL_RECYCLE_S", "1800"))  # below typical server/proxy idle cutoffs
+
+# SQLite pragmas, applied to every new connection
+SQLITE_WAL = os.getenv("SQLITE_WAL", "1") == "1"
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")         # NORMAL is durable under WAL except on power loss
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_BYTES = int(os.getenv("SQLITE_MMAP_BYTES", str(256 * 1024 * 1024)))
+SQLITE_CACHE_KB = int(os.getenv("SQLITE_CACHE_KB", "65536"))           # page cache per connection
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    return url in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in url
+
+
+def _sqlite_pragmas(dbapi_con, _record):
+    cur = dbapi_con.cursor()
+    try:
+        if SQLITE_WAL:
+            cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cur.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cur.execute(f"PRAGMA mmap_size={SQLITE_MMAP_BYTES}")
+        cur.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_KB}")  # negative = KiB, not pages
+        cur.execute("PRAGMA temp_store=MEMORY")
+    finally:
+        cur.close()
+
+
+def make_engine(url: str = DATABASE_URL, echo: bool = DB_ECHO) -> Engine:
+    """
+    Build an engine tuned for the backend in `url`.
+
+    SQLite: WAL (readers never block the writer), synchronous=NORMAL, a busy
+    timeout so threadpool writers wait instead of failing with "database is
+    locked", plus mmap and a larger page cache. In-memory databases keep
+    SQLAlchemy's default single-connection pool and skip WAL.
+
+    Server databases (Postgres, MySQL): explicit pool size/overflow, pre-ping
+    so connections dropped by the server are replaced transparently, and
+    recycle so none outlives a proxy's idle timeout.
+    """
+    if url.startswith("sqlite"):
+        # allow cross-thread access for the FastAPI threadpool
+        connect_args = {"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000.0}
+        if _is_memory_sqlite(url):
+            return create_engine(url, echo=echo, connect_args=connect_args)
+        eng = create_engine(
+            url, echo=echo, connect_args=connect_args,
+            pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT_S,
+        )
+        event.listen(eng, "connect", _sqlite_pragmas)
+        return eng
+
+    return create_engine(
+        url, echo=echo,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT_S,
+        pool_recycle=DB_POOL_RECYCLE_S,
+        pool_pre_ping=True,
+    )
+
+
+engine = make_engine()
+
+# --- Async engine (hot endpoints) ---
+# Same database through an async driver, so async routes never park a
+# threadpool worker on I/O. Built on first use so the sync-only paths
+# (scripts, benches) don't need the async driver installed.
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+def async_url(url: str = DATABASE_URL) -> str:
+    scheme, rest = url.split("://", 1)
+    base = scheme.split("+", 1)[0]
+    return f"{ASYNC_DRIVERS.get(base, scheme)}://{rest}"
+
+def make_async_engine(url: str = DATABASE_URL, echo: bool = DB_ECHO) -> AsyncEngine:
+    aurl = async_url(url)
+    if url.startswith("sqlite"):
+        connect_args = {"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000.0}
+        if _is_memory_sqlite(url):
+            return create_async_engine(aurl, echo=echo, connect_args=connect_args)
+        eng = create_async_engine(
+            aurl, echo=echo, connect_args=connect_args,
+            pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT_S,
+        )
+        event.listen(eng.sync_engine, "connect", _sqlite_pragmas)
+        return eng
+
+    return create_async_engine(
+        aurl, echo=echo,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT_S,
+        pool_recycle=DB_POOL_RECYCLE_S,
+        pool_pre_ping=True,
+    )
+
+async_engine: Optional[AsyncEngine] = None
 
 # --- Engine accessors (imported by app.main) ---
 def get_engine():
@@ -31,6 +141,38 @@ def get_session():
     with Session(engine) as session:
         yield session
 
+def get_async_engine() -> AsyncEngine:
+    global async_engine
+    if async_engine is None:
+        async_engine = make_async_engine()
+    return async_engine
+
+async def get_async_session():
+    """
+    Async twin of get_session for `async def` routes:
+      async def route(s: AsyncSession = Depends(get_async_session)):
+          row = (await s.exec(select(User)...)).first()
+    A connection is only checked out once the session first touches the DB.
+    Objects stay loaded after commit (no implicit refresh I/O).
+    """
+    async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+        yield session
+
+def pool_stats() -> dict:
+    """Connection pool occupancy of both engines (QueuePool only; other pools report nothing)."""
+    out = {}
+    for name, eng in (("sync", engine), ("async", async_engine and async_engine.sync_engine)):
+        pool = getattr(eng, "pool", None)
+        if pool is not None and hasattr(pool, "checkedout"):
+            out[name] = {"size": pool.size(), "checked_out": pool.checkedout(), "overflow": pool.overflow()}
+    return out
+
+async def dispose_async_engine():
+    global async_engine
+    if async_engine is not None:
+        await async_engine.dispose()
+        async_engine = None
+
 # --- User model (kept here so `from .db import User` works everywhere) ---
 class User(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
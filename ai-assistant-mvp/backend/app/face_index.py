@@ -0,0 +1,96 @@
+# backend/app/face_index.py
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def pack_signature(data: Sequence[float]) -> bytes:
+    """Raw signature -> packed little-endian float32 (4 bytes per value vs ~18 as JSON text)."""
+    return np.asarray(data, dtype="<f4").tobytes()
+
+def unpack_signature(blob: bytes) -> np.ndarray:
+    return np.frombuffer(blob, dtype="<f4")
+
+def normalize(vec) -> Optional[np.ndarray]:
+    """
+    Zero-mean, unit-length float32 copy. Centering first makes the cosine a
+    correlation, so overall brightness (every pixel positive) doesn't make
+    all faces look alike. Returns None for a flat signature.
+    """
+    v = np.asarray(vec, dtype=np.float32).ravel()
+    v = v - v.mean()
+    norm = float(np.linalg.norm(v))
+    if not np.isfinite(norm) or norm < 1e-6:
+        return None
+    return v / norm
+
+
+class FaceIndex:
+    """
+    Normalized signatures of one dimension in a contiguous float32 matrix
+    (one row per user), so verify is a single dot product and identify is one
+    matrix-vector product over all users. Rows are replaced in place; capacity
+    doubles as users are added, and a removed row is filled with the last one.
+    """
+
+    def __init__(self, dim: int, capacity: int = 1024):
+        self.dim = dim
+        self._mat = np.zeros((capacity, dim), dtype=np.float32)
+        self._uids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._uids)
+
+    def __contains__(self, uid: str) -> bool:
+        return uid in self._rows
+
+    def upsert(self, uid: str, unit: np.ndarray):
+        """`unit` must come from normalize()."""
+        with self._lock:
+            row = self._rows.get(uid)
+            if row is None:
+                row = len(self._uids)
+                if row == self._mat.shape[0]:
+                    grown = np.zeros((row * 2, self.dim), dtype=np.float32)
+                    grown[:row] = self._mat
+                    self._mat = grown
+                self._uids.append(uid)
+                self._rows[uid] = row
+            self._mat[row] = unit
+
+    def remove(self, uid: str) -> bool:
+        with self._lock:
+            row = self._rows.pop(uid, None)
+            if row is None:
+                return False
+            last = len(self._uids) - 1
+            if row != last:
+                moved = self._uids[last]
+                self._mat[row] = self._mat[last]
+                self._uids[row] = moved
+                self._rows[moved] = row
+            self._uids.pop()
+            return True
+
+    def verify(self, uid: str, unit: np.ndarray) -> Optional[float]:
+        """Cosine score against `uid`'s signature, or None if not enrolled."""
+        row = self._rows.get(uid)
+        if row is None:
+            return None
+        return float(self._mat[row] @ unit)
+
+    def identify(self, unit: np.ndarray, k: int = 1) -> List[Tuple[str, float]]:
+        """Top-k (uid, score), best first. Brute force: one (N, dim) @ (dim,) product."""
+        with self._lock:  # remove() moves rows around
+            n = len(self._uids)
+            if not n:
+                return []
+            scores = self._mat[:n] @ unit
+            uids = list(self._uids)
+        k = min(k, n)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(uids[i], float(scores[i])) for i in top]
@@ -0,0 +1,195 @@
+# backend/app/google_auth.py
+import asyncio
+import base64
+import json
+import os
+import re
+import time
+from typing import Dict, Optional
+
+import httpx
+
+from .metrics import track_upstream
+
+# PEM certificates ({kid: pem}, oauth2/v1/certs) or a JWKS ({"keys": [...]}, oauth2/v3/certs)
+GOOGLE_CERTS_URL = os.getenv("GOOGLE_CERTS_URL", "https://www.googleapis.com/oauth2/v1/certs")
+GOOGLE_CERTS_DEFAULT_TTL_S = float(os.getenv("GOOGLE_CERTS_DEFAULT_TTL_S", "3600"))  # no max-age in the response
+GOOGLE_CERTS_REFRESH_AT = float(os.getenv("GOOGLE_CERTS_REFRESH_AT", "0.8"))  # refresh after this share of max-age
+GOOGLE_CERTS_RETRY_S = float(os.getenv("GOOGLE_CERTS_RETRY_S", "30"))  # failed refresh / unknown `kid` refetch
+GOOGLE_CLOCK_SKEW_S = int(os.getenv("GOOGLE_CLOCK_SKEW_S", "60"))
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+class InvalidGoogleToken(Exception):
+    pass
+
+class GoogleCertsUnavailable(Exception):
+    """No usable signing keys (first fetch failed, or the cached set expired and can't be refreshed)."""
+
+# -------------------- Key set --------------------
+
+def _b64(s: str) -> bytes:
+    return base64.urlsafe_b64decode(s + "=" * (-len(s) % 4))
+
+def _cache_ttl(headers: httpx.Headers) -> float:
+    m = _MAX_AGE.search(headers.get("Cache-Control", ""))
+    if not m:
+        return GOOGLE_CERTS_DEFAULT_TTL_S
+    return max(0.0, int(m.group(1)) - int(headers.get("Age", "0") or 0))
+
+def _parse_keys(data: dict) -> Dict[str, object]:
+    """kid -> google.auth.crypt verifier, built once per key set rather than per token."""
+    from google.auth import crypt
+
+    if "keys" in data:  # JWKS
+        import rsa
+        pems = {
+            k["kid"]: rsa.PublicKey(int.from_bytes(_b64(k["n"]), "big"), int.from_bytes(_b64(k["e"]), "big")).save_pkcs1()
+            for k in data["keys"] if k.get("kty") == "RSA"
+        }
+    else:
+        pems = data
+    return {kid: crypt.RSAVerifier.from_string(pem) for kid, pem in pems.items()}
+
+
+class GoogleCerts:
+    """
+    Google's ID-token signing keys, cached for the response's Cache-Control
+    max-age (never less than GOOGLE_CERTS_RETRY_S). A background task refetches
+    them once GOOGLE_CERTS_REFRESH_AT of that time has passed, so sign-ins
+    verify against memory; only the first sign-in of a worker, or one after
+    every refresh failed until expiry, waits on the fetch. Fetches are at most
+    one per GOOGLE_CERTS_RETRY_S outside the background task, so an unknown
+    `kid` (keys rotated early) or an unreachable endpoint can't turn sign-ins
+    into a stream of outbound requests.
+    """
+
+    def __init__(self, url: str = GOOGLE_CERTS_URL):
+        self.url = url
+        self._keys: Dict[str, object] = {}
+        self._expires_at = 0.0
+        self._refresh_at = 0.0
+        self._fetched_at = 0.0
+        self._attempted_at = float("-inf")
+        self._lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self.fetches = 0
+        self.failures = 0
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=10)
+        return self._client
+
+    @track_upstream("google_certs")
+    async def _fetch(self):
+        r = await self._http().get(self.url)
+        r.raise_for_status()
+        keys = _parse_keys(r.json())
+        ttl = max(_cache_ttl(r.headers), GOOGLE_CERTS_RETRY_S)
+        now = time.monotonic()
+        self._keys, self._fetched_at = keys, now
+        self._expires_at = now + ttl
+        self._refresh_at = now + ttl * GOOGLE_CERTS_REFRESH_AT
+
+    async def refresh(self, min_interval: float = 0.0):
+        """Fetch the key set, unless a fetch was attempted in the last `min_interval` seconds."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if time.monotonic() - self._attempted_at < min_interval:
+                return  # e.g. queued behind the fetch that just ran
+            self._attempted_at = time.monotonic()
+            self.fetches += 1
+            try:
+                await self._fetch()
+            except Exception:
+                self.failures += 1
+                raise
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                pass  # keep serving the cached keys until they expire; retry below
+            await asyncio.sleep(max(self._refresh_at - time.monotonic(), GOOGLE_CERTS_RETRY_S))
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def key(self, kid: str):
+        """The verifier for `kid`, or None if the (fresh) key set doesn't have it."""
+        if time.monotonic() >= self._expires_at or kid not in self._keys:
+            try:
+                await self.refresh(GOOGLE_CERTS_RETRY_S)
+            except Exception:
+                pass
+        if time.monotonic() >= self._expires_at:
+            raise GoogleCertsUnavailable()
+        return self._keys.get(kid)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "keys": len(self._keys),
+            "age_s": round(now - self._fetched_at, 1) if self._keys else 0.0,
+            "ttl_left_s": round(max(0.0, self._expires_at - now), 1),
+            "fetches": self.fetches,
+            "failures": self.failures,
+        }
+
+GOOGLE_CERTS = GoogleCerts()
+
+# -------------------- Verification --------------------
+
+async def verify_google_id_token(token: str, audience: str, certs: GoogleCerts = GOOGLE_CERTS) -> dict:
+    """
+    The checks google.oauth2.id_token.verify_oauth2_token does (RS256
+    signature, aud, iss, iat/exp with clock skew), against the cached keys.
+    `audience` is the OAuth client ID and is always checked.
+    Raises InvalidGoogleToken, or GoogleCertsUnavailable when keys can't be had.
+    """
+    try:
+        header_b64, payload_b64, sig_b64 = token.encode("ascii").split(b".")
+        header = json.loads(_b64(header_b64.decode()))
+        claims = json.loads(_b64(payload_b64.decode()))
+        signature = _b64(sig_b64.decode())
+    except (ValueError, UnicodeError):
+        raise InvalidGoogleToken("Malformed token") from None
+    if not isinstance(header, dict) or not isinstance(claims, dict) or header.get("alg") != "RS256":
+        raise InvalidGoogleToken("Unsupported token")
+
+    verifier = await certs.key(str(header.get("kid")))
+    if verifier is None or not verifier.verify(header_b64 + b"." + payload_b64, signature):
+        raise InvalidGoogleToken("Bad signature")
+
+    now = time.time()
+    try:
+        iat, exp = float(claims["iat"]), float(claims["exp"])
+    except (KeyError, TypeError, ValueError):
+        raise InvalidGoogleToken("Missing iat/exp") from None
+    if iat > now + GOOGLE_CLOCK_SKEW_S or exp < now - GOOGLE_CLOCK_SKEW_S:
+        raise InvalidGoogleToken("Token expired or not yet valid")
+    aud = claims.get("aud")
+    if not audience or audience not in (aud if isinstance(aud, list) else [aud]):
+        raise InvalidGoogleToken("Wrong audience")
+    if claims.get("iss") not in GOOGLE_ISSUERS:
+        raise InvalidGoogleToken("Wrong issuer")
+    return claims
@@ -0,0 +1,76 @@
+# backend/app/hashing.py
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from .security import hash_password, pwd, verify_and_update_password
+
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", "2"))          # 0 = use the shared threadpool (dev/tests)
+HASH_MAX_PENDING = int(os.getenv("HASH_MAX_PENDING", "32"))  # queued + running before we shed load
+HASH_RETRY_AFTER_S = int(os.getenv("HASH_RETRY_AFTER_S", "2"))
+
+
+def _warm():
+    pwd()  # import passlib/bcrypt in the worker, not on its first login
+
+
+class HasherBusy(Exception):
+    """Raised instead of queueing when HASH_MAX_PENDING hashes are already waiting."""
+
+
+class PasswordHasher:
+    """
+    bcrypt runs in its own small process pool, so a login burst uses at most
+    HASH_WORKERS cores and never occupies the threadpool that sync routes
+    share. Past HASH_MAX_PENDING outstanding jobs, callers get HasherBusy
+    right away instead of waiting behind a queue they would time out in.
+    """
+
+    def __init__(self, workers: int = HASH_WORKERS, max_pending: int = HASH_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def start(self):
+        if self.workers > 0 and self._pool is None:
+            # Platform default start method. With fork (Linux) all workers are
+            # created right here, so call this before other background threads start.
+            self._pool = ProcessPoolExecutor(self.workers)
+            for _ in range(self.workers):
+                self._pool.submit(_warm)  # start the workers now, not on the first login
+
+    def stop(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def _run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HasherBusy()
+        self.pending += 1
+        try:
+            if self.workers <= 0:
+                return await run_in_threadpool(fn, *args)
+            self.start()
+            return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        return await self._run(verify_and_update_password, password, hashed)
+
+    def stats(self) -> dict:
+        return {"workers": self.workers, "pending": self.pending, "max_pending": self.max_pending,
+                "rejected": self.rejected}
+
+
+HASHER = PasswordHasher()
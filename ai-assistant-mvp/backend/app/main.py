@@ -1,39 +1,49 @@
 # backend/app/main.py
 import os
 import uuid
+from time import perf_counter
 from typing import Optional
 
 from fastapi import FastAPI, Request, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from dotenv import load_dotenv
 
-from sqlmodel import Session, select, SQLModel
+# Before the app modules below: they read their settings (connector
+# credentials, DB URL, ...) from the environment when imported.
+load_dotenv()  # load backend/.env
+
+from sqlalchemy import update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from .schemas import (
     RegisterIn, RegisterOut, SignInIn, TokenOut, ActivateIn, MessageIn,
-    GoogleSignInIn,
+    MessageOut, MessageStatusOut, GoogleSignInIn,
 )
-from .security import hash_password, verify_password, make_token
-from .db import get_session, User, get_engine
-from .auth import current_user_sub
-from .rate_limit import allow
-from .crisis import get_counter
-from .connectors.email_sender import send_email
-from .connectors.telegram_bot import send_telegram
-from .connectors.whatsapp_twilio import send_whatsapp
-
-# Biometrics router + lightweight schema migrations
-from .biometrics import router as biometrics_router, ensure_migrations
-
-# QA router (NEW)
-from .qa import router as qa_router
+from .security import make_token
+from .hashing import HASHER, HasherBusy, HASH_RETRY_AFTER_S
+from .google_auth import GOOGLE_CERTS, GOOGLE_CERTS_RETRY_S, GoogleCertsUnavailable, verify_google_id_token
+from .db import get_async_session, dispose_async_engine, pool_stats, User
+from .auth import Principal, current_principal, current_user_sub, request_claims
+from .rate_limit import RATE_LIMIT_ENABLED, RATE_LIMIT_EXEMPT, policy_for, acheck, rate_headers
+from .crisis import CRISIS_MATCHER, CRISIS_STORE, CRISIS_THRESHOLD
+from .connectors.clients import open_connectors, close_connectors
+from .outbox import DISPATCHER, SENDERS, OutboxMessage, enqueue, PRIORITY_CRISIS
 
-# --- Google Sign-In imports ---
-from google.oauth2 import id_token as google_id_token
-from google.auth.transport import requests as google_requests
+# Biometrics router
+from .biometrics import router as biometrics_router, PING_BUFFER, BASELINE_BUFFER
+from .migrations import migrate
+from .metrics import (
+    router as metrics_router, MetricsMiddleware, METRICS_ENABLED, RATE_LIMIT_SECONDS, RATE_LIMITED,
+    install_db_hooks, register_source,
+)
+from .voice_rollup import ROLLUP_JOB
 
-load_dotenv()  # load backend/.env
+# QA router (NEW)
+from .qa import router as qa_router, qa_stats
+from .qa_providers import close_providers
 
 OWNER_LAUNCH_PASSKEY = os.getenv("OWNER_LAUNCH_PASSKEY")
 GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
@@ -46,37 +56,107 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After", "X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset"],
 )
 
 # -------------------- Startup --------------------
 
 @app.on_event("startup")
 def on_startup():
-    # Create tables registered on SQLModel metadata (User and any others)
-    SQLModel.metadata.create_all(get_engine())
-    # Ensure biometrics tables/columns exist (safe no-op if already applied)
-    ensure_migrations()
+    HASHER.start()  # first: fork the hash workers before any background thread exists
+    # Versioned schema migrations (one version read when already current)
+    migrate()
+    PING_BUFFER.start()
+    BASELINE_BUFFER.start()
+    CRISIS_STORE.buffer.start()
+    ROLLUP_JOB.start()
+
+@app.on_event("shutdown")
+def on_shutdown():
+    # Drain queued voice pings before the worker exits
+    PING_BUFFER.stop()
+    BASELINE_BUFFER.stop()
+    CRISIS_STORE.buffer.stop()
+    ROLLUP_JOB.stop()
+    HASHER.stop()
+
+@app.on_event("startup")
+async def open_clients():
+    await open_connectors()
+    DISPATCHER.start()
+    if GOOGLE_CLIENT_ID:
+        GOOGLE_CERTS.start()  # fetch the signing keys now, then keep them fresh
+
+@app.on_event("shutdown")
+async def close_clients():
+    await DISPATCHER.stop()
+    await GOOGLE_CERTS.stop()
+    await close_providers()
+    await close_connectors()
+    await dispose_async_engine()
 
 # Mount routers
 app.include_router(biometrics_router)
 app.include_router(qa_router)
+if METRICS_ENABLED:
+    app.include_router(metrics_router)
 
 # -------------------- Middleware --------------------
 
 @app.middleware("http")
 async def rate_limit_mw(request: Request, call_next):
+    if not RATE_LIMIT_ENABLED or request.url.path in RATE_LIMIT_EXEMPT:
+        return await call_next(request)
+    t0 = perf_counter()
     ip = request.client.host if request.client else "unknown"
-    if not allow(ip):
-        return JSONResponse({"detail": "Rate limit"}, status_code=429)
-    return await call_next(request)
+    policy = policy_for(request.url.path)
+    uid = None
+    if policy.per == "user":
+        # decoded once here; current_user_sub reuses it from request.state
+        uid = (request_claims(request) or {}).get("sub")
+    decision = await acheck(policy, ip, uid)
+    headers = rate_headers(policy, decision)
+    RATE_LIMIT_SECONDS.observe((policy.name,), perf_counter() - t0)
+    if not decision.allowed:
+        RATE_LIMITED.inc((policy.name,))
+        return JSONResponse({"detail": "Rate limit"}, status_code=429, headers=headers)
+    response = await call_next(request)
+    response.headers.update(headers)
+    return response
+
+# -------------------- Metrics --------------------
+# Added after the rate limiter so it is the outermost middleware. The stats()
+# the subsystems already keep are exported as gauges at scrape time.
+
+if METRICS_ENABLED:
+    install_db_hooks()
+    app.add_middleware(MetricsMiddleware)
+    register_source("voice_ingest", PING_BUFFER.stats)
+    register_source("voice_baseline", BASELINE_BUFFER.stats)
+    register_source("voice_rollup", ROLLUP_JOB.stats)
+    register_source("crisis_buffer", CRISIS_STORE.buffer.stats)
+    register_source("outbox", lambda: DISPATCHER.stats)
+    register_source("hasher", HASHER.stats)
+    register_source("google_certs", GOOGLE_CERTS.stats)
+    register_source("qa", qa_stats)
+    register_source("db_pool", pool_stats)
 
 # -------------------- Auth --------------------
 
+# Lookups and inserts go through the async engine; bcrypt runs in the
+# dedicated HASHER pool and the Google token check in the threadpool.
+
+@app.exception_handler(HasherBusy)
+async def hasher_busy(request: Request, exc: HasherBusy):
+    return JSONResponse({"detail": "Too many sign-ins in progress, retry shortly"}, status_code=503,
+                        headers={"Retry-After": str(HASH_RETRY_AFTER_S)})
+
 @app.post("/auth/register", response_model=RegisterOut)
-def register(data: RegisterIn, s: Session = Depends(get_session)):
-    existing = s.exec(select(User).where(User.email == data.email)).first()
+async def register(data: RegisterIn, s: AsyncSession = Depends(get_async_session)):
+    existing = (await s.exec(select(User).where(User.email == data.email))).first()
     if existing:
         raise HTTPException(400, detail="Email already registered")
+    await s.rollback()  # don't hold a pool connection while bcrypt runs
 
     uid = str(uuid.uuid4())
     user = User(
@@ -84,7 +164,7 @@ def register(data: RegisterIn, s: Session = Depends(get_session)):
         username=data.username,
         full_name=data.full_name,
         email=data.email,
-        password_hash=hash_password(data.password),
+        password_hash=await HASHER.hash(data.password),
         agent_name=data.agent_name or "ELORA",
         work_schedule=data.work_schedule,
         crisis_opt_in=bool(data.crisis_opt_in),
@@ -92,36 +172,44 @@ def register(data: RegisterIn, s: Session = Depends(get_session)):
         trusted_contact_phone=data.trusted_contact_phone,
     )
     s.add(user)
-    s.commit()
+    await s.commit()
     return {"user": {"uid": uid, "username": user.username, "agent_name": user.agent_name}}
 
 @app.post("/auth/signin", response_model=TokenOut)
-def signin(data: SignInIn, s: Session = Depends(get_session)):
-    user = s.exec(select(User).where(User.email == data.email)).first()
-    if not user or not verify_password(data.password, user.password_hash or ""):
+async def signin(data: SignInIn, s: AsyncSession = Depends(get_async_session)):
+    user = (await s.exec(select(User).where(User.email == data.email))).first()
+    if not user:
         raise HTTPException(401, detail="Bad credentials")
-    return {"access_token": make_token(user.uid)}
+    uid, stored = user.uid, user.password_hash or ""
+    await s.rollback()  # don't hold a pool connection while bcrypt runs
+    ok, new_hash = await HASHER.verify_and_update(data.password, stored)
+    if not ok:
+        raise HTTPException(401, detail="Bad credentials")
+    if new_hash:
+        # hash predates the current BCRYPT_ROUNDS; upgrade it while we have the password
+        await s.exec(update(User).where(User.uid == uid, User.password_hash == stored).values(password_hash=new_hash))
+        await s.commit()
+    return {"access_token": make_token(uid)}
 
 # ---- Google Sign-In ----
-@app.post("/auth/google", response_model=TokenOut)
-def google_signin(data: GoogleSignInIn, s: Session = Depends(get_session)):
-    if not GOOGLE_CLIENT_ID:
-        raise HTTPException(503, detail="GOOGLE_CLIENT_ID not configured")
+# Only mounted when GOOGLE_CLIENT_ID is set. Tokens are verified in-process
+# against Google's signing keys, which GOOGLE_CERTS caches and refreshes in the
+# background (see google_auth.py), so a sign-in makes no outbound call.
+
+async def google_signin(data: GoogleSignInIn, s: AsyncSession = Depends(get_async_session)):
     try:
-        info = google_id_token.verify_oauth2_token(
-            data.id_token,
-            google_requests.Request(),
-            GOOGLE_CLIENT_ID,
-        )
+        info = await verify_google_id_token(data.id_token, GOOGLE_CLIENT_ID)
         email = info.get("email")
         email_verified = info.get("email_verified", False)
         name = info.get("name") or ""
         if not email or not email_verified:
             raise HTTPException(401, detail="Email not verified")
+    except GoogleCertsUnavailable:
+        raise HTTPException(503, detail="Google sign-in temporarily unavailable", headers={"Retry-After": str(max(1, round(GOOGLE_CERTS_RETRY_S)))})
     except Exception:
         raise HTTPException(401, detail="Invalid Google ID token")
 
-    user = s.exec(select(User).where(User.email == email)).first()
+    user = (await s.exec(select(User).where(User.email == email))).first()
     if not user:
         uid = str(uuid.uuid4())
         username = email.split("@", 1)[0]
@@ -138,42 +226,55 @@ def google_signin(data: GoogleSignInIn, s: Session = Depends(get_session)):
             trusted_contact_phone=None,
         )
         s.add(user)
-        s.commit()
+        await s.commit()
 
     return {"access_token": make_token(user.uid)}
 
+if GOOGLE_CLIENT_ID:
+    app.post("/auth/google", response_model=TokenOut)(google_signin)
+
 # -------------------- Agent --------------------
 
 @app.post("/agent/activate")
 def activate(_: ActivateIn, uid: str = Depends(current_user_sub)):
-    counter = get_counter(uid)
-    counter.count = 0
+    CRISIS_STORE.reset(uid)
     return {"status": "activated"}
 
-@app.post("/agent/message")
-async def agent_message(msg: MessageIn, uid: str = Depends(current_user_sub), s: Session = Depends(get_session)):
-    user = s.exec(select(User).where(User.uid == uid)).first()
-    if user:
-        counter = get_counter(uid)
-        n = counter.record(msg.text)
-        if n >= 3 and user.crisis_opt_in and user.trusted_contact_phone:
-            try:
-                await send_whatsapp(
-                    user.trusted_contact_phone,
-                    f"{user.full_name or user.username} may need support. Message: '{msg.text[:160]}'"
-                )
-            except Exception:
-                pass
-
-    if msg.channel == "email":
-        await send_email(msg.to, msg.text)
-    elif msg.channel == "telegram":
-        await send_telegram(msg.to, msg.text)
-    elif msg.channel == "whatsapp":
-        await send_whatsapp(msg.to, msg.text)
-    else:
+@app.post("/agent/message", response_model=MessageOut)
+async def agent_message(msg: MessageIn, principal: Principal = Depends(current_principal),
+                        s: AsyncSession = Depends(get_async_session)):
+    uid = principal.uid
+    if msg.channel not in SENDERS:  # unknown, or its connector is not configured
         raise HTTPException(400, detail="Unknown channel")
-    return {"sent": True}
+    if not msg.to:
+        raise HTTPException(400, detail="Missing recipient")
+
+    # Only crisis-matching messages touch the user (cached) / crisis store
+    user = await principal.user(s) if CRISIS_MATCHER.search(msg.text) else None
+    if user:
+        escalate = bool(user.crisis_opt_in and user.trusted_contact_phone and "whatsapp" in SENDERS)
+        # the crisis store is sync (shared with the write-behind thread)
+        n = await run_in_threadpool(CRISIS_STORE.record_hit, uid, escalate)
+        if escalate and n >= CRISIS_THRESHOLD:
+            enqueue(
+                s, uid, "whatsapp", user.trusted_contact_phone,
+                f"{user.full_name or user.username} may need support. Message: '{msg.text[:160]}'",
+                priority=PRIORITY_CRISIS,
+            )
+
+    # Delivery happens in the outbox dispatcher; the rows commit with this request
+    row = enqueue(s, uid, msg.channel, msg.to, msg.text)
+    await s.commit()
+    DISPATCHER.wake()
+    return {"message_id": row.id, "status": row.status}
+
+@app.get("/agent/message/{message_id}", response_model=MessageStatusOut)
+async def agent_message_status(message_id: int, uid: str = Depends(current_user_sub),
+                               s: AsyncSession = Depends(get_async_session)):
+    row = await s.get(OutboxMessage, message_id)
+    if not row or row.user_uid != uid:
+        raise HTTPException(404, detail="Message not found")
+    return row
 
 # -------------------- Plans --------------------
 
@@ -0,0 +1,243 @@
+# backend/app/metrics.py
+import asyncio
+import functools
+import hmac
+import os
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")  # if set, scrapes must send "Authorization: Bearer <token>"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# -------------------- Primitives --------------------
+# Per-worker and lock-free: an update is a dict lookup plus a list/dict
+# increment under the GIL. Two threads racing on the same series can in rare
+# cases lose an increment, which is fine for monitoring and keeps the hot path
+# to about a microsecond. Each worker process exports its own numbers.
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self.values: Dict[tuple, float] = {}
+
+    def inc(self, key: tuple = (), n: float = 1.0):
+        self.values[key] = self.values.get(key, 0.0) + n
+
+    def samples(self):
+        for key, v in list(self.values.items()):
+            yield self.name, _labels(self.labels, key), v
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help, labels, buckets
+        # key -> [count per bucket..., count above the last bucket, sum]
+        self.series: Dict[tuple, list] = {}
+
+    def observe(self, key: tuple, value: float):
+        s = self.series.get(key)
+        if s is None:
+            s = self.series.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0])
+        s[bisect_left(self.buckets, value)] += 1   # bucket i holds buckets[i-1] < value <= buckets[i]
+        s[-1] += value
+
+    def samples(self):
+        for key, s in list(self.series.items()):
+            base = _labels(self.labels, key)
+            total = 0
+            for bound, n in zip(self.buckets, s):
+                total += n
+                yield self.name + "_bucket", base + (("le", _fmt(bound)),), total
+            total += s[len(self.buckets)]
+            yield self.name + "_bucket", base + (("le", "+Inf"),), total
+            yield self.name + "_count", base, total
+            yield self.name + "_sum", base, s[-1]
+
+
+def _labels(names: Tuple[str, ...], key: tuple) -> tuple:
+    return tuple(zip(names, (str(v) for v in key)))
+
+def _fmt(v: float) -> str:
+    return repr(float(v)) if v != int(v) else str(int(v))
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+# -------------------- Registry --------------------
+
+METRICS: List = []
+SOURCES: Dict[str, Callable[[], dict]] = {}
+
+def counter(name: str, help: str, labels: Tuple[str, ...] = ()) -> Counter:
+    m = Counter(name, help, labels)
+    METRICS.append(m)
+    return m
+
+def histogram(name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+    m = Histogram(name, help, labels, buckets)
+    METRICS.append(m)
+    return m
+
+def register_source(prefix: str, fn: Callable[[], dict]):
+    """Export the numeric values of an existing stats() dict as `<prefix>_<key>` gauges, read at scrape time."""
+    SOURCES[prefix] = fn
+
+def _flatten(prefix: str, d: dict):
+    for k, v in d.items():
+        name = f"{prefix}_{k}"
+        if isinstance(v, dict):
+            yield from _flatten(name, v)
+        elif isinstance(v, (int, float)) and not isinstance(v, bool):
+            yield name, v
+        elif isinstance(v, bool):
+            yield name, int(v)
+
+def render() -> str:
+    """Everything in Prometheus text exposition format (0.0.4)."""
+    out = []
+    for m in METRICS:
+        out.append(f"# HELP {m.name} {m.help}")
+        out.append(f"# TYPE {m.name} {m.kind}")
+        for name, labels, v in m.samples():
+            if labels:
+                lab = ",".join(f'{k}="{_escape(val)}"' for k, val in labels)
+                out.append(f"{name}{{{lab}}} {_fmt(v)}")
+            else:
+                out.append(f"{name} {_fmt(v)}")
+    for prefix, fn in SOURCES.items():
+        try:
+            values = list(_flatten(prefix, fn()))
+        except Exception:
+            continue  # a broken source must not take the scrape down
+        for name, v in values:
+            out.append(f"# TYPE {name} gauge")
+            out.append(f"{name} {_fmt(v)}")
+    return "\n".join(out) + "\n"
+
+# -------------------- Built-in metrics --------------------
+
+HTTP_REQUESTS = counter("http_requests_total", "HTTP requests by route template and status.", ("method", "route", "status"))
+HTTP_LATENCY = histogram("http_request_duration_seconds", "Time from request to last response byte.", ("method", "route"))
+HTTP_DB_QUERIES = histogram("http_request_db_queries", "SQL statements executed per request.", ("route",), QUERY_BUCKETS)
+HTTP_DB_SECONDS = counter("http_request_db_seconds_total", "Time spent in SQL statements, per route.", ("route",))
+DB_QUERIES = counter("db_queries_total", "SQL statements executed (request = inside an HTTP request).", ("scope",))
+DB_SECONDS = counter("db_query_seconds_total", "Time spent executing SQL statements.", ("scope",))
+RATE_LIMIT_SECONDS = histogram(
+    "rate_limit_check_seconds", "Time spent in the rate limiter per request.", ("policy",),
+    (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01),
+)
+RATE_LIMITED = counter("rate_limited_total", "Requests rejected with 429.", ("policy",))
+UPSTREAM = histogram("upstream_request_seconds", "Calls to external services (QA providers, connectors).", ("upstream", "outcome"))
+
+# -------------------- Per-request accounting --------------------
+# The middleware puts a [queries, db_seconds] list in a context variable; the
+# SQLAlchemy hooks add to it. Sync routes (threadpool), the async engine's
+# greenlets and tasks spawned by the request all see the same list, while
+# background threads (write-behind sinks, rollups, outbox) see None.
+
+_REQUEST: ContextVar[Optional[list]] = ContextVar("metrics_request", default=None)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_t0 = perf_counter()  # one execution context per statement; cheaper than conn.info
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    dt = perf_counter() - context._metrics_t0
+    acc = _REQUEST.get()
+    if acc is None:
+        DB_QUERIES.inc(("background",))
+        DB_SECONDS.inc(("background",), dt)
+    else:
+        acc[0] += 1
+        acc[1] += dt
+
+def install_db_hooks():
+    """Time every statement on every engine (sync, and the async engine's sync core)."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI (no BaseHTTPMiddleware task hop). Add it last so it is the
+    outermost layer and its timing includes CORS and the rate limiter.
+    Requests that never reach a route (404, 429) share route="<unrouted>",
+    keeping label cardinality bounded by the route table.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        status = [500]
+
+        async def send_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        acc = [0, 0.0]
+        token = _REQUEST.set(acc)
+        t0 = perf_counter()
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            dt = perf_counter() - t0
+            _REQUEST.reset(token)
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "<unrouted>"
+            method = scope["method"]
+            HTTP_LATENCY.observe((method, path), dt)
+            HTTP_REQUESTS.inc((method, path, status[0]))
+            HTTP_DB_QUERIES.observe((path,), acc[0])
+            if acc[0]:
+                HTTP_DB_SECONDS.inc((path,), acc[1])
+                DB_QUERIES.inc(("request",), acc[0])
+                DB_SECONDS.inc(("request",), acc[1])
+
+# -------------------- Upstream timers --------------------
+
+def track_upstream(name: str):
+    """Decorator for async calls to an external service: latency by outcome (ok / error / cancelled)."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        async def timed(*args, **kwargs):
+            t0 = perf_counter()
+            outcome = "error"
+            try:
+                result = await fn(*args, **kwargs)
+                outcome = "ok"
+                return result
+            except asyncio.CancelledError:
+                outcome = "cancelled"   # e.g. lost a QA race
+                raise
+            finally:
+                UPSTREAM.observe((name, outcome), perf_counter() - t0)
+        return timed
+    return wrap
+
+# -------------------- Endpoint --------------------
+
+router = APIRouter(tags=["metrics"])
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics(authorization: Optional[str] = Header(default=None)):
+    if METRICS_TOKEN and not hmac.compare_digest(authorization or "", f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(401, detail="Bad metrics token")
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,217 @@
+# backend/app/migrations.py
+import json
+import os
+import time
+from datetime import datetime
+from typing import Callable, List, NamedTuple
+
+from sqlalchemy import LargeBinary, bindparam, inspect, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlmodel import SQLModel, Field
+
+from .db import get_engine
+from .face_index import pack_signature
+# Every module that defines tables, so create_all below sees all of them
+from . import biometrics, crisis, outbox, qa, voice_rollup, voice_stats  # noqa: F401
+
+MIGRATION_LOCK_TIMEOUT_S = float(os.getenv("MIGRATION_LOCK_TIMEOUT_S", "300"))  # wait for another worker's run
+PG_LOCK_KEY = 0x454C4F5241  # pg_advisory_xact_lock key ("ELORA")
+MYSQL_LOCK_NAME = "elora_migrate"  # GET_LOCK name; MySQL DDL commits implicitly, so no xact lock
+BACKFILL_CHUNK = 5000
+
+# -------------------- Version table --------------------
+
+class SchemaVersion(SQLModel, table=True):
+    __tablename__ = "schema_version"
+    id: int = Field(default=1, primary_key=True)   # single row
+    version: int = 0
+    applied_at: datetime = Field(default_factory=datetime.utcnow)
+
+# -------------------- Registry --------------------
+# Append only: a migration's number is final once it has shipped. Each step
+# runs on the migration connection, inside the single transaction, and must
+# tolerate a database that already has its change (databases created before
+# this registry start at version 0 with most of the schema in place).
+# A new table gets its own migration (`Model.__table__.create(con, checkfirst=True)`):
+# migration 1 has already run everywhere.
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    apply: Callable[[Connection], None]
+
+MIGRATIONS: List[Migration] = []
+
+def migration(version: int, name: str):
+    def register(fn: Callable[[Connection], None]):
+        assert not MIGRATIONS or version == MIGRATIONS[-1].version + 1, "migrations must be numbered in order"
+        MIGRATIONS.append(Migration(version, name, fn))
+        return fn
+    return register
+
+def _add_columns(con: Connection, table: str, columns: List[str]):
+    """ALTER TABLE ADD COLUMN for each "name TYPE ..." not already on `table`."""
+    have = {c["name"] for c in inspect(con).get_columns(table)}
+    for col in columns:
+        if col.split()[0] not in have:
+            con.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {col}")
+
+DAY_SQL = {
+    "sqlite": "CAST(julianday(ts) - 2440587.5 AS INTEGER)",
+    "postgresql": "FLOOR(EXTRACT(EPOCH FROM ts) / 86400)::int",
+    "mysql": "DATEDIFF(ts, '1970-01-01')",
+}
+
+def _backfill_voiceping_day(con: Connection):
+    """Set `day` (see biometrics.day_of) on rows written before the partition key existed."""
+    day = DAY_SQL.get(con.dialect.name)
+    if day:
+        con.exec_driver_sql(f"UPDATE voiceping SET day = {day} WHERE day IS NULL AND ts IS NOT NULL")
+        return
+    # Any other dialect: compute it in Python, a chunk at a time
+    t = biometrics.VoicePing.__table__
+    while True:
+        rows = con.execute(
+            select(t.c.id, t.c.ts).where(t.c.day.is_(None), t.c.ts.is_not(None)).limit(BACKFILL_CHUNK)
+        ).all()
+        if not rows:
+            return
+        con.execute(
+            t.update().where(t.c.id == bindparam("b_id")),
+            [{"b_id": row_id, "day": biometrics.day_of(ts)} for row_id, ts in rows],
+        )
+
+# -------------------- Migrations --------------------
+
+@migration(1, "create tables")
+def _create_tables(con: Connection):
+    SQLModel.metadata.create_all(con)  # checkfirst: only what is missing
+
+@migration(2, "voiceping signal columns, profile condition tag")
+def _signal_columns(con: Connection):
+    _add_columns(con, "voiceping", ["snr_db REAL", "matched_profile_tag TEXT", "health_flag INTEGER"])
+    _add_columns(con, "biometricvoiceprofile", ["condition_tag TEXT"])
+
+@migration(3, "voiceping partition key")
+def _voiceping_partition(con: Connection):
+    _add_columns(con, "voiceping", ["user_uid VARCHAR(255)", "day INTEGER"])  # indexed: not TEXT (MySQL)
+    for idx in biometrics.VoicePing.__table__.indexes:
+        idx.create(con, checkfirst=True)
+    # Backfill rows written before the partition key existed
+    con.exec_driver_sql(
+        "UPDATE voiceping SET user_uid = (SELECT user_uid FROM voicesession WHERE voicesession.id = voiceping.session_id) "
+        "WHERE user_uid IS NULL"
+    )
+    _backfill_voiceping_day(con)
+
+@migration(4, "packed face signatures")
+def _face_blobs(con: Connection):
+    _add_columns(con, "biometricface", ["signature_blob BLOB", "signature_size INTEGER"])
+    # Move JSON face signatures to packed float32
+    rows = con.execute(text(
+        "SELECT id, signature_json FROM biometricface WHERE signature_blob IS NULL AND signature_json != ''"
+    )).all()
+    if rows:
+        updates = []
+        for row_id, raw in rows:
+            sig = json.loads(raw)
+            updates.append({"b_id": row_id, "blob": pack_signature(sig["data"]), "size": sig.get("size")})
+        con.execute(
+            text("UPDATE biometricface SET signature_blob = :blob, signature_size = :size, signature_json = '' "
+                 "WHERE id = :b_id").bindparams(bindparam("blob", type_=LargeBinary)),
+            updates,
+        )
+
+@migration(5, "voice profile adaptive baseline")
+def _voice_baseline(con: Connection):
+    _add_columns(con, "biometricvoiceprofile", [
+        "baseline_pitch_hz REAL", "baseline_pitch_var REAL", "baseline_rms REAL", "baseline_rms_var REAL",
+        "baseline_n INTEGER DEFAULT 0", "baseline_updated_at DATETIME",
+    ])
+
+@migration(6, "voiceping day backfill on postgres")
+def _voiceping_day_backfill(con: Connection):
+    # Migration 3 only backfilled `day` on SQLite; older Postgres rows kept NULL
+    # and were never reached by day-based retention. A no-op where 3 did it.
+    _backfill_voiceping_day(con)
+
+LATEST = MIGRATIONS[-1].version
+
+# -------------------- Runner --------------------
+
+def _read_version(con: Connection) -> int:
+    v = con.execute(text("SELECT version FROM schema_version WHERE id = 1")).scalar()
+    return v or 0
+
+def _current_version(engine) -> int:
+    """Unlocked read for the warm path; 0 when the table doesn't exist yet."""
+    try:
+        with engine.connect() as con:
+            return _read_version(con)
+    except (OperationalError, ProgrammingError):
+        return 0
+
+def _begin_locked(con: Connection):
+    """
+    Open the migration transaction holding a lock every other worker's
+    migrate() also takes, so only one of them runs DDL.
+    """
+    if con.dialect.name == "sqlite":
+        # Takes the database write lock now. pysqlite leaves an explicit BEGIN
+        # alone and doesn't commit before DDL, so the whole run is one transaction.
+        deadline = time.monotonic() + MIGRATION_LOCK_TIMEOUT_S
+        while True:
+            try:
+                con.exec_driver_sql("BEGIN IMMEDIATE")
+                return
+            except OperationalError as e:
+                con.rollback()
+                if "locked" not in str(e) or time.monotonic() > deadline:
+                    raise
+                time.sleep(0.2)  # busy_timeout ran out while another worker migrates
+    if con.dialect.name == "postgresql":
+        con.execute(text("SELECT pg_advisory_xact_lock(:k)"), {"k": PG_LOCK_KEY})
+    if con.dialect.name == "mysql":
+        got = con.execute(text("SELECT GET_LOCK(:n, :t)"), {"n": MYSQL_LOCK_NAME, "t": MIGRATION_LOCK_TIMEOUT_S}).scalar()
+        if got != 1:
+            raise TimeoutError("timed out waiting for another worker's migration")
+    # Other backends: the schema_version row lock (FOR UPDATE below) serializes
+    # workers once the table exists.
+
+def migrate() -> int:
+    """
+    Bring the schema up to LATEST. Returns the number of migrations applied.
+    When the schema is current this is one SELECT.
+    """
+    engine = get_engine()
+    if _current_version(engine) >= LATEST:
+        return 0
+
+    with engine.connect() as con:
+        _begin_locked(con)
+        try:
+            SchemaVersion.__table__.create(con, checkfirst=True)
+            current = con.execute(
+                text("SELECT version FROM schema_version WHERE id = 1" + ("" if con.dialect.name == "sqlite" else " FOR UPDATE"))
+            ).scalar()
+            if current is None:
+                con.execute(SchemaVersion.__table__.insert().values(id=1, version=0, applied_at=datetime.utcnow()))
+                current = 0
+            pending = [m for m in MIGRATIONS if m.version > current]  # empty if another worker just finished
+            for m in pending:
+                m.apply(con)
+            if pending:
+                con.execute(
+                    SchemaVersion.__table__.update().where(SchemaVersion.__table__.c.id == 1)
+                    .values(version=pending[-1].version, applied_at=datetime.utcnow())
+                )
+            con.commit()
+        except Exception:
+            con.rollback()
+            raise
+        finally:
+            if con.dialect.name == "mysql":  # session-level lock, outlives the transaction
+                con.execute(text("SELECT RELEASE_LOCK(:n)"), {"n": MYSQL_LOCK_NAME})
+                con.commit()
+    return len(pending)
@@ -0,0 +1,245 @@
+# backend/app/outbox.py
+import asyncio
+import os
+import random
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Collection, Dict, List, Optional, Set, Union
+
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import SQLModel, Field, Session, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .db import get_engine
+from .connectors.email_sender import EMAIL_CONFIGURED, send_email
+from .connectors.telegram_bot import TELEGRAM_CONFIGURED, send_telegram
+from .connectors.whatsapp_twilio import WHATSAPP_CONFIGURED, send_whatsapp
+
+# -------------------- Config --------------------
+
+OUTBOX_POLL_S = float(os.getenv("OUTBOX_POLL_S", "1.0"))          # idle poll; enqueue also wakes the loop
+OUTBOX_BATCH = int(os.getenv("OUTBOX_BATCH", "50"))                # rows claimed per poll
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "6"))   # then dead-lettered
+OUTBOX_BACKOFF_S = float(os.getenv("OUTBOX_BACKOFF_S", "2.0"))     # 2, 4, 8, ... seconds
+OUTBOX_BACKOFF_MAX_S = float(os.getenv("OUTBOX_BACKOFF_MAX_S", "300"))
+OUTBOX_LEASE_S = float(os.getenv("OUTBOX_LEASE_S", "120"))         # a claimed or started row is retried after this
+OUTBOX_MAX_INFLIGHT = int(os.getenv("OUTBOX_MAX_INFLIGHT", "200"))  # backpressure on claiming
+
+PRIORITY_CRISIS = 0
+PRIORITY_NORMAL = 1
+
+# Only channels whose connector is configured; /agent/message rejects the rest
+SENDERS: Dict[str, Callable[[str, str], Awaitable]] = {
+    channel: sender
+    for channel, sender, configured in (
+        ("email", send_email, EMAIL_CONFIGURED),
+        ("telegram", send_telegram, TELEGRAM_CONFIGURED),
+        ("whatsapp", send_whatsapp, WHATSAPP_CONFIGURED),
+    )
+    if configured
+}
+
+# Concurrent sends per channel; crisis alerts use their own lane so a
+# backlog of normal messages never delays them.
+CHANNEL_CONCURRENCY = {
+    "email": int(os.getenv("OUTBOX_CONCURRENCY_EMAIL", "4")),
+    "telegram": int(os.getenv("OUTBOX_CONCURRENCY_TELEGRAM", "10")),
+    "whatsapp": int(os.getenv("OUTBOX_CONCURRENCY_WHATSAPP", "10")),
+}
+CRISIS_CONCURRENCY = int(os.getenv("OUTBOX_CONCURRENCY_CRISIS", "4"))
+
+# -------------------- Table --------------------
+
+class OutboxMessage(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_uid: str = Field(index=True)
+    channel: str
+    to: str
+    text: str
+    priority: int = PRIORITY_NORMAL
+    status: str = Field(default="pending", index=True)   # pending|sending|sent|dead
+    attempts: int = 0
+    next_attempt_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    last_error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    sent_at: Optional[datetime] = None
+
+def enqueue(s: Union[Session, AsyncSession], user_uid: str, channel: str, to: str, text: str,
+            priority: int = PRIORITY_NORMAL) -> OutboxMessage:
+    """Add a message to the caller's transaction; it is only sent once that commits."""
+    row = OutboxMessage(user_uid=user_uid, channel=channel, to=to, text=text, priority=priority)
+    s.add(row)
+    return row
+
+def _backoff(attempts: int) -> float:
+    delay = min(OUTBOX_BACKOFF_MAX_S, OUTBOX_BACKOFF_S * (2 ** (attempts - 1)))
+    return delay * random.uniform(0.8, 1.2)
+
+# -------------------- DB steps (run in the threadpool) --------------------
+
+def _claim(limit: int, skip: Collection[int] = ()) -> List[OutboxMessage]:
+    """
+    Claim due rows. A claim is a conditional UPDATE, so when several workers
+    poll the same table each row goes to exactly one of them. Claimed rows
+    get a lease; if the worker dies they become due again when it expires.
+    `skip` holds ids this worker is still delivering.
+    """
+    now = datetime.utcnow()
+    lease = now + timedelta(seconds=OUTBOX_LEASE_S)
+    claimed = []
+    with Session(get_engine(), expire_on_commit=False) as s:
+        q = (
+            select(OutboxMessage)
+            .where(OutboxMessage.status.in_(("pending", "sending")), OutboxMessage.next_attempt_at <= now)
+        )
+        if skip:
+            q = q.where(OutboxMessage.id.not_in(list(skip)))
+        rows = s.exec(q.order_by(OutboxMessage.priority, OutboxMessage.id).limit(limit)).all()
+        for row in rows:
+            res = s.exec(
+                update(OutboxMessage)
+                .where(OutboxMessage.id == row.id, OutboxMessage.status == row.status,
+                       OutboxMessage.next_attempt_at == row.next_attempt_at)
+                .values(status="sending", next_attempt_at=lease)
+            )
+            if res.rowcount == 1:
+                claimed.append(row)
+        s.commit()
+        for row in claimed:
+            s.expunge(row)
+            row.status, row.next_attempt_at = "sending", lease
+    return claimed
+
+def _start(msg_id: int, lease: datetime) -> Optional[datetime]:
+    """
+    Restart the lease when the send actually begins, after the row may have
+    waited on its lane. Returns the new lease, or None if the old one ran out
+    and the row was claimed again, in which case this worker must not send it.
+    """
+    renewed = datetime.utcnow() + timedelta(seconds=OUTBOX_LEASE_S)
+    with Session(get_engine()) as s:
+        res = s.exec(
+            update(OutboxMessage)
+            .where(OutboxMessage.id == msg_id, OutboxMessage.status == "sending",
+                   OutboxMessage.next_attempt_at == lease)
+            .values(next_attempt_at=renewed)
+        )
+        s.commit()
+    return renewed if res.rowcount == 1 else None
+
+def _finish(msg_id: int, attempts: int, error: Optional[str]):
+    now = datetime.utcnow()
+    if error is None:
+        values = dict(status="sent", attempts=attempts, sent_at=now, last_error=None)
+    elif attempts >= OUTBOX_MAX_ATTEMPTS:
+        values = dict(status="dead", attempts=attempts, last_error=error)
+    else:
+        values = dict(status="pending", attempts=attempts, last_error=error,
+                      next_attempt_at=now + timedelta(seconds=_backoff(attempts)))
+    with Session(get_engine()) as s:
+        s.exec(update(OutboxMessage).where(OutboxMessage.id == msg_id).values(**values))
+        s.commit()
+
+# -------------------- Dispatcher --------------------
+
+class OutboxDispatcher:
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._inflight: set = set()
+        self._inflight_ids: Set[int] = set()
+        self._lanes: Dict[str, asyncio.Semaphore] = {}
+        self.stats = {"sent": 0, "failed": 0, "dead": 0, "lease_lost": 0}
+
+    def _lane(self, msg: OutboxMessage) -> asyncio.Semaphore:
+        key = "crisis" if msg.priority == PRIORITY_CRISIS else msg.channel
+        if key not in self._lanes:
+            n = CRISIS_CONCURRENCY if key == "crisis" else CHANNEL_CONCURRENCY.get(key, 4)
+            self._lanes[key] = asyncio.Semaphore(n)
+        return self._lanes[key]
+
+    def start(self):
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self, grace: float = 5.0):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._inflight:
+            _, late = await asyncio.wait(self._inflight, timeout=grace)
+            # Cancel stragglers before the connectors' clients are closed under
+            # them; their rows stay claimed and are retried after the lease.
+            for task in late:
+                task.cancel()
+            await asyncio.gather(*late, return_exceptions=True)
+
+    def wake(self):
+        """Call after committing new rows so they go out without waiting for the poll."""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _run(self):
+        while True:
+            room = OUTBOX_MAX_INFLIGHT - len(self._inflight)
+            claimed = []
+            if room > 0:
+                try:
+                    claimed = await run_in_threadpool(_claim, min(room, OUTBOX_BATCH), set(self._inflight_ids))
+                except Exception:
+                    claimed = []
+            for msg in claimed:
+                self._inflight_ids.add(msg.id)
+                task = asyncio.create_task(self._deliver(msg))
+                self._inflight.add(task)
+                task.add_done_callback(self._inflight.discard)
+            if len(claimed) < OUTBOX_BATCH or room <= 0:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), OUTBOX_POLL_S)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _deliver(self, msg: OutboxMessage):
+        try:
+            await self._send(msg)
+        finally:
+            self._inflight_ids.discard(msg.id)
+
+    async def _send(self, msg: OutboxMessage):
+        attempts = msg.attempts + 1
+        async with self._lane(msg):
+            try:
+                lease = await run_in_threadpool(_start, msg.id, msg.next_attempt_at)
+            except Exception:
+                return  # still claimed; retried when the lease runs out
+            if lease is None:
+                self.stats["lease_lost"] += 1
+                return
+            sender = SENDERS.get(msg.channel)
+            if sender is None:
+                # queued before the connector was unconfigured; retrying cannot help
+                attempts = max(attempts, OUTBOX_MAX_ATTEMPTS)
+            try:
+                if sender is None:
+                    raise ValueError(f"Channel {msg.channel} is not configured")
+                await sender(msg.to, msg.text)
+                error = None
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"[:500]
+        if error is None:
+            self.stats["sent"] += 1
+        elif attempts >= OUTBOX_MAX_ATTEMPTS:
+            self.stats["dead"] += 1
+        else:
+            self.stats["failed"] += 1
+        try:
+            await run_in_threadpool(_finish, msg.id, attempts, error)
+        except Exception:
+            pass  # row stays claimed and is retried when its lease runs out
+
+DISPATCHER = OutboxDispatcher()
@@ -1,8 +1,17 @@
 # backend/app/qa.py
 import os
+from datetime import datetime, timedelta
+from time import perf_counter
+from typing import Optional
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-import requests
+from sqlmodel import SQLModel, Field, Session
+
+from .cache import LRUCache, SingleFlight
+from .db import get_engine
+from .qa_providers import first_answer
+from .metrics import UPSTREAM
 
 router = APIRouter(prefix="/qa", tags=["qa"])
 
@@ -12,66 +21,85 @@ class QAIn(BaseModel):
 class QAOut(BaseModel):
     answer: str
 
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")  # optional: set in backend/.env
-
-def wiki_answer(q: str) -> str:
-    """Quick factual answer via Wikipedia if OpenAI is not configured."""
-    try:
-        r = requests.get(
-            "https://en.wikipedia.org/w/api.php",
-            params={
-                "action": "query",
-                "list": "search",
-                "srsearch": q,
-                "utf8": 1,
-                "format": "json",
-                "srlimit": 1,
-            },
-            timeout=6,
-        )
-        data = r.json()
-        items = data.get("query", {}).get("search", [])
-        if not items:
-            return ""
-        title = items[0]["title"]
-        r2 = requests.get(
-            f"https://en.wikipedia.org/api/rest_v1/page/summary/{title}",
-            timeout=6,
-        )
-        j2 = r2.json()
-        extract = (j2.get("extract") or "").strip()
-        return extract
-    except Exception:
-        return ""
-
-def openai_answer(q: str) -> str:
-    """Use OpenAI if OPENAI_API_KEY is set; otherwise return empty."""
-    try:
-        if not OPENAI_API_KEY:
-            return ""
-        import openai
-        openai.api_key = OPENAI_API_KEY
-        resp = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "Answer concisely and factually."},
-                {"role": "user", "content": q},
-            ],
-            temperature=0.2,
-            max_tokens=256,
-        )
-        return resp.choices[0].message["content"].strip()
-    except Exception:
-        return ""
+# Answer cache: keyed by normalized question, bounded by size and TTL.
+QA_CACHE_SIZE = int(os.getenv("QA_CACHE_SIZE", "5000"))
+QA_CACHE_TTL_S = float(os.getenv("QA_CACHE_TTL_S", "86400"))
+QA_NEGATIVE_TTL_S = float(os.getenv("QA_NEGATIVE_TTL_S", "60"))  # "no answer" is retried sooner
+QA_CACHE_PERSIST = os.getenv("QA_CACHE_PERSIST", "0") == "1"     # also keep answers in the DB
+
+# -------------------- Answer cache --------------------
+
+class QAAnswer(SQLModel, table=True):
+    key: str = Field(primary_key=True)   # normalized question
+    answer: str = ""
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+ANSWERS = LRUCache(maxsize=QA_CACHE_SIZE, ttl=QA_CACHE_TTL_S)
+INFLIGHT = SingleFlight()
+STATS = {"hits": 0, "misses": 0, "persisted_hits": 0, "upstream_calls": 0}
+
+def normalize_question(q: str) -> str:
+    """
+    'What is Python?' and 'what  is python' share one cache entry. Symbols
+    inside the question are kept: 'What is C++?' and 'what is c#' do not.
+    """
+    return " ".join(q.casefold().split()).rstrip("?!. ")
+
+def _load_persisted(key: str) -> Optional[str]:
+    with Session(get_engine()) as s:
+        row = s.get(QAAnswer, key)
+    if row and row.answer and row.created_at > datetime.utcnow() - timedelta(seconds=QA_CACHE_TTL_S):
+        return row.answer
+    return None
+
+def _persist(key: str, answer: str):
+    with Session(get_engine()) as s:
+        s.merge(QAAnswer(key=key, answer=answer, created_at=datetime.utcnow()))
+        s.commit()
+
+async def _fetch(key: str, q: str) -> str:
+    if QA_CACHE_PERSIST:
+        answer = await run_in_threadpool(_load_persisted, key)
+        if answer:
+            STATS["persisted_hits"] += 1
+            ANSWERS.set(key, answer)
+            return answer
+
+    # OpenAI (if configured) and Wikipedia, in parallel unless QA_RACE=0
+    STATS["upstream_calls"] += 1
+    t0 = perf_counter()
+    answer = await first_answer(q)
+    # end to end across providers; each provider is also timed on its own
+    UPSTREAM.observe(("qa", "ok" if answer else "empty"), perf_counter() - t0)
+    if answer:
+        ANSWERS.set(key, answer)
+        if QA_CACHE_PERSIST:
+            await run_in_threadpool(_persist, key, answer)
+    else:
+        ANSWERS.set(key, "", ttl=QA_NEGATIVE_TTL_S)
+    return answer
+
+async def cached_answer(q: str) -> str:
+    key = normalize_question(q)
+    answer = ANSWERS.get(key)
+    if answer is not None:
+        STATS["hits"] += 1
+        return answer
+    STATS["misses"] += 1
+    # concurrent identical questions share one upstream fetch
+    return await INFLIGHT.do(key, lambda: _fetch(key, q))
 
 @router.post("/ask", response_model=QAOut)
-def ask(body: QAIn):
+async def ask(body: QAIn):
     q = (body.question or "").strip()
     if not q:
         raise HTTPException(400, "Empty question")
 
-    # Prefer OpenAI if configured, else fallback to Wikipedia
-    answer = openai_answer(q) or wiki_answer(q)
+    answer = await cached_answer(q)
     if not answer:
         answer = "Sorry, I couldn’t find a reliable answer."
     return {"answer": answer[:1200]}
+
+@router.get("/stats")
+def qa_stats():
+    return {**STATS, "coalesced": INFLIGHT.coalesced, "cache": ANSWERS.stats()}
@@ -0,0 +1,158 @@
+# backend/app/qa_providers.py
+import asyncio
+import os
+from time import perf_counter
+from typing import List, Optional
+
+import httpx
+
+from .metrics import UPSTREAM
+
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")  # optional: set in backend/.env
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+OPENAI_TIMEOUT_S = float(os.getenv("OPENAI_TIMEOUT_S", "8"))
+
+WIKI_API_URL = os.getenv("WIKI_API_URL", "https://en.wikipedia.org/w/api.php")
+WIKI_SUMMARY_URL = os.getenv("WIKI_SUMMARY_URL", "https://en.wikipedia.org/api/rest_v1/page/summary")
+WIKI_TIMEOUT_S = float(os.getenv("WIKI_TIMEOUT_S", "6"))
+
+QA_RACE = os.getenv("QA_RACE", "1") == "1"  # run providers in parallel, first good answer wins
+
+
+class Provider:
+    """
+    One upstream answer source. Each provider owns a single keep-alive
+    httpx.AsyncClient for the life of the app; `answer()` returns "" when it
+    has nothing useful (errors included), never raises.
+    """
+
+    name = "provider"
+    timeout = 6.0
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def enabled(self) -> bool:
+        return True
+
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+            )
+        return self._client
+
+    async def fetch(self, q: str) -> str:
+        raise NotImplementedError
+
+    async def answer(self, q: str) -> str:
+        t0 = perf_counter()
+        outcome = "error"
+        try:
+            text = (await asyncio.wait_for(self.fetch(q), self.timeout) or "").strip()
+            outcome = "ok" if text else "empty"
+            return text
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            return ""
+        except asyncio.CancelledError:
+            outcome = "cancelled"   # another provider answered first
+            raise
+        except Exception:
+            return ""
+        finally:
+            UPSTREAM.observe((self.name, outcome), perf_counter() - t0)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class OpenAIProvider(Provider):
+    name = "openai"
+    timeout = OPENAI_TIMEOUT_S
+
+    @property
+    def enabled(self) -> bool:
+        return bool(OPENAI_API_KEY)
+
+    async def fetch(self, q: str) -> str:
+        r = await self.client().post(
+            f"{OPENAI_BASE_URL}/chat/completions",
+            headers={"Authorization": f"Bearer {OPENAI_API_KEY}"},
+            json={
+                "model": OPENAI_MODEL,
+                "messages": [
+                    {"role": "system", "content": "Answer concisely and factually."},
+                    {"role": "user", "content": q},
+                ],
+                "temperature": 0.2,
+                "max_tokens": 256,
+            },
+        )
+        r.raise_for_status()
+        return r.json()["choices"][0]["message"]["content"]
+
+
+class WikipediaProvider(Provider):
+    """Quick factual answer via Wikipedia search + page summary."""
+
+    name = "wikipedia"
+    timeout = WIKI_TIMEOUT_S
+
+    async def fetch(self, q: str) -> str:
+        client = self.client()
+        r = await client.get(
+            WIKI_API_URL,
+            params={
+                "action": "query",
+                "list": "search",
+                "srsearch": q,
+                "utf8": 1,
+                "format": "json",
+                "srlimit": 1,
+            },
+        )
+        items = r.json().get("query", {}).get("search", [])
+        if not items:
+            return ""
+        title = items[0]["title"]
+        r2 = await client.get(f"{WIKI_SUMMARY_URL}/{title}")
+        return r2.json().get("extract") or ""
+
+
+# Order = preference when racing is off (OpenAI first, like before)
+PROVIDERS: List[Provider] = [OpenAIProvider(), WikipediaProvider()]
+
+
+async def first_answer(q: str, providers: Optional[List[Provider]] = None, race: bool = QA_RACE) -> str:
+    """Ask the enabled providers; return the first non-empty answer, or ""."""
+    providers = [p for p in (providers or PROVIDERS) if p.enabled]
+    if not race:
+        for p in providers:
+            answer = await p.answer(q)
+            if answer:
+                return answer
+        return ""
+
+    pending = {asyncio.ensure_future(p.answer(q)) for p in providers}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                answer = task.result()
+                if answer:
+                    return answer
+        return ""
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def close_providers():
+    for p in PROVIDERS:
+        await p.aclose()
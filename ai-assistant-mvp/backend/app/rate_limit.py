@@ -1,17 +1,255 @@
+import math
+import os
+import sqlite3
+import threading
 import time
-from typing import Dict, Tuple
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional
 
-# naive in-memory token bucket per IP
-BUCKETS: Dict[str, Tuple[float, float]] = {}  # ip -> (tokens, last_ts)
+from fastapi.concurrency import run_in_threadpool
+
+# token bucket per key (client IP by default)
 RATE = 1.0  # tokens per second
 BURST = 10.0
 
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"     # 0: no limits (load tests)
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")  # memory|sqlite
+RATE_LIMIT_SQLITE_PATH = os.getenv("RATE_LIMIT_SQLITE_PATH", "./rate_limit.db")
+RATE_LIMIT_SHARDS = int(os.getenv("RATE_LIMIT_SHARDS", "64"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "1000000"))
+# how long a take() waits for another worker's write lock before failing open
+RATE_LIMIT_SQLITE_BUSY_S = float(os.getenv("RATE_LIMIT_SQLITE_BUSY_S", "0.05"))
+
+
+class Decision(NamedTuple):
+    allowed: bool
+    remaining: float      # tokens left after this request
+    retry_after: float    # seconds until one token is available (0 if allowed)
+
+
+def _refill(tokens: float, last: float, now: float, rate: float, burst: float) -> float:
+    return min(burst, tokens + max(0.0, now - last) * rate)
+
+
+def _decide(tokens: float, rate: float, cost: float) -> Decision:
+    if tokens >= cost:
+        return Decision(True, tokens - cost, 0.0)
+    return Decision(False, tokens, (cost - tokens) / rate if rate > 0 else float("inf"))
+
+
+class RateLimitBackend:
+    """
+    Storage for token buckets. `take` refills the bucket for `key`, tries to
+    spend `cost` tokens and reports the outcome. Implementations must be safe
+    to call from many threads. Backends that may block set `blocking`, and
+    `acheck` then runs them off the event loop.
+    """
+
+    blocking = False
+
+    def take(self, key: str, rate: float = RATE, burst: float = BURST, cost: float = 1.0) -> Decision:
+        raise NotImplementedError
+
+    def reset(self, key: str):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MemoryBackend(RateLimitBackend):
+    """
+    Process-local buckets, sharded by key hash so threads rarely share a lock.
+
+    Each shard is an LRU (OrderedDict). A bucket that has been idle long enough
+    to refill completely is indistinguishable from a new one, so it is dropped
+    from the LRU end as we go; `max_keys` is a hard cap on top of that.
+    """
+
+    def __init__(self, shards: int = RATE_LIMIT_SHARDS, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        n = 1
+        while n < max(1, shards):
+            n <<= 1
+        self._mask = n - 1
+        self._per_shard = max(1, max_keys // n)
+        self._locks = [threading.Lock() for _ in range(n)]
+        self._shards: List["OrderedDict[str, list]"] = [OrderedDict() for _ in range(n)]  # key -> [tokens, last, full_at]
+        self.evictions = 0
+
+    def take(self, key: str, rate: float = RATE, burst: float = BURST, cost: float = 1.0) -> Decision:
+        i = hash(key) & self._mask
+        shard = self._shards[i]
+        now = time.monotonic()
+        with self._locks[i]:
+            b = shard.get(key)
+            if b is None:
+                tokens = burst
+                b = shard[key] = [burst, now, now]
+            else:
+                tokens = _refill(b[0], b[1], now, rate, burst)
+                shard.move_to_end(key)
+            d = _decide(tokens, rate, cost)
+            b[0] = d.remaining
+            b[1] = now
+            b[2] = now + (burst - d.remaining) / rate if rate > 0 else float("inf")
+
+            # amortized cleanup: drop a few fully refilled buckets, then enforce the cap
+            for _ in range(2):
+                old_key, old = next(iter(shard.items()))
+                if old_key == key or old[2] > now:
+                    break
+                del shard[old_key]
+                self.evictions += 1
+            while len(shard) > self._per_shard:
+                shard.popitem(last=False)
+                self.evictions += 1
+        return d
+
+    def reset(self, key: str):
+        i = hash(key) & self._mask
+        with self._locks[i]:
+            self._shards[i].pop(key, None)
+
+    def __len__(self) -> int:
+        return sum(len(s) for s in self._shards)
+
+
+class SQLiteBackend(RateLimitBackend):
+    """
+    Buckets in a small SQLite file so several Uvicorn workers on one host share
+    limits. Timestamps use time.monotonic(), which is host-wide on Linux;
+    elapsed time is clamped at zero so a stale file after a reboot cannot
+    produce negative refills. A take that cannot get the write lock within
+    RATE_LIMIT_SQLITE_BUSY_S is allowed rather than stalling the request.
+    """
+
+    blocking = True
+
+    SWEEP_EVERY = 10_000   # calls between idle-bucket sweeps
+    IDLE_TTL = 3600.0      # seconds a bucket may sit untouched before it is swept
+
+    def __init__(self, path: str = RATE_LIMIT_SQLITE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._calls = 0
+        self.busy = 0  # takes allowed because the lock was held elsewhere
+        con = self._con()
+        con.execute(
+            "CREATE TABLE IF NOT EXISTS rate_bucket ("
+            "key TEXT PRIMARY KEY, tokens REAL NOT NULL, last REAL NOT NULL) WITHOUT ROWID"
+        )
+
+    def _con(self) -> sqlite3.Connection:
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.path, timeout=RATE_LIMIT_SQLITE_BUSY_S, isolation_level=None, check_same_thread=False)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=OFF")  # limiter state is disposable
+            self._local.con = con
+        return con
+
+    def take(self, key: str, rate: float = RATE, burst: float = BURST, cost: float = 1.0) -> Decision:
+        con = self._con()
+        now = time.monotonic()
+        try:
+            con.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError as e:
+            if "locked" not in str(e) and "busy" not in str(e):
+                raise
+            self.busy += 1
+            return Decision(True, burst, 0.0)
+        try:
+            row = con.execute("SELECT tokens, last FROM rate_bucket WHERE key = ?", (key,)).fetchone()
+            tokens = burst if row is None else _refill(row[0], row[1], now, rate, burst)
+            d = _decide(tokens, rate, cost)
+            con.execute(
+                "INSERT INTO rate_bucket (key, tokens, last) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, last = excluded.last",
+                (key, d.remaining, now),
+            )
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+        self._calls += 1
+        if self._calls % self.SWEEP_EVERY == 0:
+            con.execute("DELETE FROM rate_bucket WHERE last < ?", (now - self.IDLE_TTL,))
+        return d
+
+    def reset(self, key: str):
+        self._con().execute("DELETE FROM rate_bucket WHERE key = ?", (key,))
+
+    def close(self):
+        con = getattr(self._local, "con", None)
+        if con is not None:
+            con.close()
+            self._local.con = None
+
+
+def make_backend(kind: Optional[str] = None) -> RateLimitBackend:
+    kind = (kind or RATE_LIMIT_BACKEND).lower()
+    if kind == "memory":
+        return MemoryBackend()
+    if kind == "sqlite":
+        return SQLiteBackend()
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {kind}")
+
+
+BACKEND: RateLimitBackend = make_backend()
+
+
 def allow(ip: str) -> bool:
-    now = time.time()
-    tokens, last = BUCKETS.get(ip, (BURST, now))
-    tokens = min(BURST, tokens + (now - last) * RATE)
-    if tokens >= 1.0:
-        BUCKETS[ip] = (tokens - 1.0, now)
-        return True
-    BUCKETS[ip] = (tokens, now)
-    return False
+    return BACKEND.take(ip, RATE, BURST).allowed
+
+
+# -------------------- Policies --------------------
+
+class RatePolicy(NamedTuple):
+    name: str
+    prefix: str       # matched against the request path, longest prefix wins
+    rate: float       # tokens per second
+    burst: float
+    per: str = "ip"   # "ip" or "user" (user falls back to IP when unauthenticated)
+
+
+POLICIES: List[RatePolicy] = sorted([
+    RatePolicy("ping", "/biometrics/voice/ping", rate=5.0, burst=40.0, per="user"),
+    RatePolicy("auth", "/auth/", rate=0.2, burst=5.0),
+    RatePolicy("qa", "/qa/ask", rate=0.5, burst=5.0, per="user"),
+    RatePolicy("default", "", rate=RATE, burst=BURST),
+], key=lambda p: len(p.prefix), reverse=True)
+
+
+# Never limited: scrapers poll on their own schedule, often from a shared IP
+RATE_LIMIT_EXEMPT = frozenset({"/metrics"})
+
+
+def policy_for(path: str) -> RatePolicy:
+    for p in POLICIES:
+        if path.startswith(p.prefix):
+            return p
+    return POLICIES[-1]
+
+
+def check(policy: RatePolicy, ip: str, uid: Optional[str] = None) -> Decision:
+    who = f"u:{uid}" if policy.per == "user" and uid else f"ip:{ip}"
+    return BACKEND.take(f"{policy.name}:{who}", policy.rate, policy.burst)
+
+
+async def acheck(policy: RatePolicy, ip: str, uid: Optional[str] = None) -> Decision:
+    """`check` for async callers; in-memory buckets stay on the event loop."""
+    if not BACKEND.blocking:
+        return check(policy, ip, uid)
+    return await run_in_threadpool(check, policy, ip, uid)
+
+
+def rate_headers(policy: RatePolicy, d: Decision) -> dict:
+    h = {
+        "X-RateLimit-Limit": str(int(policy.burst)),
+        "X-RateLimit-Remaining": str(int(d.remaining)),
+        # seconds until the bucket is full again
+        "X-RateLimit-Reset": str(math.ceil((policy.burst - d.remaining) / policy.rate)),
+    }
+    if not d.allowed:
+        h["Retry-After"] = str(max(1, math.ceil(d.retry_after)))
+    return h
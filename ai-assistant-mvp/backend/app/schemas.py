@@ -38,6 +38,7 @@
 
 
 # backend/app/schemas.py
+from datetime import datetime
 from typing import Optional, List, Dict, Any
 from pydantic import BaseModel, Field
 
@@ -75,6 +76,19 @@ class MessageIn(BaseModel):
     channel: str
     to: Optional[str] = None
 
+class MessageOut(BaseModel):
+    message_id: int
+    status: str  # queued for delivery; poll /agent/message/{id}
+
+class MessageStatusOut(BaseModel):
+    id: int
+    channel: str
+    status: str  # pending|sending|sent|dead
+    attempts: int
+    last_error: Optional[str] = None
+    created_at: datetime
+    sent_at: Optional[datetime] = None
+
 # ----- Biometrics -----
 class FaceSignature(BaseModel):
     size: int = Field(24, description="Width=Height for square downsample")
@@ -111,3 +125,37 @@ class VoicePingOut(BaseModel):
     matched_profile_tag: Optional[str] = None
     health_flag: bool = False          # NEW: likely sick/fever/hoarse/low-energy
     snr_db: Optional[float] = None     # Echo back for UI
+
+class StatOut(BaseModel):
+    mean: Optional[float] = None
+    std: Optional[float] = None        # sample std; None below 2 samples
+
+class VoiceSessionSummaryOut(BaseModel):
+    session_id: int
+    started_at: datetime
+    ended_at: Optional[datetime] = None
+    pings: int = 0
+    pitch_hz: StatOut
+    rms: StatOut
+    snr_db: StatOut
+    owner_ratio: Optional[float] = None
+    emotions: Dict[str, int] = {}
+    health_flags: int = 0
+    health_streak: int = 0             # flagged pings in a row at the end
+    health_streak_max: int = 0
+    first_ping_at: Optional[datetime] = None
+    last_ping_at: Optional[datetime] = None
+    finalized: bool = False
+
+class FaceVerifyOut(BaseModel):
+    match: bool
+    score: float        # cosine of mean-centered signatures, -1..1
+    threshold: float
+
+class FaceMatchOut(BaseModel):
+    user_uid: str
+    score: float
+
+class FaceIdentifyOut(BaseModel):
+    matches: List[FaceMatchOut]
+    threshold: float
@@ -1,15 +1,35 @@
-import os, time, jwt
-from passlib.context import CryptContext
+import hashlib, os, time, jwt
 
-pwd = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from .cache import LRUCache
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))  # each +1 doubles hash/verify time
 JWT_SECRET = os.getenv("JWT_SECRET", "dev-secret-change")
 JWT_ISS = "ai-assistant"
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "50000"))
+TOKEN_CACHE_TTL_S = float(os.getenv("TOKEN_CACHE_TTL_S", "300"))  # upper bound; entries never outlive `exp`
+
+# passlib/bcrypt are imported on the first hash, which normally happens in a
+# HASHER worker process, so the web worker never pays for them at startup.
+_pwd = None
+
+def pwd():
+    global _pwd
+    if _pwd is None:
+        from passlib.context import CryptContext
+        _pwd = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+    return _pwd
 
 def hash_password(p: str) -> str:
-    return pwd.hash(p)
+    return pwd().hash(p)
 
 def verify_password(p: str, h: str) -> bool:
-    return pwd.verify(p, h)
+    return pwd().verify(p, h)
+
+def verify_and_update_password(p: str, h: str):
+    """(ok, new_hash): new_hash is set when `h` was made with a different cost than BCRYPT_ROUNDS."""
+    if not h:
+        return False, None
+    return pwd().verify_and_update(p, h)
 
 def make_token(sub: str, ttl: int = 3600) -> str:
     now = int(time.time())
@@ -18,3 +38,19 @@ def make_token(sub: str, ttl: int = 3600) -> str:
 
 def decode_token(t: str) -> dict:
     return jwt.decode(t, JWT_SECRET, algorithms=["HS256"], options={"require": ["exp", "sub"]})
+
+# Verified claims keyed by a digest of the token (the raw token is never kept).
+# Only successful decodes are cached, so garbage tokens can't flush real ones
+# cheaply and an invalid token is always re-checked.
+TOKEN_CACHE = LRUCache(maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL_S)
+
+def verify_token(t: str) -> dict:
+    """decode_token with a bounded cache; same errors, and honors `exp` on hits."""
+    key = hashlib.sha256(t.encode()).digest()
+    claims = TOKEN_CACHE.get(key)
+    now = time.time()
+    if claims is not None and claims["exp"] > now:
+        return claims
+    claims = decode_token(t)
+    TOKEN_CACHE.set(key, claims, ttl=min(TOKEN_CACHE_TTL_S, claims["exp"] - now))
+    return claims
@@ -0,0 +1,272 @@
+# backend/app/voice_rollup.py
+import os
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timedelta
+from typing import Deque, Dict, Optional, Tuple
+
+from sqlalchemy import JSON, UniqueConstraint, delete, func, update
+from sqlmodel import SQLModel, Field, Session, select
+
+from .db import get_engine
+from .biometrics import VoicePing, VoiceSession, day_of
+
+# -------------------- Config --------------------
+
+ROLLUP_INTERVAL_S = float(os.getenv("ROLLUP_INTERVAL_S", "60"))
+ROLLUP_LAG_S = float(os.getenv("ROLLUP_LAG_S", "30"))        # settle window: longer than any ping insert transaction
+ROLLUP_BATCH = int(os.getenv("ROLLUP_BATCH", "20000"))       # raw pings read per transaction
+VOICEPING_RETENTION_DAYS = int(os.getenv("VOICEPING_RETENTION_DAYS", "30"))   # 0 keeps raw pings forever
+ROLLUP_RETENTION_DAYS = int(os.getenv("ROLLUP_RETENTION_DAYS", "400"))        # hourly rollups
+RETENTION_INTERVAL_S = float(os.getenv("RETENTION_INTERVAL_S", "3600"))
+RETENTION_CHUNK = int(os.getenv("RETENTION_CHUNK", "5000"))  # rows per DELETE, keeps write locks short
+
+# -------------------- Tables --------------------
+# Sums are stored next to the means so batches merge exactly; dashboards read
+# the mean_* / owner_ratio columns. Per-session figures are kept live by the
+# ping sink instead (see voice_stats.VoiceSessionStats).
+
+class PingAggregate(SQLModel):
+    n: int = 0
+    pitch_sum: float = 0.0
+    rms_sum: float = 0.0
+    snr_sum: float = 0.0
+    snr_n: int = 0
+    owner_n: int = 0
+    health_n: int = 0
+    emotions: Dict[str, int] = Field(default_factory=dict, sa_type=JSON)
+    mean_pitch_hz: float = 0.0
+    mean_rms: float = 0.0
+    mean_snr_db: Optional[float] = None
+    owner_ratio: float = 0.0
+    first_ts: Optional[datetime] = None
+    last_ts: Optional[datetime] = None
+
+class VoiceHourRollup(PingAggregate, table=True):
+    __table_args__ = (UniqueConstraint("user_uid", "hour"),)
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_uid: Optional[str] = Field(default=None, index=True)
+    hour: datetime = Field(index=True)   # start of the UTC hour
+
+class RollupState(SQLModel, table=True):
+    name: str = Field(primary_key=True)
+    last_id: int = 0   # highest VoicePing.id folded into the rollups
+
+# -------------------- Aggregation --------------------
+
+class _Acc:
+    __slots__ = ("n", "pitch", "rms", "snr", "snr_n", "owner", "health", "emotions", "first", "last")
+
+    def __init__(self):
+        self.n = 0
+        self.pitch = self.rms = self.snr = 0.0
+        self.snr_n = self.owner = self.health = 0
+        self.emotions: Counter = Counter()
+        self.first: Optional[datetime] = None
+        self.last: Optional[datetime] = None
+
+    def add(self, r):
+        self.n += 1
+        self.pitch += r.pitch_hz or 0.0
+        self.rms += r.rms or 0.0
+        if r.snr_db is not None:
+            self.snr += r.snr_db
+            self.snr_n += 1
+        self.owner += bool(r.is_owner)
+        self.health += bool(r.health_flag)
+        self.emotions[r.emotion or "unknown"] += 1
+        if self.first is None or r.ts < self.first:
+            self.first = r.ts
+        if self.last is None or r.ts > self.last:
+            self.last = r.ts
+
+    def merge_into(self, row: PingAggregate):
+        row.n += self.n
+        row.pitch_sum += self.pitch
+        row.rms_sum += self.rms
+        row.snr_sum += self.snr
+        row.snr_n += self.snr_n
+        row.owner_n += self.owner
+        row.health_n += self.health
+        row.emotions = dict(Counter(row.emotions or {}) + self.emotions)  # new object so the JSON column is dirty
+        row.first_ts = min(filter(None, (row.first_ts, self.first)))
+        row.last_ts = max(filter(None, (row.last_ts, self.last)))
+        row.mean_pitch_hz = row.pitch_sum / row.n
+        row.mean_rms = row.rms_sum / row.n
+        row.mean_snr_db = row.snr_sum / row.snr_n if row.snr_n else None
+        row.owner_ratio = row.owner_n / row.n
+
+
+def _hour(ts: datetime) -> datetime:
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+# -------------------- Job --------------------
+
+class VoiceRollupJob:
+    """
+    Background thread that folds raw pings into per-user hourly rollups,
+    then applies retention.
+
+    Progress is a single watermark row (RollupState). A batch's upserts and
+    the watermark move commit together, and the watermark update is
+    conditional on the value read, so when several workers run the job each
+    ping is counted exactly once. Raw pings are only deleted after they are
+    folded in.
+
+    Ids are handed out at INSERT but become visible at COMMIT, so on Postgres
+    or MySQL a lower id can show up after a higher one. The watermark only
+    passes ids that already existed `lag_s` ago (see _settled_id); a ping
+    whose transaction stays open longer than that would be skipped.
+    """
+
+    name = "voiceping"
+
+    def __init__(self, interval_s: float = ROLLUP_INTERVAL_S):
+        self.interval_s = interval_s
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_retention: Optional[float] = None
+        self._marks: Deque[Tuple[float, int]] = deque()  # (monotonic time, max ping id then)
+        self._settled = 0
+        # metrics
+        self.rolled_up = 0
+        self.deleted = 0
+        self.runs = 0
+        self.failed_runs = 0
+        self.last_run_ms = 0.0
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="voice-rollup", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            try:
+                self.run_once()
+            except Exception:
+                self.failed_runs += 1  # retried next interval; the watermark did not move
+
+    def run_once(self, lag_s: float = ROLLUP_LAG_S) -> int:
+        t0 = time.perf_counter()
+        total = 0
+        settled = self._settled_id(lag_s)
+        while not self._stop.is_set():
+            n = self._rollup_batch(settled)
+            total += n
+            if n < ROLLUP_BATCH:
+                break
+        if self._last_retention is None or time.monotonic() - self._last_retention >= RETENTION_INTERVAL_S:
+            self.apply_retention()
+            self._last_retention = time.monotonic()
+        self.runs += 1
+        self.rolled_up += total
+        self.last_run_ms = (time.perf_counter() - t0) * 1000.0
+        return total
+
+    def _settled_id(self, lag_s: float) -> int:
+        """Highest ping id seen at least `lag_s` ago: every lower id has committed or rolled back by now."""
+        with Session(get_engine()) as s:
+            top = s.exec(select(func.max(VoicePing.id))).one() or 0
+        now = time.monotonic()
+        self._marks.append((now, top))
+        while self._marks and now - self._marks[0][0] >= lag_s:
+            self._settled = self._marks.popleft()[1]
+        return self._settled
+
+    def _rollup_batch(self, settled: int) -> int:
+        with Session(get_engine()) as s:
+            state = s.get(RollupState, self.name)
+            last = state.last_id if state else 0
+            if last >= settled:
+                return 0
+            rows = s.exec(
+                select(
+                    VoicePing.id, VoicePing.ts,
+                    func.coalesce(VoicePing.user_uid, VoiceSession.user_uid).label("user_uid"),
+                    VoicePing.pitch_hz, VoicePing.rms, VoicePing.snr_db, VoicePing.emotion,
+                    VoicePing.is_owner, VoicePing.health_flag,
+                )
+                .join(VoiceSession, VoiceSession.id == VoicePing.session_id, isouter=True)
+                .where(VoicePing.id > last, VoicePing.id <= settled)
+                .order_by(VoicePing.id)
+                .limit(ROLLUP_BATCH)
+            ).all()
+            if not rows:
+                return 0
+
+            hours: Dict[Tuple[Optional[str], datetime], _Acc] = {}
+            for r in rows:
+                hours.setdefault((r.user_uid, _hour(r.ts)), _Acc()).add(r)
+
+            for (uid, hour), acc in hours.items():
+                row = s.exec(
+                    select(VoiceHourRollup).where(VoiceHourRollup.user_uid == uid, VoiceHourRollup.hour == hour)
+                ).first() or VoiceHourRollup(user_uid=uid, hour=hour)
+                acc.merge_into(row)
+                s.add(row)
+
+            new_last = rows[-1].id
+            if state is None:
+                s.add(RollupState(name=self.name, last_id=new_last))  # PK clash if another worker got there first
+            else:
+                moved = s.exec(
+                    update(RollupState)
+                    .where(RollupState.name == self.name, RollupState.last_id == last)
+                    .values(last_id=new_last)
+                ).rowcount
+                if moved != 1:
+                    s.rollback()  # another worker rolled this range up
+                    return 0
+            s.commit()
+            return len(rows)
+
+    def apply_retention(self):
+        """
+        Delete raw pings older than the retention window (already rolled up
+        only) and old hourly rollups. `day` is a plain indexed column, not a
+        native partition, so this is a chunked DELETE rather than a drop.
+        """
+        engine = get_engine()
+        if VOICEPING_RETENTION_DAYS > 0:
+            with Session(engine) as s:
+                state = s.get(RollupState, self.name)
+                last = state.last_id if state else 0
+            first_day = day_of(datetime.utcnow()) - VOICEPING_RETENTION_DAYS
+            doomed = (
+                select(VoicePing.id)
+                .where(VoicePing.day < first_day, VoicePing.id <= last)
+                .limit(RETENTION_CHUNK)
+                .scalar_subquery()
+            )
+            while not self._stop.is_set():
+                with engine.begin() as con:
+                    n = con.execute(delete(VoicePing).where(VoicePing.id.in_(doomed))).rowcount
+                self.deleted += n
+                if n < RETENTION_CHUNK:
+                    break
+        if ROLLUP_RETENTION_DAYS > 0:
+            oldest = _hour(datetime.utcnow() - timedelta(days=ROLLUP_RETENTION_DAYS))
+            with engine.begin() as con:
+                con.execute(delete(VoiceHourRollup).where(VoiceHourRollup.hour < oldest))
+
+    def stats(self) -> dict:
+        return {
+            "runs": self.runs,
+            "failed_runs": self.failed_runs,
+            "rolled_up": self.rolled_up,
+            "deleted": self.deleted,
+            "last_run_ms": round(self.last_run_ms, 3),
+        }
+
+
+ROLLUP_JOB = VoiceRollupJob()
@@ -0,0 +1,200 @@
+# backend/app/voice_stats.py
+import math
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import JSON, bindparam, select
+from sqlmodel import SQLModel, Field
+
+# -------------------- Table --------------------
+# One row per voice session, kept current by the ping write-behind sink in the
+# same transaction that inserts the raw pings. Means/variances are Welford
+# state (mean + M2), so merging a flushed batch is O(1) per ping and nothing
+# ever re-reads the ping table.
+
+class VoiceSessionStats(SQLModel, table=True):
+    session_id: int = Field(primary_key=True)
+    user_uid: str = Field(index=True)
+    n: int = 0
+    pitch_mean: float = 0.0
+    pitch_m2: float = 0.0
+    rms_mean: float = 0.0
+    rms_m2: float = 0.0
+    snr_n: int = 0
+    snr_mean: float = 0.0
+    snr_m2: float = 0.0
+    owner_n: int = 0
+    health_n: int = 0
+    health_streak: int = 0       # consecutive flagged pings at the end of the session so far
+    health_streak_max: int = 0
+    emotions: Dict[str, int] = Field(default_factory=dict, sa_type=JSON)
+    first_ts: Optional[datetime] = None
+    last_ts: Optional[datetime] = None
+    finalized_at: Optional[datetime] = None
+
+# -------------------- Running aggregates --------------------
+
+class Welford:
+    __slots__ = ("n", "mean", "m2")
+
+    def __init__(self, n: int = 0, mean: float = 0.0, m2: float = 0.0):
+        self.n, self.mean, self.m2 = n, mean, m2
+
+    def add(self, x: float):
+        self.n += 1
+        d = x - self.mean
+        self.mean += d / self.n
+        self.m2 += d * (x - self.mean)
+
+    def merge(self, other: "Welford") -> "Welford":
+        """Chan et al. parallel combination; `self` is the earlier part."""
+        if not other.n:
+            return Welford(self.n, self.mean, self.m2)
+        if not self.n:
+            return Welford(other.n, other.mean, other.m2)
+        n = self.n + other.n
+        d = other.mean - self.mean
+        return Welford(n, self.mean + d * other.n / n, self.m2 + other.m2 + d * d * self.n * other.n / n)
+
+    @property
+    def std(self) -> Optional[float]:
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else None
+
+
+class SessionDelta:
+    """Aggregate of one flushed batch of a session's pings, in arrival order."""
+
+    def __init__(self, user_uid: str):
+        self.user_uid = user_uid
+        self.pitch = Welford()
+        self.rms = Welford()
+        self.snr = Welford()
+        self.owner_n = 0
+        self.health_n = 0
+        self.emotions: Counter = Counter()
+        # streak state that merges in order: leading run, trailing run, longest run
+        self.lead = 0
+        self.trail = 0
+        self.longest = 0
+        self.first_ts: Optional[datetime] = None
+        self.last_ts: Optional[datetime] = None
+
+    def add(self, row: dict):
+        self.pitch.add(row["pitch_hz"] or 0.0)
+        self.rms.add(row["rms"] or 0.0)
+        if row.get("snr_db") is not None:
+            self.snr.add(row["snr_db"])
+        self.owner_n += bool(row["is_owner"])
+        self.emotions[row["emotion"] or "unknown"] += 1
+        if row["health_flag"]:
+            self.health_n += 1
+            self.trail += 1
+            self.longest = max(self.longest, self.trail)
+            if self.lead == self.pitch.n - 1:
+                self.lead += 1
+        else:
+            self.trail = 0
+        ts = row["ts"]
+        self.first_ts = ts if self.first_ts is None else min(self.first_ts, ts)
+        self.last_ts = ts if self.last_ts is None else max(self.last_ts, ts)
+
+    def merged_into(self, cur: Optional[dict]) -> dict:
+        """Column values after appending this batch to the stored row `cur` (None = no row yet)."""
+        cur = cur or {}
+        n0 = cur.get("n", 0)
+        pitch = Welford(n0, cur.get("pitch_mean", 0.0), cur.get("pitch_m2", 0.0)).merge(self.pitch)
+        rms = Welford(n0, cur.get("rms_mean", 0.0), cur.get("rms_m2", 0.0)).merge(self.rms)
+        snr = Welford(cur.get("snr_n", 0), cur.get("snr_mean", 0.0), cur.get("snr_m2", 0.0)).merge(self.snr)
+        streak0 = cur.get("health_streak", 0)
+        all_flagged = self.lead == self.pitch.n
+        first_ts = min(filter(None, (cur.get("first_ts"), self.first_ts)))
+        last_ts = max(filter(None, (cur.get("last_ts"), self.last_ts)))
+        return {
+            "n": pitch.n,
+            "pitch_mean": pitch.mean, "pitch_m2": pitch.m2,
+            "rms_mean": rms.mean, "rms_m2": rms.m2,
+            "snr_n": snr.n, "snr_mean": snr.mean, "snr_m2": snr.m2,
+            "owner_n": cur.get("owner_n", 0) + self.owner_n,
+            "health_n": cur.get("health_n", 0) + self.health_n,
+            "health_streak": streak0 + self.pitch.n if all_flagged else self.trail,
+            "health_streak_max": max(cur.get("health_streak_max", 0), self.longest, streak0 + self.lead),
+            "emotions": dict(Counter(cur.get("emotions") or {}) + self.emotions),
+            "first_ts": first_ts,
+            "last_ts": last_ts,
+        }
+
+
+def apply_pings(con, rows: List[dict]):
+    """
+    Fold a batch of ping rows (as queued by the write-behind buffer) into
+    VoiceSessionStats. Runs on the sink's connection, inside its transaction.
+    """
+    deltas: Dict[int, SessionDelta] = {}
+    for r in rows:
+        d = deltas.get(r["session_id"])
+        if d is None:
+            d = deltas[r["session_id"]] = SessionDelta(r["user_uid"])
+        d.add(r)
+
+    t = VoiceSessionStats.__table__
+    current = {
+        row["session_id"]: dict(row)
+        for row in con.execute(
+            select(t).where(t.c.session_id.in_(list(deltas))).with_for_update()
+        ).mappings()
+    }
+    inserts, updates = [], []
+    for session_id, d in deltas.items():
+        cur = current.get(session_id)
+        values = d.merged_into(cur)
+        if cur is None:
+            inserts.append({"session_id": session_id, "user_uid": d.user_uid, **values})
+        else:
+            updates.append({"b_session_id": session_id, **values})
+    if inserts:
+        con.execute(t.insert(), inserts)
+    if updates:
+        con.execute(t.update().where(t.c.session_id == bindparam("b_session_id")), updates)
+
+# -------------------- Read side --------------------
+
+def _mean_std(n: int, mean: float, m2: float) -> dict:
+    return {"mean": mean if n else None, "std": Welford(n, mean, m2).std}
+
+def summarize(stats: Optional[VoiceSessionStats], session) -> dict:
+    """Response body for one session (`stats` is None when it has no pings yet)."""
+    out = {
+        "session_id": session.id,
+        "started_at": session.started_at,
+        "ended_at": session.ended_at,
+        "pings": 0,
+        "pitch_hz": _mean_std(0, 0.0, 0.0),
+        "rms": _mean_std(0, 0.0, 0.0),
+        "snr_db": _mean_std(0, 0.0, 0.0),
+        "owner_ratio": None,
+        "emotions": {},
+        "health_flags": 0,
+        "health_streak": 0,
+        "health_streak_max": 0,
+        "first_ping_at": None,
+        "last_ping_at": None,
+        "finalized": bool(session.ended_at),
+    }
+    if stats is None or not stats.n:
+        return out
+    out.update(
+        pings=stats.n,
+        pitch_hz=_mean_std(stats.n, stats.pitch_mean, stats.pitch_m2),
+        rms=_mean_std(stats.n, stats.rms_mean, stats.rms_m2),
+        snr_db=_mean_std(stats.snr_n, stats.snr_mean, stats.snr_m2),
+        owner_ratio=stats.owner_n / stats.n,
+        emotions=stats.emotions or {},
+        health_flags=stats.health_n,
+        health_streak=stats.health_streak,
+        health_streak_max=stats.health_streak_max,
+        first_ping_at=stats.first_ts,
+        last_ping_at=stats.last_ts,
+        finalized=stats.finalized_at is not None,
+    )
+    return out
@@ -0,0 +1,198 @@
+# backend/app/write_behind.py
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """
+    In-memory queue that hands rows to `sink` in bulk.
+
+    A flush happens when `max_batch` rows are pending or `max_delay` seconds
+    have passed since the oldest pending row, whichever comes first. The
+    request path only appends to a deque under a lock; the sink (and its fsync)
+    runs on a background thread, or inline when `flush()` is called.
+
+    A failed batch goes back to the front of the queue. After `max_retries`
+    failures in a row it is bisected: the parts that write are kept, and
+    single rows that still fail are dropped as poison and logged. If no part
+    writes at all, the sink is treated as down and everything stays queued.
+    """
+
+    def __init__(self, name: str, sink: Callable[[List[Any]], None],
+                 max_batch: int = 200, max_delay: float = 0.5, max_pending: int = 50_000,
+                 max_retries: int = 3):
+        self.name = name
+        self.sink = sink
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self._failures = 0  # consecutive failed flushes
+
+        self._items: Deque[Any] = deque()
+        self._oldest: Optional[float] = None
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()  # one sink call at a time, keeps row order
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+        # metrics
+        self.enqueued = 0
+        self.flushed = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.dropped = 0
+        self.poisoned = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+
+    # -------------------- Lifecycle --------------------
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name=f"write-behind-{self.name}", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the background thread and flush whatever is still queued."""
+        with self._lock:
+            self._stopping = True
+            self._wake.notify_all()
+        if self._thread:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+        self.flush()
+
+    # -------------------- Queue --------------------
+
+    def add(self, item: Any):
+        with self._lock:
+            if len(self._items) >= self.max_pending:
+                # sink is down or far behind; shed the oldest row instead of growing forever
+                self._items.popleft()
+                self.dropped += 1
+            first = not self._items
+            if first:
+                self._oldest = time.monotonic()
+            self._items.append(item)
+            self.enqueued += 1
+            # wake the flusher to start the max_delay timer, or because the batch is full
+            if first or len(self._items) >= self.max_batch:
+                self._wake.notify()
+
+    def depth(self) -> int:
+        return len(self._items)
+
+    def flush(self) -> int:
+        """Synchronously write everything queued so far. Returns rows written."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._items = list(self._items), deque()
+                self._oldest = None
+            if not batch:
+                return 0
+            t0 = time.perf_counter()
+            try:
+                self.sink(batch)
+                written = len(batch)
+            except Exception:
+                self.failed_flushes += 1
+                self._failures += 1
+                written, retry = 0, batch
+                if self._failures >= self.max_retries:
+                    self._failures = 0
+                    written, retry = self._isolate(batch)
+                if not written:
+                    self._requeue(retry)
+                    raise
+            self._failures = 0
+            ms = (time.perf_counter() - t0) * 1000.0
+            self.flushes += 1
+            self.flushed += written
+            self.last_flush_ms = ms
+            self.total_flush_ms += ms
+            self.max_flush_ms = max(self.max_flush_ms, ms)
+            return written
+
+    def _requeue(self, batch: List[Any]):
+        with self._lock:
+            # put the batch back in front so a later flush retries it
+            self._items.extendleft(reversed(batch))
+            while len(self._items) > self.max_pending:
+                self._items.popleft()
+                self.dropped += 1
+            self._oldest = time.monotonic()
+
+    def _isolate(self, batch: List[Any]) -> Tuple[int, List[Any]]:
+        """
+        Bisect a batch that keeps failing. Returns (rows written, rows to
+        retry): the failing single rows are dropped if anything else was
+        written, otherwise the whole batch is handed back for a retry.
+        """
+        def split(rows: List[Any]) -> Tuple[int, List[Any]]:
+            try:
+                self.sink(rows)
+                return len(rows), []
+            except Exception:
+                if len(rows) == 1:
+                    return 0, rows
+                mid = len(rows) // 2
+                w1, bad1 = split(rows[:mid])
+                w2, bad2 = split(rows[mid:])
+                return w1 + w2, bad1 + bad2
+
+        written, bad = split(batch)
+        if not written:
+            return 0, batch
+        self.poisoned += len(bad)
+        for row in bad:
+            log.error("write-behind %s: dropping row that fails on its own: %r", self.name, row)
+        return written, []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "queue_depth": self.depth(),
+            "enqueued": self.enqueued,
+            "flushed": self.flushed,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "dropped": self.dropped,
+            "poisoned": self.poisoned,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "avg_flush_ms": round(self.total_flush_ms / self.flushes, 3) if self.flushes else 0.0,
+            "max_flush_ms": round(self.max_flush_ms, 3),
+        }
+
+    # -------------------- Background --------------------
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._stopping:
+                    if len(self._items) >= self.max_batch:
+                        break
+                    if self._oldest is not None:
+                        wait = self._oldest + self.max_delay - time.monotonic()
+                        if wait <= 0:
+                            break
+                        self._wake.wait(wait)
+                    else:
+                        self._wake.wait()
+                if self._stopping:
+                    return
+            try:
+                self.flush()
+            except Exception:
+                # rows stay queued; back off a little before retrying
+                time.sleep(min(1.0, self.max_delay))
@@ -0,0 +1,136 @@
+# backend/bench/bench_auth_storm.py
+"""
+Sign-in storm vs. everything else.
+
+    cd backend
+    python -m bench.bench_auth_storm --storm 64 --seconds 10
+
+Each profile runs in its own process against a fresh temp database:
+  threadpool  HASH_WORKERS=0: bcrypt in the shared threadpool, no queue limit
+              (how sign-in worked before the hash pool)
+  pool        the defaults: HASH_WORKERS bcrypt processes, HASH_MAX_PENDING
+              outstanding hashes before 503 + Retry-After
+
+`--storm` threads hammer POST /auth/signin for `--seconds` (backing off for
+Retry-After on a 503) while two probe threads time POST /biometrics/voice/ping
+(async route) and POST /agent/activate (sync route, i.e. threadpool). The
+numbers to watch are the probe latencies: the storm should not drag them along.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+PROFILES = {
+    "threadpool": {"HASH_WORKERS": "0", "HASH_MAX_PENDING": "1000000"},
+    "pool": {},
+}
+
+
+def pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(round(p / 100.0 * (len(xs) - 1))))] if xs else 0.0
+
+
+def run_profile(args) -> dict:
+    from fastapi.testclient import TestClient
+
+    import app.main as M
+    lat = {"signin": [], "ping": [], "activate": []}
+    codes = {"signin": {}, "ping": {}, "activate": {}}
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    with TestClient(M.app) as c:
+        c.post("/auth/register", json={"username": "storm", "email": "storm@bench", "password": "pw"})
+        tok = c.post("/auth/signin", json={"email": "storm@bench", "password": "pw"}).json()["access_token"]
+        h = {"Authorization": f"Bearer {tok}"}
+        c.post("/biometrics/voice/enroll", json={"avg_pitch_hz": 180.0, "avg_rms": 0.05}, headers=h)
+        sid = c.post("/biometrics/voice/session/start", json={}, headers=h).json()["session_id"]
+
+        def timed(kind, fn):
+            t0 = time.perf_counter()
+            try:
+                r = fn()
+                code = r.status_code
+            except Exception:
+                r, code = None, "error"
+            dt = time.perf_counter() - t0
+            with lock:
+                lat[kind].append(dt)
+                codes[kind][code] = codes[kind].get(code, 0) + 1
+            return r
+
+        def stormer():
+            body = {"email": "storm@bench", "password": "pw"}
+            while not stop.is_set():
+                r = timed("signin", lambda: c.post("/auth/signin", json=body))
+                if r is not None and r.status_code == 503:
+                    stop.wait(float(r.headers.get("Retry-After", "1")))  # behave like a polite client
+
+        def pinger():
+            n = 0
+            while not stop.is_set():
+                body = {"session_id": sid, "pitch_hz": 170.0 + n % 20, "rms": 0.05, "snr_db": 20.0}
+                timed("ping", lambda: c.post("/biometrics/voice/ping", json=body, headers=h))
+                n += 1
+                time.sleep(0.01)
+
+        def activator():
+            while not stop.is_set():
+                timed("activate", lambda: c.post("/agent/activate", json={}, headers=h))
+                time.sleep(0.01)
+
+        workers = [threading.Thread(target=stormer) for _ in range(args.storm)]
+        workers += [threading.Thread(target=pinger), threading.Thread(target=activator)]
+        t0 = time.perf_counter()
+        for w in workers:
+            w.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for w in workers:
+            w.join()
+        wall = time.perf_counter() - t0
+
+    return {
+        kind: {
+            "n": len(xs), "codes": codes[kind],
+            "p50_ms": pct(xs, 50) * 1000, "p99_ms": pct(xs, 99) * 1000,
+            "per_s": len(xs) / wall,
+        }
+        for kind, xs in lat.items()
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--storm", type=int, default=64, help="concurrent sign-in threads")
+    ap.add_argument("--seconds", type=float, default=10.0)
+    ap.add_argument("--rounds", type=int, default=12, help="BCRYPT_ROUNDS")
+    ap.add_argument("--profile", choices=sorted(PROFILES), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.profile:
+        print(json.dumps(run_profile(args)))
+        return
+
+    for name, env in PROFILES.items():
+        d = tempfile.mkdtemp()
+        child_env = dict(os.environ, RATE_LIMIT_ENABLED="0", DATABASE_URL=f"sqlite:///{d}/bench.db", BCRYPT_ROUNDS=str(args.rounds), **env)
+        out = subprocess.run(
+            [sys.executable, "-m", "bench.bench_auth_storm", "--profile", name,
+             "--storm", str(args.storm), "--seconds", str(args.seconds), "--rounds", str(args.rounds)],
+            env=child_env, capture_output=True, text=True, check=True,
+        ).stdout.strip().splitlines()[-1]
+        for kind, r in json.loads(out).items():
+            codes = " ".join(f"{k}:{v}" for k, v in sorted(r["codes"].items()))
+            print(f"{name:>10} {kind:>8}: {r['n']:6d} req  p50 {r['p50_ms']:7.1f} ms  p99 {r['p99_ms']:8.1f} ms  "
+                  f"{r['per_s']:7.1f} req/s  [{codes}]")
+
+
+if __name__ == "__main__":
+    main()
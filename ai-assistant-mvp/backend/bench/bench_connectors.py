@@ -0,0 +1,94 @@
+# backend/bench/bench_connectors.py
+"""
+Outbound connector throughput against local stub servers.
+
+    cd backend
+    python -m bench.bench_connectors --messages 500 --concurrency 20
+
+"before" opens a fresh httpx.AsyncClient / SMTP session (connect + login)
+per message, like the old connectors; "after" uses the pooled clients.
+"""
+import argparse
+import asyncio
+import os
+import time
+from email.message import EmailMessage
+
+import aiosmtplib
+import httpx
+
+from bench.stubs import StubServer, SMTPStub, connector_routes
+
+
+async def timed(n: int, concurrency: int, fn) -> float:
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with sem:
+            await fn(i)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n)))
+    return n / (time.perf_counter() - t0)
+
+
+async def bench(args, http_url, smtp_host, smtp_port):
+    from app.connectors.telegram_bot import send_telegram
+    from app.connectors.whatsapp_twilio import send_whatsapp
+    from app.connectors.email_sender import send_email
+    from app.connectors.clients import open_connectors, close_connectors
+
+    async def telegram_before(i):
+        async with httpx.AsyncClient(timeout=15) as client:
+            r = await client.post(f"{http_url}/botstub/sendMessage", json={"chat_id": "1", "text": f"m{i}"})
+            r.raise_for_status()
+
+    async def whatsapp_before(i):
+        async with httpx.AsyncClient(timeout=15, auth=("AC", "tok")) as client:
+            r = await client.post(f"{http_url}/2010-04-01/Accounts/AC/Messages.json",
+                                  data={"From": "whatsapp:+1", "To": "whatsapp:+2", "Body": f"m{i}"})
+            r.raise_for_status()
+
+    async def email_before(i):
+        msg = EmailMessage()
+        msg["From"], msg["To"], msg["Subject"] = "bench@example.com", "to@example.com", "bench"
+        msg.set_content(f"m{i}")
+        await aiosmtplib.send(msg, hostname=smtp_host, port=smtp_port, start_tls=False,
+                              username="bench", password="bench")
+
+    await open_connectors()
+    rows = [
+        ("telegram", telegram_before, lambda i: send_telegram("1", f"m{i}")),
+        ("whatsapp", whatsapp_before, lambda i: send_whatsapp("+2", f"m{i}")),
+        ("email", email_before, lambda i: send_email("to@example.com", f"m{i}")),
+    ]
+    print(f"{'channel':>9} {'before msg/s':>13} {'after msg/s':>12} {'speedup':>8}")
+    for name, before, after in rows:
+        b = await timed(args.messages, args.concurrency, before)
+        a = await timed(args.messages, args.concurrency, after)
+        print(f"{name:>9} {b:>13.1f} {a:>12.1f} {a / b:>7.1f}x")
+    await close_connectors()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--messages", type=int, default=500)
+    ap.add_argument("--concurrency", type=int, default=20)
+    ap.add_argument("--smtp-connect-ms", type=float, default=0.0, help="extra per-connection SMTP handshake delay")
+    args = ap.parse_args()
+
+    with StubServer(connector_routes()) as http_stub, SMTPStub(connect_delay=args.smtp_connect_ms / 1000) as smtp:
+        # connector settings are read at import time
+        os.environ.update({
+            "TELEGRAM_BOT_TOKEN": "stub", "TELEGRAM_API_BASE": http_stub.url,
+            "TWILIO_ACCOUNT_SID": "AC", "TWILIO_AUTH_TOKEN": "tok", "TWILIO_WHATSAPP_FROM": "whatsapp:+1",
+            "TWILIO_API_BASE": http_stub.url,
+            "SMTP_HOST": smtp.host, "SMTP_PORT": str(smtp.port), "SMTP_STARTTLS": "0",
+            "SMTP_USER": "bench", "SMTP_PASS": "bench", "SMTP_FROM": "bench@example.com",
+            "SMTP_POOL_SIZE": str(args.concurrency),
+        })
+        asyncio.run(bench(args, http_stub.url, smtp.host, smtp.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# backend/bench/bench_db_concurrency.py
+"""
+Concurrent writers against the real endpoints on a file SQLite DB.
+
+    cd backend
+    python -m bench.bench_db_concurrency --threads 32 --users 64 --pings 200
+
+Each profile runs in its own process (the engine is built at import time)
+against a fresh temp database:
+  legacy  rollback journal, synchronous=FULL, default cache, no mmap
+          (what a bare create_engine() gave us)
+  tuned   the make_engine() defaults: WAL, synchronous=NORMAL, busy_timeout,
+          mmap and a larger page cache
+
+Half the threads register users (POST /auth/register), the other half stream
+POST /biometrics/voice/ping. Ping rows are flushed with PING_FLUSH_SIZE=1 so
+every ping becomes its own write transaction, as before write-behind.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+PROFILES = {
+    "legacy": {"SQLITE_WAL": "0", "SQLITE_SYNCHRONOUS": "FULL", "SQLITE_MMAP_BYTES": "0", "SQLITE_CACHE_KB": "2000"},
+    "tuned": {},
+}
+
+
+def pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(round(p / 100.0 * (len(xs) - 1))))] if xs else 0.0
+
+
+def run_profile(args) -> dict:
+    from fastapi.testclient import TestClient
+
+    import app.main as M
+    lat = {"register": [], "ping": []}
+    errors = {"register": 0, "ping": 0}
+    lock = threading.Lock()
+
+    with TestClient(M.app) as c:
+        # one enrolled user with a session per ping thread
+        ping_threads = max(1, args.threads // 2)
+        sessions = []
+        for i in range(ping_threads):
+            c.post("/auth/register", json={"username": f"p{i}", "email": f"p{i}@bench", "password": "pw"})
+            tok = c.post("/auth/signin", json={"email": f"p{i}@bench", "password": "pw"}).json()["access_token"]
+            h = {"Authorization": f"Bearer {tok}"}
+            c.post("/biometrics/voice/enroll", json={"avg_pitch_hz": 180.0, "avg_rms": 0.05}, headers=h)
+            sid = c.post("/biometrics/voice/session/start", json={}, headers=h).json()["session_id"]
+            sessions.append((h, sid))
+
+        def timed(kind, fn):
+            t0 = time.perf_counter()
+            try:
+                ok = fn().status_code < 500
+            except Exception:
+                ok = False
+            dt = time.perf_counter() - t0
+            with lock:
+                lat[kind].append(dt)
+                if not ok:
+                    errors[kind] += 1
+
+        def pinger(h, sid):
+            for n in range(args.pings):
+                body = {"session_id": sid, "pitch_hz": 170.0 + n % 20, "rms": 0.05, "snr_db": 20.0}
+                timed("ping", lambda: c.post("/biometrics/voice/ping", json=body, headers=h))
+
+        def registrar(t):
+            for n in range(t, args.users, max(1, args.threads - ping_threads)):
+                body = {"username": f"u{n}", "email": f"u{n}@bench", "password": "pw"}
+                timed("register", lambda: c.post("/auth/register", json=body))
+
+        workers = [threading.Thread(target=pinger, args=s) for s in sessions]
+        workers += [threading.Thread(target=registrar, args=(t,)) for t in range(max(1, args.threads - ping_threads))]
+        t0 = time.perf_counter()
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        wall = time.perf_counter() - t0
+
+    return {
+        kind: {
+            "n": len(xs), "errors": errors[kind],
+            "p50_ms": pct(xs, 50) * 1000, "p99_ms": pct(xs, 99) * 1000,
+            "per_s": len(xs) / wall,
+        }
+        for kind, xs in lat.items()
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--threads", type=int, default=32)
+    ap.add_argument("--users", type=int, default=64)
+    ap.add_argument("--pings", type=int, default=200, help="pings per ping thread")
+    ap.add_argument("--profile", choices=sorted(PROFILES), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.profile:
+        print(json.dumps(run_profile(args)))
+        return
+
+    for name, env in PROFILES.items():
+        d = tempfile.mkdtemp()
+        child_env = dict(os.environ, RATE_LIMIT_ENABLED="0", DATABASE_URL=f"sqlite:///{d}/bench.db", PING_FLUSH_SIZE="1", **env)
+        out = subprocess.run(
+            [sys.executable, "-m", "bench.bench_db_concurrency", "--profile", name,
+             "--threads", str(args.threads), "--users", str(args.users), "--pings", str(args.pings)],
+            env=child_env, capture_output=True, text=True, check=True,
+        ).stdout.strip().splitlines()[-1]
+        for kind, r in json.loads(out).items():
+            print(f"{name:>6} {kind:>8}: {r['n']:6d} req  {r['errors']:4d} errors  p50 {r['p50_ms']:7.1f} ms  "
+                  f"p99 {r['p99_ms']:8.1f} ms  {r['per_s']:8.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# backend/bench/bench_face_index.py
+"""
+Face signature storage size and FaceIndex verify / identify latency.
+
+    cd backend
+    python -m bench.bench_face_index --users 100000
+
+Compares against the naive approach: parse each stored JSON signature and
+score it in a Python loop (run on a 1k-user slice and scaled up).
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from app.face_index import FaceIndex, normalize, pack_signature, unpack_signature
+
+DIM = 24 * 24
+
+
+def timed(fn, repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, default=100_000)
+    ap.add_argument("--queries", type=int, default=50)
+    args = ap.parse_args()
+    rng = np.random.default_rng(11)
+
+    faces = rng.random((args.users, DIM), dtype=np.float32)
+    probe = np.clip(faces[args.users // 2] + rng.normal(0, 0.05, DIM), 0, 1)
+
+    as_json = json.dumps({"size": 24, "data": faces[0].tolist()})
+    blob = pack_signature(faces[0])
+    assert np.array_equal(unpack_signature(blob), faces[0])
+    print(f"storage per signature: json {len(as_json)} B, float32 blob {len(blob)} B "
+          f"({len(as_json) / len(blob):.1f}x smaller)")
+
+    t0 = time.perf_counter()
+    index = FaceIndex(DIM)
+    for i in range(args.users):
+        index.upsert(f"u{i}", normalize(faces[i]))
+    print(f"build: {args.users} users in {time.perf_counter() - t0:.2f} s, "
+          f"{index._mat.nbytes / 2 ** 20:.0f} MiB matrix")
+
+    unit = normalize(probe)
+    target = f"u{args.users // 2}"
+    v = timed(lambda: index.verify(target, unit), 10_000)
+    top = index.identify(unit, k=3)
+    assert top[0][0] == target, top
+    ident = timed(lambda: index.identify(unit, k=3), args.queries)
+    print(f"verify (1:1):   {v * 1e6:8.2f} us")
+    print(f"identify (1:N): {ident * 1e3:8.2f} ms over {args.users} users  (best {top[0][1]:.3f})")
+
+    # naive: JSON decode + pure-Python cosine per stored row
+    sample = [json.dumps({"size": 24, "data": f.tolist()}) for f in faces[:1000]]
+    q = unit.tolist()
+
+    def naive():
+        best = -2.0
+        for js in sample:
+            d = json.loads(js)["data"]
+            m = sum(d) / len(d)
+            c = [x - m for x in d]
+            n = sum(x * x for x in c) ** 0.5
+            best = max(best, sum(a * b for a, b in zip(c, q)) / n)
+        return best
+
+    naive_s = timed(naive, 1) * args.users / len(sample)
+    print(f"naive identify: {naive_s * 1e3:8.0f} ms (extrapolated)  -> {naive_s / ident:.0f}x slower")
+
+
+if __name__ == "__main__":
+    main()
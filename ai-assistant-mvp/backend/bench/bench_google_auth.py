@@ -0,0 +1,188 @@
+# backend/bench/bench_google_auth.py
+"""
+Google ID-token verification: cached signing keys vs. google-auth's per-call fetch.
+
+    cd backend
+    python -m bench.bench_google_auth --tokens 500
+
+Offline: a freshly generated RSA key pair signs the tokens and a local stub
+serves its public key as Google would (v1 PEM map and v3 JWKS, with
+Cache-Control max-age). Reports per-token latency and how many certificate
+fetches each approach made, then checks the verifier's behavior:
+wrong audience / issuer, expired and tampered tokens are rejected, a rotated
+key (unknown `kid`) is picked up, the background task refreshes before
+max-age runs out, and an unreachable endpoint gives GoogleCertsUnavailable.
+Exits non-zero if a check fails.
+"""
+import os
+
+# Short cache lifetimes so the refresh checks finish in seconds (read at import)
+os.environ.setdefault("GOOGLE_CERTS_RETRY_S", "0.2")
+os.environ.setdefault("GOOGLE_CERTS_REFRESH_AT", "0.5")
+
+import argparse
+import asyncio
+import base64
+import sys
+import time
+
+import rsa
+from google.auth import crypt, jwt as google_jwt
+
+from app.google_auth import GoogleCerts, GoogleCertsUnavailable, InvalidGoogleToken, verify_google_id_token
+from bench.stubs import StubServer
+
+AUDIENCE = "bench-client.apps.googleusercontent.com"
+
+
+def make_key(kid: str):
+    pub, priv = rsa.newkeys(2048)
+    return kid, pub, crypt.RSASigner.from_string(priv.save_pkcs1(), key_id=kid)
+
+
+def b64int(n: int) -> str:
+    return base64.urlsafe_b64encode(n.to_bytes((n.bit_length() + 7) // 8, "big")).rstrip(b"=").decode()
+
+
+def cert_routes(keys: list, max_age: int) -> dict:
+    """`keys` is read on every request, so the caller can rotate it in place."""
+    headers = {"Cache-Control": f"public, max-age={max_age}, must-revalidate, no-transform"}
+
+    def v1(method, path, query, body):
+        return 200, {kid: pub.save_pkcs1().decode() for kid, pub, _ in keys}, headers
+
+    def v3(method, path, query, body):
+        return 200, {"keys": [
+            {"kty": "RSA", "alg": "RS256", "use": "sig", "kid": kid, "n": b64int(pub.n), "e": b64int(pub.e)}
+            for kid, pub, _ in keys
+        ]}, headers
+
+    return {"/oauth2/v1/certs": (0.0, v1), "/oauth2/v3/certs": (0.0, v3)}
+
+
+def token(signer, **overrides) -> str:
+    now = int(time.time())
+    claims = {
+        "iss": "https://accounts.google.com", "aud": AUDIENCE, "sub": "1234567890",
+        "email": "someone@bench", "email_verified": True, "name": "Bench User",
+        "iat": now, "exp": now + 3600,
+    }
+    claims.update(overrides)
+    return google_jwt.encode(signer, claims).decode()
+
+
+async def rejected(tok: str, certs: GoogleCerts) -> bool:
+    try:
+        await verify_google_id_token(tok, AUDIENCE, certs)
+    except InvalidGoogleToken:
+        return True
+    return False
+
+
+async def checks(stub: StubServer, keys: list, max_age: int) -> list:
+    failures = []
+    signer = keys[0][2]
+    for fmt in ("v1", "v3"):
+        certs = GoogleCerts(f"{stub.url}/oauth2/{fmt}/certs")
+        claims = await verify_google_id_token(token(signer), AUDIENCE, certs)
+        if claims.get("email") != "someone@bench":
+            failures.append(f"{fmt}: valid token not accepted")
+        for what, tok in (
+            ("wrong audience", token(signer, aud="someone-else")),
+            ("wrong issuer", token(signer, iss="https://evil.example")),
+            ("expired", token(signer, iat=int(time.time()) - 7200, exp=int(time.time()) - 3600)),
+            ("tampered", token(signer)[:-8] + "AAAAAAAA"),
+            ("garbage", "not.a.token"),
+        ):
+            if not await rejected(tok, certs):
+                failures.append(f"{fmt}: {what} token accepted")
+        await certs.stop()
+
+    # Rotation: a new key shows up before the cached set expires
+    certs = GoogleCerts(f"{stub.url}/oauth2/v1/certs")
+    await verify_google_id_token(token(signer), AUDIENCE, certs)
+    keys.append(make_key("rotated"))
+    await asyncio.sleep(0.25)  # past GOOGLE_CERTS_RETRY_S
+    try:
+        await verify_google_id_token(token(keys[-1][2]), AUDIENCE, certs)
+    except InvalidGoogleToken:
+        failures.append("rotated key not picked up")
+
+    # Background refresh: keys are refetched before max-age runs out
+    before = certs.fetches
+    certs.start()
+    await asyncio.sleep(max_age * 1.2)
+    if certs.fetches <= before or certs.stats()["ttl_left_s"] <= 0:
+        failures.append(f"no background refresh within max-age ({certs.stats()})")
+    await certs.stop()
+
+    # Unreachable endpoint, nothing cached
+    down = GoogleCerts("http://127.0.0.1:9/oauth2/v1/certs")
+    try:
+        await verify_google_id_token(token(signer), AUDIENCE, down)
+        failures.append("verified without keys")
+    except GoogleCertsUnavailable:
+        pass
+    await down.stop()
+    return failures
+
+
+async def bench_cached(url: str, tokens: list) -> float:
+    certs = GoogleCerts(url)
+    await verify_google_id_token(tokens[0], AUDIENCE, certs)  # first fetch
+    t0 = time.perf_counter()
+    for tok in tokens:
+        await verify_google_id_token(tok, AUDIENCE, certs)
+    dt = (time.perf_counter() - t0) / len(tokens)
+    await certs.stop()
+    return dt
+
+
+def bench_google_auth(url: str, tokens: list) -> float:
+    """
+    What /auth/google did before: verify_oauth2_token with a new Request() per
+    sign-in. Needs `requests`, which the app itself no longer depends on.
+    """
+    from google.oauth2 import id_token as google_id_token
+    from google.auth.transport import requests as google_requests
+
+    t0 = time.perf_counter()
+    for tok in tokens:
+        google_id_token.verify_token(tok, google_requests.Request(), AUDIENCE, certs_url=url)
+    return (time.perf_counter() - t0) / len(tokens)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tokens", type=int, default=500)
+    ap.add_argument("--max-age", type=int, default=2, help="Cache-Control max-age the stub sends (s)")
+    args = ap.parse_args()
+
+    keys = [make_key("k1")]
+    signer = keys[0][2]
+    tokens = [token(signer, sub=str(i)) for i in range(args.tokens)]
+    with StubServer(cert_routes(keys, args.max_age), process=False) as stub:
+        failures = asyncio.run(checks(stub, keys, args.max_age))
+
+        url = f"{stub.url}/oauth2/v1/certs"
+        hits = stub.hits.get("/oauth2/v1/certs", 0)
+        cached = asyncio.run(bench_cached(url, tokens))
+        cached_hits = stub.hits.get("/oauth2/v1/certs", 0) - hits
+        hits += cached_hits
+        print(f"cached keys:      {cached * 1e3:7.3f} ms/token   {cached_hits} cert fetches for {args.tokens} tokens")
+        try:
+            legacy = bench_google_auth(url, tokens)
+        except ImportError as e:
+            print(f"per-call fetch:   skipped ({e})")
+        else:
+            legacy_hits = stub.hits.get("/oauth2/v1/certs", 0) - hits
+            print(f"per-call fetch:   {legacy * 1e3:7.3f} ms/token   {legacy_hits} cert fetches for {args.tokens} tokens")
+    for msg in failures:
+        print(f"FAILED: {msg}")
+    if not failures:
+        print("checks: ok")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,426 @@
+# backend/bench/bench_load.py
+"""
+Whole-backend load test on a temp SQLite DB, fully offline.
+
+    cd backend
+    python -m bench.bench_load --duration 30 --out run.json           # in-process (ASGI transport)
+    python -m bench.bench_load --server uvicorn --out run.json        # real HTTP to a uvicorn child
+    python -m bench.bench_load --baseline base.json --out run.json    # run, then diff; exit 1 on regression
+    python -m bench.bench_load --diff base.json run.json              # diff two stored reports
+
+Upstreams are the stubs from bench/stubs.py: Wikipedia + OpenAI (every 3rd
+call fails), Telegram, Twilio and SMTP. Rate limiting is off unless
+--rate-limit, since every simulated user shares 127.0.0.1.
+
+Scenarios run together (narrow with --scenarios voice,qa):
+  voice    --sessions enrolled users, each streaming POST /biometrics/voice/ping
+           at --ping-hz (open loop: a slow response does not delay the next ping)
+  signin   --signin-clients clients signing in back to back (Retry-After honored)
+  qa       every --qa-every s, --qa-burst concurrent POST /qa/ask, half of them
+           repeats of a small hot set (cache hits), half new questions
+  fanout   --fanout-per-s POST /agent/message per second across email, telegram
+           and whatsapp; fanout_delivery is created_at -> sent_at from the outbox
+
+The first --warmup seconds are not measured. The report (JSON on stdout and
+in --out) has, per scenario: requests, errors, error_rate, throughput_rps,
+p50/p95/p99/max in ms and a status-code breakdown.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+
+import httpx
+
+from bench.stubs import SMTPStub, StubServer, connector_routes, qa_routes
+
+HOT_QUESTIONS = [
+    "what is python", "who wrote hamlet", "what is the speed of light", "how tall is mount everest",
+    "what is photosynthesis", "who painted the mona lisa", "what is a black hole", "what is dna",
+]
+CHANNELS = [("email", "someone@bench"), ("telegram", "424242"), ("whatsapp", "+15550001111")]
+
+# -------------------- Stats --------------------
+
+def pct(xs, p):
+    return xs[min(len(xs) - 1, int(round(p / 100.0 * (len(xs) - 1))))] if xs else 0.0
+
+
+def summarize(lat, codes: Counter, window_s: float) -> dict:
+    xs = sorted(lat)
+    n = sum(codes.values())
+    errors = sum(v for k, v in codes.items() if not (isinstance(k, int) and 200 <= k < 300))
+    return {
+        "requests": n,
+        "errors": errors,
+        "error_rate": round(errors / n, 4) if n else 0.0,
+        "throughput_rps": round(len(xs) / window_s, 2) if window_s > 0 else 0.0,
+        "p50_ms": round(pct(xs, 50) * 1000, 2),
+        "p95_ms": round(pct(xs, 95) * 1000, 2),
+        "p99_ms": round(pct(xs, 99) * 1000, 2),
+        "max_ms": round(xs[-1] * 1000, 2) if xs else 0.0,
+        "status": {str(k): v for k, v in sorted(codes.items(), key=lambda kv: str(kv[0]))},
+    }
+
+
+class Recorder:
+    """Latency and status per scenario; calls started before `measure_from` are not counted."""
+
+    def __init__(self, measure_from: float):
+        self.measure_from = measure_from
+        self.lat = defaultdict(list)
+        self.codes = defaultdict(Counter)
+
+    async def call(self, name: str, request):
+        t0 = time.perf_counter()
+        try:
+            r = await request
+            code = r.status_code
+        except Exception as e:
+            r, code = None, type(e).__name__
+        if t0 >= self.measure_from:
+            self.lat[name].append(time.perf_counter() - t0)
+            self.codes[name][code] += 1
+        return r
+
+
+async def sleep_or_stop(stop: asyncio.Event, seconds: float):
+    try:
+        await asyncio.wait_for(stop.wait(), seconds)
+    except asyncio.TimeoutError:
+        pass
+
+# -------------------- Scenarios --------------------
+
+async def make_user(c: httpx.AsyncClient, i: int) -> dict:
+    email = f"load{i}@bench"
+    await c.post("/auth/register", json={"username": f"load{i}", "email": email, "password": "pw"})
+    tok = (await c.post("/auth/signin", json={"email": email, "password": "pw"})).json()["access_token"]
+    h = {"Authorization": f"Bearer {tok}"}
+    await c.post("/biometrics/voice/enroll", json={"avg_pitch_hz": 175.0, "avg_rms": 0.05}, headers=h)
+    sid = (await c.post("/biometrics/voice/session/start", json={}, headers=h)).json()["session_id"]
+    return {"email": email, "headers": h, "sid": sid}
+
+
+async def voice(c, rec: Recorder, user: dict, stop: asyncio.Event, hz: float, rng: random.Random):
+    loop = asyncio.get_running_loop()
+    period = 1.0 / hz
+    await sleep_or_stop(stop, rng.random() * period)  # spread sessions over the period
+    pending = set()
+    due = loop.time()
+    while not stop.is_set():
+        body = {
+            "session_id": user["sid"], "pitch_hz": rng.gauss(175.0, 8.0),
+            "rms": max(0.005, rng.gauss(0.05, 0.008)), "snr_db": rng.uniform(12.0, 28.0),
+        }
+        t = asyncio.ensure_future(rec.call("voice_ping", c.post("/biometrics/voice/ping", json=body, headers=user["headers"])))
+        pending.add(t)
+        t.add_done_callback(pending.discard)
+        due += period
+        await sleep_or_stop(stop, max(0.0, due - loop.time()))
+    if pending:
+        await asyncio.gather(*pending)
+
+
+async def signin(c, rec: Recorder, user: dict, stop: asyncio.Event):
+    body = {"email": user["email"], "password": "pw"}
+    while not stop.is_set():
+        r = await rec.call("signin", c.post("/auth/signin", json=body))
+        if r is not None and r.status_code == 503:
+            await sleep_or_stop(stop, float(r.headers.get("Retry-After", "1")))
+
+
+async def qa(c, rec: Recorder, stop: asyncio.Event, every: float, burst: int, rng: random.Random):
+    n = 0
+    while not stop.is_set():
+        questions = []
+        for _ in range(burst):
+            n += 1
+            questions.append(rng.choice(HOT_QUESTIONS) if n % 2 else f"what is topic number {n} {rng.random():.6f}")
+        await asyncio.gather(*(rec.call("qa", c.post("/qa/ask", json={"question": q})) for q in questions))
+        await sleep_or_stop(stop, every)
+
+
+async def fanout(c, rec: Recorder, users: list, stop: asyncio.Event, per_s: float):
+    loop = asyncio.get_running_loop()
+    pending = set()
+    due = loop.time()
+    k = 0
+    while not stop.is_set():
+        user = users[k % len(users)]
+        channel, to = CHANNELS[k % len(CHANNELS)]
+        body = {"channel": channel, "to": to, "text": f"load message {k}"}
+        t = asyncio.ensure_future(rec.call("fanout_enqueue", c.post("/agent/message", json=body, headers=user["headers"])))
+        pending.add(t)
+        t.add_done_callback(pending.discard)
+        k += 1
+        due += 1.0 / per_s
+        await sleep_or_stop(stop, max(0.0, due - loop.time()))
+    if pending:
+        await asyncio.gather(*pending)
+
+
+def outbox_delivery(db_path: str, since: datetime, drain_s: float) -> dict:
+    """Wait for the outbox to drain, then created_at -> sent_at for messages created in the window."""
+    deadline = time.monotonic() + drain_s
+    con = sqlite3.connect(db_path, timeout=30)
+    try:
+        while time.monotonic() < deadline:
+            left = con.execute("SELECT count(*) FROM outboxmessage WHERE status IN ('pending', 'sending')").fetchone()[0]
+            if not left:
+                break
+            time.sleep(0.2)
+        rows = con.execute(
+            "SELECT status, (julianday(sent_at) - julianday(created_at)) * 86400.0 FROM outboxmessage WHERE created_at >= ?",
+            (since.strftime("%Y-%m-%d %H:%M:%S.%f"),),
+        ).fetchall()
+    finally:
+        con.close()
+    codes = Counter(status for status, _ in rows)
+    lat = [dt for status, dt in rows if status == "sent" and dt is not None]
+    out = summarize(lat, Counter({200: codes.pop("sent", 0), **codes}), 0.0)
+    out.pop("throughput_rps")
+    return out
+
+
+async def drive(args, client: httpx.AsyncClient, db_path: str) -> dict:
+    rng = random.Random(args.seed)
+    scenarios = set(args.scenarios.split(","))
+    n_users = max(args.sessions if "voice" in scenarios else 0, args.signin_clients, 1)
+    sem = asyncio.Semaphore(8)
+
+    async def setup(i):
+        async with sem:
+            return await make_user(client, i)
+
+    t0 = time.perf_counter()
+    users = await asyncio.gather(*(setup(i) for i in range(n_users)))
+    print(f"setup: {n_users} users in {time.perf_counter() - t0:.1f} s", file=sys.stderr)
+
+    stop = asyncio.Event()
+    start = time.perf_counter()
+    rec = Recorder(start + args.warmup)
+    window_start = None
+    tasks = []
+    if "voice" in scenarios:
+        tasks += [voice(client, rec, users[i], stop, args.ping_hz, random.Random(rng.random())) for i in range(args.sessions)]
+    if "signin" in scenarios:
+        tasks += [signin(client, rec, users[i], stop) for i in range(args.signin_clients)]
+    if "qa" in scenarios:
+        tasks.append(qa(client, rec, stop, args.qa_every, args.qa_burst, random.Random(rng.random())))
+    if "fanout" in scenarios:
+        tasks.append(fanout(client, rec, users, stop, args.fanout_per_s))
+
+    async def timer():
+        nonlocal window_start
+        await asyncio.sleep(args.warmup)
+        window_start = datetime.utcnow()
+        await asyncio.sleep(args.duration)
+        stop.set()
+
+    await asyncio.gather(timer(), *tasks)
+    window = time.perf_counter() - rec.measure_from
+    report = {name: summarize(rec.lat[name], rec.codes[name], window) for name in sorted(rec.lat)}
+    if "fanout" in scenarios:
+        report["fanout_delivery"] = await asyncio.get_running_loop().run_in_executor(
+            None, outbox_delivery, db_path, window_start, args.drain)
+    return report
+
+# -------------------- Server --------------------
+
+def server_env(db_path: str, http_url: str, smtp: SMTPStub, args) -> dict:
+    return {
+        "DATABASE_URL": f"sqlite:///{db_path}",
+        "BCRYPT_ROUNDS": str(args.bcrypt_rounds),
+        "WIKI_API_URL": f"{http_url}/w/api.php",
+        "WIKI_SUMMARY_URL": f"{http_url}/api/rest_v1/page/summary",
+        "OPENAI_API_KEY": "stub",
+        "OPENAI_BASE_URL": f"{http_url}/v1",
+        "TELEGRAM_BOT_TOKEN": "stub",
+        "TELEGRAM_API_BASE": http_url,
+        "TWILIO_ACCOUNT_SID": "ACstub",
+        "TWILIO_AUTH_TOKEN": "stub",
+        "TWILIO_WHATSAPP_FROM": "whatsapp:+15550000000",
+        "TWILIO_API_BASE": http_url,
+        "SMTP_HOST": smtp.host,
+        "SMTP_PORT": str(smtp.port),
+        "SMTP_STARTTLS": "0",
+        "SMTP_USER": "stub",
+        "SMTP_PASS": "stub",
+        "RATE_LIMIT_ENABLED": "1" if args.rate_limit else "0",
+    }
+
+
+def load_app():
+    import app.main as M
+
+    return M.app
+
+
+def serve(args):
+    """Child process for --server uvicorn (env comes from the parent)."""
+    import uvicorn
+
+    uvicorn.run(load_app(), host="127.0.0.1", port=args.port, log_level="warning")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(url: str, proc: subprocess.Popen, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with {proc.returncode}")
+        try:
+            httpx.get(f"{url}/plans/protected", params={"passkey": ""}, timeout=1.0)
+            return
+        except httpx.TransportError:
+            time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+def run(args) -> dict:
+    db_path = os.path.join(tempfile.mkdtemp(), "load.db")
+    limits = httpx.Limits(max_connections=1000, max_keepalive_connections=1000)
+    with StubServer({**qa_routes(), **connector_routes()}) as http_stub, SMTPStub() as smtp:
+        env = server_env(db_path, http_stub.url, smtp, args)
+        if args.server == "uvicorn":
+            port = free_port()
+            cmd = [sys.executable, "-m", "bench.bench_load", "--serve", "--port", str(port)]
+            proc = subprocess.Popen(cmd, env={**os.environ, **env})
+            try:
+                url = f"http://127.0.0.1:{port}"
+                wait_ready(url, proc)
+
+                async def remote():
+                    async with httpx.AsyncClient(base_url=url, timeout=60, limits=limits) as c:
+                        return await drive(args, c, db_path)
+
+                report = asyncio.run(remote())
+            finally:
+                proc.terminate()
+                proc.wait(timeout=30)
+        else:
+            os.environ.update(env)  # before the app (and its env-driven config) is imported
+            app = load_app()
+
+            async def local():
+                async with app.router.lifespan_context(app):
+                    transport = httpx.ASGITransport(app=app)
+                    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as c:
+                        return await drive(args, c, db_path)
+
+            report = asyncio.run(local())
+    return report
+
+# -------------------- Report / diff --------------------
+
+def meta(args) -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "commit": commit,
+        "started_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("out", "baseline", "diff", "serve", "port")},
+    }
+
+
+def diff(base: dict, cur: dict, tolerance: float) -> list:
+    """Print a comparison table; return the regressions."""
+    regressions = []
+    b_cfg, c_cfg = base.get("meta", {}).get("config", {}), cur.get("meta", {}).get("config", {})
+    changed = sorted(k for k in set(b_cfg) | set(c_cfg) if b_cfg.get(k) != c_cfg.get(k))
+    if changed:
+        # open-loop scenarios' throughput follows the offered load, so this diff says little
+        print("warning: runs used different settings: "
+              + ", ".join(f"{k} {b_cfg.get(k)} -> {c_cfg.get(k)}" for k in changed), file=sys.stderr)
+    b_all, c_all = base.get("scenarios", {}), cur.get("scenarios", {})
+    print(f"{'scenario':<16} {'metric':<15} {'baseline':>10} {'current':>10} {'change':>8}", file=sys.stderr)
+    for name in sorted(set(b_all) | set(c_all)):
+        b, c = b_all.get(name), c_all.get(name)
+        if b is None or c is None:
+            print(f"{name:<16} only in {'current' if b is None else 'baseline'}", file=sys.stderr)
+            continue
+        for k in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms", "error_rate"):
+            if k not in b or k not in c:
+                continue
+            change = (c[k] - b[k]) / b[k] if b[k] else 0.0
+            flag = ""
+            if k == "p95_ms" and c[k] > b[k] * (1 + tolerance) and c[k] - b[k] > 5.0:
+                flag = "  <-- slower"
+            elif k == "throughput_rps" and c[k] < b[k] * (1 - tolerance):
+                flag = "  <-- less throughput"
+            elif k == "error_rate" and c[k] > b[k] + 0.01:
+                flag = "  <-- more errors"
+            if flag:
+                regressions.append(f"{name} {k}: {b[k]} -> {c[k]}")
+            print(f"{name:<16} {k:<15} {b[k]:>10} {c[k]:>10} {change:>+8.0%}{flag}", file=sys.stderr)
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--server", choices=("inprocess", "uvicorn"), default="inprocess")
+    ap.add_argument("--scenarios", default="voice,signin,qa,fanout")
+    ap.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    ap.add_argument("--warmup", type=float, default=5.0)
+    ap.add_argument("--sessions", type=int, default=100, help="concurrent voice sessions")
+    ap.add_argument("--ping-hz", type=float, default=1.25)
+    ap.add_argument("--signin-clients", type=int, default=8)
+    ap.add_argument("--bcrypt-rounds", type=int, default=10)
+    ap.add_argument("--qa-burst", type=int, default=20)
+    ap.add_argument("--qa-every", type=float, default=2.0)
+    ap.add_argument("--fanout-per-s", type=float, default=20.0)
+    ap.add_argument("--drain", type=float, default=30.0, help="max seconds to wait for the outbox after the run")
+    ap.add_argument("--rate-limit", action="store_true", help="keep the rate limiter on")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--out", help="write the JSON report here")
+    ap.add_argument("--baseline", help="report to diff against after the run")
+    ap.add_argument("--tolerance", type=float, default=0.15)
+    ap.add_argument("--diff", nargs=2, metavar=("BASE", "CURRENT"), help="diff two stored reports and exit")
+    ap.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    ap.add_argument("--port", type=int, default=0, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+    if args.diff:
+        with open(args.diff[0]) as f, open(args.diff[1]) as g:
+            regressions = diff(json.load(f), json.load(g), args.tolerance)
+    else:
+        report = {"meta": meta(args), "scenarios": run(args)}
+        text = json.dumps(report, indent=2)
+        print(text)
+        if args.out:
+            with open(args.out, "w") as f:
+                f.write(text + "\n")
+        regressions = []
+        if args.baseline:
+            with open(args.baseline) as f:
+                regressions = diff(json.load(f), report, args.tolerance)
+    for r in regressions:
+        print(f"REGRESSION: {r}", file=sys.stderr)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# backend/bench/bench_metrics.py
+"""
+Per-request cost of the metrics layer.
+
+    cd backend
+    python -m bench.bench_metrics
+
+  primitives   Counter.inc / Histogram.observe on an existing series
+  middleware   MetricsMiddleware around a trivial ASGI app vs. the bare app
+  sql hook     the before/after_cursor_execute listeners, per statement
+               (SELECT 1 on in-memory SQLite, with vs. without the hooks)
+  scrape       render() with the series created above
+"""
+import asyncio
+import time
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+
+from app import metrics as M
+
+
+def per_call(fn, n: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n
+
+
+def bench_middleware(n: int):
+    class Route:
+        path = "/bench/{id}"
+
+    async def app(scope, receive, send):
+        scope["route"] = Route
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    async def run(handler):
+        scope = {"type": "http", "method": "GET"}
+        t0 = time.perf_counter()
+        for _ in range(n):
+            await handler(dict(scope), receive, send)
+        return (time.perf_counter() - t0) / n
+
+    bare = asyncio.run(run(app))
+    wrapped = asyncio.run(run(M.MetricsMiddleware(app)))
+    return bare, wrapped
+
+
+def bench_sql(n: int, rounds: int = 5):
+    """Alternates hooked and bare rounds and keeps the best of each (this is noisy)."""
+    eng = create_engine("sqlite://")
+    bare, hooked = [], []
+    with eng.connect() as con:
+        stmt = text("SELECT 1")
+        con.execute(stmt)
+        for _ in range(rounds):
+            bare.append(per_call(lambda: con.execute(stmt), n))
+            M.install_db_hooks()
+            hooked.append(per_call(lambda: con.execute(stmt), n))
+            event.remove(Engine, "before_cursor_execute", M._before_cursor_execute)
+            event.remove(Engine, "after_cursor_execute", M._after_cursor_execute)
+    return min(bare), min(hooked)
+
+
+def main():
+    c = M.Counter("bench_total", "", ("route",))
+    h = M.Histogram("bench_seconds", "", ("route",))
+    key = ("/bench/{id}",)
+    inc = per_call(lambda: c.inc(key), 200_000)
+    obs = per_call(lambda: h.observe(key, 0.0123), 200_000)
+    print(f"counter inc:         {inc * 1e6:6.2f} us")
+    print(f"histogram observe:   {obs * 1e6:6.2f} us")
+
+    bare, wrapped = bench_middleware(50_000)
+    print(f"middleware:          {(wrapped - bare) * 1e6:6.2f} us/request  ({bare * 1e6:.2f} -> {wrapped * 1e6:.2f} us)")
+
+    bare, hooked = bench_sql(20_000)
+    print(f"sql hooks:           {(hooked - bare) * 1e6:6.2f} us/statement  ({bare * 1e6:.2f} -> {hooked * 1e6:.2f} us)")
+
+    t = per_call(M.render, 200)
+    print(f"render /metrics:     {t * 1e3:6.2f} ms  ({len(M.render().splitlines())} lines)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# backend/bench/bench_profile_match.py
+"""
+Micro-benchmark: scalar _choose_best_profile vs the vectorized scorer.
+
+    cd backend
+    python -m bench.bench_profile_match
+"""
+import random
+import time
+
+import numpy as np
+
+from app.biometrics import (
+    BiometricVoiceProfile, CachedProfile, ProfileSet,
+    _choose_best_profile, _choose_best_cached, _score_profiles, _norm_pitch, _norm_rms,
+)
+
+PROFILE_COUNTS = [1, 4, 8, 16, 64, 256]
+PINGS = 2000
+
+
+def make_profiles(n: int):
+    rows = [
+        BiometricVoiceProfile(user_uid="bench", avg_pitch_hz=random.uniform(80, 300),
+                              avg_rms=random.uniform(0.005, 0.2), condition_tag=f"tag{i}")
+        for i in range(n)
+    ]
+    pset = ProfileSet(tuple(
+        CachedProfile(r.condition_tag, r.avg_pitch_hz, r.avg_rms, _norm_pitch(r.avg_pitch_hz), _norm_rms(r.avg_rms))
+        for r in rows
+    ))
+    return rows, pset
+
+
+def timed(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def main():
+    random.seed(7)
+    pitches = [random.uniform(0, 520) for _ in range(PINGS)]
+    rmss = [random.uniform(0, 0.3) for _ in range(PINGS)]
+    p_arr, r_arr = np.array(pitches), np.array(rmss)
+
+    print(f"{'profiles':>8} {'scalar us/ping':>15} {'cached us/ping':>15} {'batch us/ping':>14} {'speedup':>8}")
+    for n in PROFILE_COUNTS:
+        rows, pset = make_profiles(n)
+
+        # exactness check first
+        scalar = [_choose_best_profile(p, r, rows) for p, r in zip(pitches, rmss)]
+        idx, sims = _score_profiles(p_arr, r_arr, pset)
+        for (best, sim), i, vs in zip(scalar, idx.tolist(), sims.tolist()):
+            assert best.condition_tag == pset.profiles[i].condition_tag and sim == vs, (n, sim, vs)
+        for (best, sim), p, r in zip(scalar, pitches, rmss):
+            cb, cs = _choose_best_cached(p, r, pset)
+            assert cb.condition_tag == best.condition_tag and cs == sim
+
+        t_scalar = timed(lambda: [_choose_best_profile(p, r, rows) for p, r in zip(pitches, rmss)])
+        t_cached = timed(lambda: [_choose_best_cached(p, r, pset) for p, r in zip(pitches, rmss)])
+        t_batch = timed(lambda: _score_profiles(p_arr, r_arr, pset))
+        us = 1e6 / PINGS
+        print(f"{n:>8} {t_scalar * us:>15.2f} {t_cached * us:>15.2f} {t_batch * us:>14.3f} {t_scalar / t_batch:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
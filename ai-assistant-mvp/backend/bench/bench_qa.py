@@ -0,0 +1,106 @@
+# backend/bench/bench_qa.py
+"""
+QA provider latency against local stub servers (no network needed).
+
+    cd backend
+    python -m bench.bench_qa --requests 200 --concurrency 10
+
+Modes:
+  legacy  blocking calls, new connection per request, OpenAI then Wikipedia
+          in series on a thread pool (what the sync route used to do)
+  serial  async pooled clients, OpenAI then Wikipedia (QA_RACE=0)
+  race    async pooled clients, both in parallel, first good answer wins
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from bench.stubs import StubServer, qa_routes
+
+
+def pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(round(p / 100.0 * (len(xs) - 1))))]
+
+
+def report(name, lat, wall):
+    print(f"{name:>7}: p50 {pct(lat, 50) * 1000:7.1f} ms  p99 {pct(lat, 99) * 1000:7.1f} ms  "
+          f"mean {statistics.mean(lat) * 1000:7.1f} ms  {len(lat) / wall:8.1f} req/s")
+
+
+def legacy_answer(base: str, q: str) -> str:
+    try:
+        r = httpx.post(f"{base}/v1/chat/completions", json={"messages": [{"role": "user", "content": q}]},
+                       headers={"Authorization": "Bearer stub"}, timeout=8)
+        r.raise_for_status()
+        return r.json()["choices"][0]["message"]["content"]
+    except Exception:
+        pass
+    try:
+        r = httpx.get(f"{base}/w/api.php", params={"srsearch": q}, timeout=6)
+        title = r.json()["query"]["search"][0]["title"]
+        return httpx.get(f"{base}/api/rest_v1/page/summary/{title}", timeout=6).json().get("extract") or ""
+    except Exception:
+        return ""
+
+
+def run_legacy(base, questions, concurrency):
+    lat = []
+
+    def one(q):
+        t0 = time.perf_counter()
+        legacy_answer(base, q)
+        lat.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, questions))
+    return lat, time.perf_counter() - t0
+
+
+async def run_async(questions, concurrency, race):
+    from app.qa_providers import first_answer, close_providers
+
+    sem = asyncio.Semaphore(concurrency)
+    lat = []
+
+    async def one(q):
+        async with sem:
+            t0 = time.perf_counter()
+            assert await first_answer(q, race=race)
+            lat.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(q) for q in questions))
+    wall = time.perf_counter() - t0
+    await close_providers()
+    return lat, wall
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=200)
+    ap.add_argument("--concurrency", type=int, default=10)
+    args = ap.parse_args()
+    questions = [f"question {i}" for i in range(args.requests)]
+
+    with StubServer(qa_routes()) as stub:
+        # provider endpoints are read at import time
+        os.environ.update({
+            "OPENAI_API_KEY": "stub",
+            "OPENAI_BASE_URL": f"{stub.url}/v1",
+            "WIKI_API_URL": f"{stub.url}/w/api.php",
+            "WIKI_SUMMARY_URL": f"{stub.url}/api/rest_v1/page/summary",
+        })
+        report("legacy", *run_legacy(stub.url, questions, args.concurrency))
+        report("serial", *asyncio.run(run_async(questions, args.concurrency, race=False)))
+        report("race", *asyncio.run(run_async(questions, args.concurrency, race=True)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# backend/bench/bench_rate_limit.py
+"""
+Throughput of rate limiter `take()` with many distinct client keys.
+
+    cd backend
+    python -m bench.bench_rate_limit                 # 1M IPs, memory backend
+    python -m bench.bench_rate_limit --keys 50000 --backend sqlite
+"""
+import argparse
+import os
+import resource
+import tempfile
+import threading
+import time
+
+from app.rate_limit import MemoryBackend, SQLiteBackend
+
+
+def ip(i: int) -> str:
+    return f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}"
+
+
+def run(backend, keys, threads: int) -> float:
+    chunks = [keys[t::threads] for t in range(threads)]
+
+    def worker(chunk):
+        take = backend.take
+        for k in chunk:
+            take(k)
+
+    ts = [threading.Thread(target=worker, args=(c,)) for c in chunks]
+    t0 = time.perf_counter()
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    return time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--keys", type=int, default=1_000_000)
+    ap.add_argument("--backend", choices=["memory", "sqlite"], default="memory")
+    ap.add_argument("--threads", type=int, default=1)
+    args = ap.parse_args()
+
+    if args.backend == "memory":
+        backend = MemoryBackend()
+    else:
+        backend = SQLiteBackend(os.path.join(tempfile.mkdtemp(), "rate_limit.db"))
+
+    keys = [ip(i) for i in range(args.keys)]
+    rss0 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    cold = run(backend, keys, args.threads)   # every key new
+    warm = run(backend, keys, args.threads)   # every key seen once before
+    rss1 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print(f"backend={args.backend} keys={args.keys:,} threads={args.threads}")
+    print(f"  cold: {args.keys / cold:>12,.0f} allow()/s")
+    print(f"  warm: {args.keys / warm:>12,.0f} allow()/s")
+    if isinstance(backend, MemoryBackend):
+        print(f"  buckets held: {len(backend):,}  evicted: {backend.evictions:,}")
+    print(f"  max RSS growth: {(rss1 - rss0) / 1024:,.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+# backend/bench/stubs.py
+"""
+Local stand-ins for the upstream services (Wikipedia, OpenAI, ...), so
+benchmarks run offline. Each route sleeps `delay` seconds, then answers.
+"""
+import json
+import multiprocessing
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+# route prefix -> (delay seconds, handler(method, path, query, body) -> (status, json[, headers]))
+Routes = Dict[str, Tuple[float, Callable[[str, str, dict, bytes], Tuple[int, dict]]]]
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 512  # the default backlog of 5 turns bursts into SYN retries
+
+    def handle_error(self, request, client_address):
+        pass  # clients racing providers hang up early; that is expected
+
+
+class StubServer:
+    def __init__(self, routes: Routes, host: str = "127.0.0.1", port: int = 0, process: bool = True):
+        self.routes = sorted(routes.items(), key=lambda kv: len(kv[0]), reverse=True)
+        self.hits: Dict[str, int] = {}
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real services
+            disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+            def _serve(self):
+                parts = urlsplit(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                for prefix, (delay, fn) in stub.routes:
+                    if parts.path.startswith(prefix):
+                        stub.hits[prefix] = stub.hits.get(prefix, 0) + 1
+                        if delay:
+                            time.sleep(delay)
+                        status, payload, *extra = fn(self.command, parts.path, parse_qs(parts.query), body)
+                        break
+                else:
+                    status, payload, extra = 404, {"error": "no stub route"}, []
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for k, v in (extra[0] if extra else {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = _serve
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = _Server((host, port), Handler)
+        self.url = f"http://{host}:{self.httpd.server_address[1]}"
+        # A forked child keeps the stub off the benchmark's GIL; `hits` is only
+        # tracked in thread mode.
+        if process:
+            self._runner = multiprocessing.get_context("fork").Process(target=self.httpd.serve_forever, daemon=True)
+        else:
+            self._runner = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self) -> "StubServer":
+        self._runner.start()
+        return self
+
+    def __exit__(self, *exc):
+        if isinstance(self._runner, threading.Thread):
+            self.httpd.shutdown()
+        else:
+            self._runner.terminate()
+            self._runner.join()
+        self.httpd.server_close()
+
+
+def qa_routes(wiki_delay: float = 0.04, openai_delay: float = 0.12, openai_fail_every: int = 3) -> Routes:
+    """Wikipedia search + summary and OpenAI chat completions; OpenAI fails every Nth call."""
+    calls = {"openai": 0}
+
+    def search(method, path, query, body):
+        q = (query.get("srsearch") or [""])[0]
+        return 200, {"query": {"search": [{"title": q.title().replace(" ", "_") or "Empty"}]}}
+
+    def summary(method, path, query, body):
+        return 200, {"extract": f"Summary of {path.rsplit('/', 1)[-1]}."}
+
+    def chat(method, path, query, body):
+        calls["openai"] += 1
+        if openai_fail_every and calls["openai"] % openai_fail_every == 0:
+            return 500, {"error": "stub failure"}
+        q = json.loads(body)["messages"][-1]["content"]
+        return 200, {"choices": [{"message": {"role": "assistant", "content": f"LLM answer to {q}"}}]}
+
+    return {
+        "/w/api.php": (wiki_delay, search),
+        "/api/rest_v1/page/summary": (wiki_delay, summary),
+        "/v1/chat/completions": (openai_delay, chat),
+    }
+
+
+class SMTPStub:
+    """
+    Minimal plaintext SMTP server (EHLO, AUTH PLAIN, MAIL/RCPT/DATA, RSET,
+    NOOP, QUIT) in a forked process. Use with SMTP_STARTTLS=0.
+    `connect_delay` emulates the handshake cost of a real server.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, connect_delay: float = 0.0):
+        import socket
+        self.sock = socket.socket()
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((host, port))
+        self.sock.listen(512)
+        self.host, self.port = host, self.sock.getsockname()[1]
+        self.connect_delay = connect_delay
+        self._proc = multiprocessing.get_context("fork").Process(target=self._serve, daemon=True)
+
+    def _serve(self):
+        import asyncio
+
+        async def session(reader, writer):
+            if self.connect_delay:
+                await asyncio.sleep(self.connect_delay)
+            writer.write(b"220 stub ESMTP\r\n")
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                cmd = line[:4].upper()
+                if cmd in (b"EHLO", b"HELO"):
+                    writer.write(b"250-stub\r\n250-AUTH PLAIN\r\n250 8BITMIME\r\n")
+                elif cmd == b"AUTH":
+                    writer.write(b"235 ok\r\n")
+                elif cmd == b"DATA":
+                    writer.write(b"354 go\r\n")
+                    await writer.drain()
+                    while (await reader.readline()) not in (b".\r\n", b""):
+                        pass
+                    writer.write(b"250 queued\r\n")
+                elif cmd == b"QUIT":
+                    writer.write(b"221 bye\r\n")
+                    await writer.drain()
+                    break
+                else:  # MAIL, RCPT, RSET, NOOP
+                    writer.write(b"250 ok\r\n")
+                await writer.drain()
+            writer.close()
+
+        async def main():
+            server = await asyncio.start_server(session, sock=self.sock)
+            async with server:
+                await server.serve_forever()
+
+        asyncio.run(main())
+
+    def __enter__(self) -> "SMTPStub":
+        self._proc.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._proc.terminate()
+        self._proc.join()
+        self.sock.close()
+
+
+def connector_routes(delay: float = 0.0) -> Routes:
+    """Telegram sendMessage and Twilio Messages.json."""
+    def ok(method, path, query, body):
+        return 200, {"ok": True}
+
+    return {"/bot": (delay, ok), "/2010-04-01/Accounts/": (delay, ok)}
@@ -0,0 +1,25 @@
+# backend/tests/test_biometrics.py
+def test_ingest_stats_requires_a_token(client, auth):
+    assert client.get("/biometrics/voice/ingest/stats").status_code == 401
+    r = client.get("/biometrics/voice/ingest/stats", headers=auth("stats-user"))
+    assert r.status_code == 200
+    assert r.json()["name"] == "voiceping"
+
+
+def test_stop_session_keeps_the_learned_baseline(client, auth, db):
+    from sqlmodel import Session, select
+
+    from app.biometrics import BiometricVoiceProfile
+
+    h = auth("baseline-user")
+    client.post("/biometrics/voice/enroll", json={"avg_pitch_hz": 180, "avg_rms": 0.05}, headers=h)
+    sid = client.post("/biometrics/voice/session/start", json={}, headers=h).json()["session_id"]
+    for _ in range(5):
+        r = client.post("/biometrics/voice/ping", headers=h,
+                        json={"session_id": sid, "pitch_hz": 182, "rms": 0.05, "snr_db": 30})
+        assert r.json()["is_owner"]
+    client.post("/biometrics/voice/session/stop", params={"session_id": sid}, headers=h)
+
+    with Session(db) as s:
+        pr = s.exec(select(BiometricVoiceProfile).where(BiometricVoiceProfile.user_uid == "baseline-user")).one()
+    assert pr.baseline_n == 5
@@ -0,0 +1,79 @@
+# backend/tests/test_crisis.py
+from types import SimpleNamespace
+
+import pytest
+
+from app import crisis
+from app.crisis import CRISIS_MATCHER, CrisisStore, KeywordAutomaton
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Wall clock the crisis store reads; advance with clock.now += seconds."""
+    c = SimpleNamespace(now=1_000_000.0)
+    monkeypatch.setattr(crisis, "time", SimpleNamespace(time=lambda: c.now))
+    return c
+
+
+@pytest.mark.parametrize("text", [
+    "I want to KILL   myself", "thinking about suicide.", "he was murdered", "she was raped",
+    "i might end my life tonight", "harm myself\n",
+])
+def test_matcher_finds_keywords_and_inflections(text):
+    assert CRISIS_MATCHER.search(text)
+
+
+@pytest.mark.parametrize("text", ["grapes", "skill myself", "a drape", "", "unmurdered-ish? no: premurder"])
+def test_matcher_needs_a_word_boundary_at_the_start(text):
+    assert not CRISIS_MATCHER.search(text)
+
+
+def test_matcher_reports_overlapping_keywords():
+    m = KeywordAutomaton(["he", "she", "hers", "his"])
+    assert m.find_all("ushers") == []  # every hit starts inside a word
+    assert sorted(m.find_all("she hers")) == [(0, "she"), (4, "he"), (4, "hers")]
+
+
+def test_window_drops_old_buckets(clock):
+    store = CrisisStore(window_s=300, bucket_s=60)
+    for _ in range(3):
+        store.record_hit("window-user")
+    assert store.count("window-user") == 3
+    clock.now += 120
+    assert store.record_hit("window-user") == 4
+    clock.now += 240  # the first three hits' bucket has left the window
+    assert store.count("window-user") == 1
+    clock.now += 300
+    assert store.count("window-user") == 0
+
+
+def _rows(engine, uid):
+    from sqlmodel import Session, select
+
+    with Session(engine) as s:
+        return s.exec(select(crisis.CrisisCount.bucket, crisis.CrisisCount.count)
+                      .where(crisis.CrisisCount.user_uid == uid)).all()
+
+
+def test_counts_are_shared_between_workers_and_survive_restarts(db):
+    a, b = CrisisStore(), CrisisStore()  # two workers
+    a.record_hit("shared-user", sync=True)
+    a.record_hit("shared-user")
+    a.buffer.flush()  # what the write-behind thread does within CRISIS_FLUSH_INTERVAL_S
+    assert b.count("shared-user") == 0  # b has not read the DB yet
+    assert b.record_hit("shared-user", sync=True) == 3
+    assert CrisisStore().record_hit("shared-user", sync=True) == 4  # restarted worker
+
+    b.reset("shared-user")
+    assert _rows(db, "shared-user") == []
+    assert a.record_hit("shared-user", sync=True) == 1
+
+
+def test_buckets_outside_the_window_are_purged(db, clock):
+    store = CrisisStore(window_s=300, bucket_s=60)
+    store.record_hit("purge-user", sync=True)
+    store.record_hit("purge-user", sync=True)
+    old = store._bucket(clock.now)
+    clock.now += 600
+    assert store.record_hit("purge-user", sync=True) == 1
+    assert _rows(db, "purge-user") == [(old + 10, 1)]
@@ -0,0 +1,33 @@
+# backend/tests/test_face_index.py
+import numpy as np
+
+from app.face_index import FaceIndex
+
+
+def _unit(*v):
+    a = np.asarray(v, dtype=np.float32)
+    return a / np.linalg.norm(a)
+
+
+def test_remove_moves_the_last_row_into_the_gap():
+    idx = FaceIndex(3, capacity=2)
+    for uid, v in (("a", (1, 0, 0)), ("b", (0, 1, 0)), ("c", (0, 0, 1))):
+        idx.upsert(uid, _unit(*v))
+    assert idx.remove("a")
+    assert not idx.remove("a")
+    assert "a" not in idx and len(idx) == 2
+    assert idx.verify("c", _unit(0, 0, 1)) == 1.0
+    assert idx.identify(_unit(0, 0, 1), k=5)[0][0] == "c"
+    assert [u for u, _ in idx.identify(_unit(1, 0, 0), k=5)] != ["a"]
+
+
+def test_reenroll_at_another_size_drops_the_old_signature(client, auth):
+    h = auth("face-reenroll")
+    small = {"version": "v1", "signature": {"size": 2, "data": [1, 0, 0, 1]}}
+    big = {"version": "v1", "signature": {"size": 3, "data": [1, 0, 0, 0, 1, 0, 0, 0, 1]}}
+    assert client.post("/biometrics/face", json=small, headers=h).status_code == 200
+    assert client.post("/biometrics/face/verify", json=small, headers=h).json()["match"]
+
+    assert client.post("/biometrics/face", json=big, headers=h).status_code == 200
+    assert client.post("/biometrics/face/verify", json=small, headers=h).status_code == 404
+    assert client.post("/biometrics/face/verify", json=big, headers=h).json()["match"]
@@ -0,0 +1,34 @@
+# backend/tests/test_google_auth.py
+import asyncio
+
+import pytest
+
+from bench.bench_google_auth import AUDIENCE, cert_routes, checks, make_key, token
+from bench.stubs import StubServer
+from app.google_auth import GoogleCerts, verify_google_id_token
+
+
+@pytest.fixture(scope="module")
+def key():
+    return make_key("k1")  # pure-Python RSA keygen is slow; share one
+
+
+def test_verifier_checks(key):
+    # accept/reject cases, key rotation, background refresh, unreachable endpoint
+    keys = [key]
+    with StubServer(cert_routes(keys, max_age=1), process=False) as stub:
+        assert asyncio.run(checks(stub, keys, max_age=1)) == []
+
+
+def test_keys_fetched_once_for_many_tokens(key):
+    keys = [key]
+    with StubServer(cert_routes(keys, max_age=60), process=False) as stub:
+        certs = GoogleCerts(f"{stub.url}/oauth2/v1/certs")
+
+        async def verify_all():
+            for i in range(20):
+                await verify_google_id_token(token(keys[0][2], sub=str(i)), AUDIENCE, certs)
+            await certs.stop()
+
+        asyncio.run(verify_all())
+        assert stub.hits["/oauth2/v1/certs"] == 1
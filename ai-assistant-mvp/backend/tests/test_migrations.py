@@ -0,0 +1,82 @@
+# backend/tests/test_migrations.py
+import json
+import threading
+from datetime import datetime
+
+import pytest
+from sqlalchemy import inspect, text
+
+from app import migrations
+from app.biometrics import day_of
+from app.db import make_engine
+from app.face_index import unpack_signature
+from app.migrations import LATEST, MIGRATIONS, migrate
+
+
+@pytest.fixture
+def fresh_db(tmp_path, monkeypatch):
+    """An empty database that migrate() runs against instead of the test one."""
+    engine = make_engine(f"sqlite:///{tmp_path}/migrate.db")
+    monkeypatch.setattr(migrations, "get_engine", lambda: engine)
+    yield engine
+    engine.dispose()
+
+
+def _version(engine):
+    with engine.connect() as con:
+        return con.execute(text("SELECT version FROM schema_version WHERE id = 1")).scalar()
+
+
+def test_registry_is_numbered_in_order():
+    assert [m.version for m in MIGRATIONS] == list(range(1, LATEST + 1))
+
+
+def test_warm_start_applies_nothing(db):
+    assert migrate() == 0
+    assert _version(db) == LATEST
+
+
+def test_concurrent_workers_migrate_once(fresh_db):
+    applied, errors = [], []
+
+    def worker():
+        try:
+            applied.append(migrate())
+        except Exception as e:  # reported below
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert sorted(applied) == [0, 0, 0, LATEST]
+    assert _version(fresh_db) == LATEST
+
+
+def test_upgrades_a_pre_registry_database(fresh_db):
+    ts = datetime(2024, 5, 6, 7, 8, 9)
+    sig = [0.5, 0.25, 0.125, 1.0]
+    with fresh_db.begin() as con:
+        con.exec_driver_sql("CREATE TABLE voicesession (id INTEGER PRIMARY KEY, user_uid VARCHAR NOT NULL)")
+        con.exec_driver_sql(
+            "CREATE TABLE voiceping (id INTEGER PRIMARY KEY, session_id INTEGER NOT NULL, ts DATETIME, "
+            "pitch_hz FLOAT, rms FLOAT, zcr FLOAT, emotion VARCHAR, similarity FLOAT, is_owner BOOLEAN)"
+        )
+        con.exec_driver_sql(
+            "CREATE TABLE biometricface (id INTEGER PRIMARY KEY, user_uid VARCHAR NOT NULL UNIQUE, version VARCHAR, "
+            "signature_json VARCHAR, created_at DATETIME, updated_at DATETIME)"
+        )
+        con.exec_driver_sql("INSERT INTO voicesession (id, user_uid) VALUES (1, 'legacy')")
+        con.execute(text("INSERT INTO voiceping (id, session_id, ts) VALUES (1, 1, :ts)"), {"ts": ts})
+        con.execute(text("INSERT INTO biometricface (id, user_uid, version, signature_json) VALUES (1, 'legacy', 'v1', :j)"),
+                    {"j": json.dumps({"size": 2, "data": sig})})
+
+    assert migrate() == LATEST
+    assert migrate() == 0
+    with fresh_db.connect() as con:
+        assert con.execute(text("SELECT user_uid, day FROM voiceping")).one() == ("legacy", day_of(ts))
+        blob, size, raw = con.execute(text("SELECT signature_blob, signature_size, signature_json FROM biometricface")).one()
+    assert (unpack_signature(blob).tolist(), size, raw) == (sig, 2, "")
+    assert {"snr_db", "health_flag"} <= {c["name"] for c in inspect(fresh_db).get_columns("voiceping")}
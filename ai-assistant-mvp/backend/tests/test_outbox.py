@@ -0,0 +1,120 @@
+# backend/tests/test_outbox.py
+import asyncio
+import time
+
+import pytest
+from sqlmodel import Session, delete, select
+
+from app import outbox
+from app.outbox import OutboxDispatcher, OutboxMessage, enqueue
+
+
+@pytest.fixture
+def clean_outbox(db):
+    with Session(db) as s:
+        s.exec(delete(OutboxMessage))
+        s.commit()
+    return db
+
+
+def add_messages(engine, n, channel="telegram"):
+    with Session(engine) as s:
+        for i in range(n):
+            enqueue(s, "u1", channel, "42", f"m{i}")
+        s.commit()
+
+
+def rows(engine):
+    with Session(engine) as s:
+        return s.exec(select(OutboxMessage).order_by(OutboxMessage.id)).all()
+
+
+def test_stop_cancels_sends_past_the_grace_period(clean_outbox, monkeypatch):
+    cancelled = []
+
+    async def hang(to, text):
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            cancelled.append(text)
+            raise
+
+    monkeypatch.setitem(outbox.SENDERS, "telegram", hang)
+    add_messages(clean_outbox, 2)
+
+    async def run():
+        d = OutboxDispatcher()
+        d.start()
+        await asyncio.sleep(0.3)
+        t0 = time.perf_counter()
+        await d.stop(grace=0.2)
+        # checked before asyncio.run() would cancel leftovers itself
+        return sorted(cancelled), len(d._inflight) + len(d._inflight_ids), time.perf_counter() - t0
+
+    cancelled_at_stop, left, took = asyncio.run(run())
+    assert cancelled_at_stop == ["m0", "m1"]
+    assert left == 0
+    assert took < 1.0
+    # still claimed: picked up again once the lease runs out
+    assert [r.status for r in rows(clean_outbox)] == ["sending", "sending"]
+
+
+def test_a_claimed_row_goes_to_one_claimer(clean_outbox):
+    add_messages(clean_outbox, 3)
+    first = outbox._claim(10)
+    assert [m.text for m in first] == ["m0", "m1", "m2"]
+    assert outbox._claim(10) == []  # leased, not due
+    assert all(r.status == "sending" for r in rows(clean_outbox))
+
+
+def test_claim_skips_rows_this_worker_is_still_delivering(clean_outbox, monkeypatch):
+    monkeypatch.setattr(outbox, "OUTBOX_LEASE_S", -1)  # every lease is already expired
+    add_messages(clean_outbox, 2)
+    first = outbox._claim(10)
+    again = outbox._claim(10, skip={first[0].id})
+    assert [m.text for m in again] == ["m1"]
+
+
+def test_expired_lease_is_reclaimed_and_the_old_holder_backs_off(clean_outbox, monkeypatch):
+    add_messages(clean_outbox, 1)
+    monkeypatch.setattr(outbox, "OUTBOX_LEASE_S", -1)
+    (old,) = outbox._claim(10)  # worker A; its lease runs out before the send starts
+    monkeypatch.setattr(outbox, "OUTBOX_LEASE_S", 120)
+    (new,) = outbox._claim(10)  # worker B picks it up again
+    assert new.id == old.id
+
+    assert outbox._start(old.id, old.next_attempt_at) is None
+    renewed = outbox._start(new.id, new.next_attempt_at)
+    assert renewed is not None
+    assert rows(clean_outbox)[0].next_attempt_at == renewed
+
+
+def test_two_dispatchers_send_each_message_once(clean_outbox, monkeypatch):
+    # One send at a time and a lease shorter than the lane queue: rows wait
+    # past their claim lease before their send starts.
+    monkeypatch.setattr(outbox, "OUTBOX_LEASE_S", 0.5)
+    monkeypatch.setattr(outbox, "OUTBOX_POLL_S", 0.05)
+    monkeypatch.setitem(outbox.CHANNEL_CONCURRENCY, "telegram", 1)
+    sends = []
+
+    async def slow(to, text):
+        await asyncio.sleep(0.2)
+        sends.append(text)
+
+    monkeypatch.setitem(outbox.SENDERS, "telegram", slow)
+    add_messages(clean_outbox, 6)
+
+    async def run():
+        workers = [OutboxDispatcher(), OutboxDispatcher()]
+        for d in workers:
+            d.start()
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline and any(r.status != "sent" for r in rows(clean_outbox)):
+            await asyncio.sleep(0.1)
+        for d in workers:
+            await d.stop(grace=1.0)
+        return sum(d.stats["lease_lost"] for d in workers)
+
+    lease_lost = asyncio.run(run())
+    assert sorted(sends) == [f"m{i}" for i in range(6)]
+    assert lease_lost > 0  # the race actually happened
@@ -0,0 +1,59 @@
+# backend/tests/test_profile_match.py
+import random
+
+import pytest
+
+from app import biometrics
+from app.biometrics import (
+    BiometricVoiceProfile, CachedProfile, ProfileSet,
+    _choose_best_cached, _choose_best_profile, _norm_pitch, _norm_rms, _score_profiles,
+)
+
+# in range, clamped on both ends, zero and NaN
+EDGE_PINGS = [(180.0, 0.05), (0.0, 0.0), (-5.0, -1.0), (900.0, 0.9), (59.0, 0.26), (float("nan"), 0.05), (200.0, float("nan"))]
+
+
+def _profiles(n, seed):
+    rnd = random.Random(seed)
+    rows = [
+        BiometricVoiceProfile(user_uid="match", avg_pitch_hz=rnd.uniform(80, 300),
+                              avg_rms=rnd.uniform(0.005, 0.2), condition_tag=f"tag{i}")
+        for i in range(n)
+    ]
+    rows.append(rows[0].model_copy(update={"condition_tag": "dup"}))  # tie: the first one must win
+    pset = ProfileSet(tuple(
+        CachedProfile(r.condition_tag, r.avg_pitch_hz, r.avg_rms, _norm_pitch(r.avg_pitch_hz), _norm_rms(r.avg_rms))
+        for r in rows
+    ))
+    return rows, pset
+
+
+def _pings(seed):
+    rnd = random.Random(seed)
+    return EDGE_PINGS + [(rnd.uniform(0, 520), rnd.uniform(0, 0.3)) for _ in range(300)]
+
+
+@pytest.mark.parametrize("n", [1, 4, 16, 64])
+def test_vectorized_scores_match_the_scalar_loop(n):
+    rows, pset = _profiles(n, seed=n)
+    pings = _pings(seed=100 + n)
+    idx, sims = _score_profiles([p for p, _ in pings], [r for _, r in pings], pset)
+    for (p, r), i, vs in zip(pings, idx.tolist(), sims.tolist()):
+        best, sim = _choose_best_profile(p, r, rows)
+        assert pset.profiles[i].condition_tag == best.condition_tag
+        assert vs == sim  # bit for bit, not approx
+
+
+@pytest.mark.parametrize("vector_from", [1, 10_000])
+def test_cached_matcher_agrees_on_both_paths(monkeypatch, vector_from):
+    monkeypatch.setattr(biometrics, "VECTORIZE_MIN_PROFILES", vector_from)
+    rows, pset = _profiles(8, seed=3)
+    for p, r in _pings(seed=4):
+        best, sim = _choose_best_profile(p, r, rows)
+        cached, csim = _choose_best_cached(p, r, pset)
+        assert (cached.condition_tag, csim) == (best.condition_tag, sim)
+
+
+def test_no_profiles():
+    assert _choose_best_cached(180.0, 0.05, ProfileSet(())) == (None, 0.0)
+    assert _choose_best_profile(180.0, 0.05, []) == (None, 0.0)
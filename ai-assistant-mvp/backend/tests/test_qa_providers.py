@@ -0,0 +1,89 @@
+# backend/tests/test_qa_providers.py
+import asyncio
+import time
+
+import pytest
+
+from app import qa_providers
+from app.qa_providers import OpenAIProvider, WikipediaProvider, first_answer
+from bench.stubs import StubServer, qa_routes
+
+
+def serve(monkeypatch, **route_args):
+    stub = StubServer(qa_routes(**route_args), process=False)
+    monkeypatch.setattr(qa_providers, "OPENAI_API_KEY", "stub")
+    monkeypatch.setattr(qa_providers, "OPENAI_BASE_URL", f"{stub.url}/v1")
+    monkeypatch.setattr(qa_providers, "WIKI_API_URL", f"{stub.url}/w/api.php")
+    monkeypatch.setattr(qa_providers, "WIKI_SUMMARY_URL", f"{stub.url}/api/rest_v1/page/summary")
+    return stub
+
+
+def ask(q, race, openai_timeout=None):
+    """first_answer over fresh providers; returns (answer, seconds)."""
+    async def run():
+        openai, wiki = OpenAIProvider(), WikipediaProvider()
+        if openai_timeout:
+            openai.timeout = openai_timeout
+        t0 = time.perf_counter()
+        try:
+            return await first_answer(q, [openai, wiki], race=race), time.perf_counter() - t0
+        finally:
+            await openai.aclose()
+            await wiki.aclose()
+    return asyncio.run(run())
+
+
+def test_race_returns_the_faster_provider(monkeypatch):
+    with serve(monkeypatch, wiki_delay=0.01, openai_delay=0.5, openai_fail_every=0):
+        answer, took = ask("what is python", race=True)
+    assert answer == "Summary of What_Is_Python."
+    assert took < 0.4  # did not wait for OpenAI
+
+
+def test_serial_prefers_openai(monkeypatch):
+    with serve(monkeypatch, wiki_delay=0.01, openai_delay=0.05, openai_fail_every=0):
+        answer, _ = ask("what is python", race=False)
+    assert answer == "LLM answer to what is python"
+
+
+@pytest.mark.parametrize("race", [True, False])
+def test_failing_provider_falls_back(monkeypatch, race):
+    # every OpenAI call returns 500
+    with serve(monkeypatch, wiki_delay=0.05, openai_delay=0.0, openai_fail_every=1):
+        answer, _ = ask("what is dna", race=race)
+    assert answer == "Summary of What_Is_Dna."
+
+
+def test_timed_out_provider_falls_back(monkeypatch):
+    with serve(monkeypatch, wiki_delay=0.01, openai_delay=1.0, openai_fail_every=0):
+        answer, took = ask("what is dna", race=False, openai_timeout=0.1)
+    assert answer == "Summary of What_Is_Dna."
+    assert took < 0.8
+
+
+def test_no_answer_from_anyone(monkeypatch):
+    with serve(monkeypatch, wiki_delay=0.0, openai_delay=0.0, openai_fail_every=1):
+        monkeypatch.setattr(qa_providers, "WIKI_API_URL", "http://127.0.0.1:9/w/api.php")  # refused
+        answer, _ = ask("anything", race=True)
+    assert answer == ""
+
+
+def test_client_is_reused_across_calls(monkeypatch):
+    async def run():
+        wiki = WikipediaProvider()
+        client = wiki.client()
+        for q in ("one", "two", "three"):
+            assert await wiki.answer(q)
+        same = wiki.client() is client
+        # one keep-alive connection served all six requests
+        conns = len(client._transport._pool.connections)
+        await wiki.aclose()
+        reopened = wiki.client() is not client
+        await wiki.aclose()
+        return same, conns, reopened
+
+    with serve(monkeypatch, wiki_delay=0.0) as stub:
+        same, conns, reopened = asyncio.run(run())
+        assert stub.hits["/w/api.php"] == 3
+    assert same and reopened
+    assert conns == 1
@@ -0,0 +1,11 @@
+# backend/tests/test_rate_limit.py
+import app.main
+
+
+def test_metrics_scrapes_are_not_rate_limited(client, monkeypatch):
+    monkeypatch.setattr(app.main, "RATE_LIMIT_ENABLED", True)
+    codes = {client.get("/metrics").status_code for _ in range(30)}  # default burst is 10
+    assert codes == {200}
+    # other routes on the same IP still are
+    codes = [client.get("/plans/protected", params={"passkey": "x"}).status_code for _ in range(30)]
+    assert 429 in codes
@@ -0,0 +1,32 @@
+# backend/tests/test_voice_rollup.py
+import time
+from datetime import datetime, timedelta
+
+from sqlmodel import Session, select
+
+from app.biometrics import VoicePing, day_of
+from app.voice_rollup import VoiceHourRollup, VoiceRollupJob
+
+
+def _ping(engine, ping_id, uid):
+    now = datetime.utcnow() - timedelta(minutes=5)  # past any ts-based cutoff
+    with Session(engine) as s:
+        s.add(VoicePing(id=ping_id, session_id=0, user_uid=uid, ts=now, day=day_of(now), pitch_hz=180.0))
+        s.commit()
+
+
+def test_watermark_waits_for_ids_that_commit_late(db):
+    uid = "rollup-late-commit"
+    job = VoiceRollupJob()
+    job.name = "rollup-test"  # own watermark row
+
+    _ping(db, 1000, uid)
+    _ping(db, 1002, uid)
+    job.run_once(lag_s=0.3)  # 1002 was only just seen: nothing is settled yet
+    _ping(db, 1001, uid)     # a transaction that took id 1001 commits after 1002
+    time.sleep(0.35)
+    job.run_once(lag_s=0.3)
+
+    with Session(db) as s:
+        rows = s.exec(select(VoiceHourRollup).where(VoiceHourRollup.user_uid == uid)).all()
+    assert sum(r.n for r in rows) == 3
@@ -0,0 +1,69 @@
+# backend/tests/test_write_behind.py
+import time
+
+import pytest
+
+from app.write_behind import WriteBehindBuffer
+
+
+class Sink:
+    def __init__(self):
+        self.rows = []
+        self.down = False
+
+    def __call__(self, rows):
+        if self.down or any(r < 0 for r in rows):  # negative rows are poison
+            raise ValueError("rejected")
+        self.rows.extend(rows)
+
+
+def test_partial_batch_flushed_after_max_delay():
+    sink = Sink()
+    buf = WriteBehindBuffer("t", sink, max_batch=100, max_delay=0.05)
+    buf.start()
+    try:
+        buf.add(1)
+        time.sleep(0.3)
+        assert sink.rows == [1]
+    finally:
+        buf.stop()
+
+
+def test_oldest_rows_shed_when_full():
+    sink = Sink()
+    buf = WriteBehindBuffer("t", sink, max_pending=3)
+    for r in range(5):
+        buf.add(r)
+    buf.flush()
+    assert sink.rows == [2, 3, 4]
+    assert buf.dropped == 2
+
+
+def test_poison_row_is_dropped_after_retries():
+    sink = Sink()
+    buf = WriteBehindBuffer("t", sink, max_retries=2)
+    for r in (1, 2, -3, 4, 5):
+        buf.add(r)
+    with pytest.raises(ValueError):
+        buf.flush()  # first failure: requeued as is
+    assert buf.depth() == 5
+    assert buf.flush() == 4
+    assert sink.rows == [1, 2, 4, 5]
+    assert buf.poisoned == 1 and buf.depth() == 0
+    buf.add(6)
+    assert buf.flush() == 1  # later rows are no longer blocked
+
+
+def test_outage_keeps_every_row():
+    sink = Sink()
+    sink.down = True
+    buf = WriteBehindBuffer("t", sink, max_retries=2)
+    for r in (1, 2, 3):
+        buf.add(r)
+    for _ in range(5):
+        with pytest.raises(ValueError):
+            buf.flush()
+    assert buf.depth() == 3 and buf.poisoned == 0
+    sink.down = False
+    assert buf.flush() == 3
+    assert sink.rows == [1, 2, 3]
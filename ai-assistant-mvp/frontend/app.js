@@ -302,21 +302,53 @@ const Voice = (() => {
   let pingTimer = 0;
   let sessionId = null;
 
+  let pingSocket = null;
+
+  function showPing(res){
+    setText($('#mood-status'), res.emotion);
+    setText($('#snr-status'), (res.snr_db!=null?res.snr_db.toFixed(1):'–'));
+    setText($('#profile-status'), res.matched_profile_tag || '—');
+    setOwnerText(res.is_owner ? `owner ✓ (server ${res.similarity.toFixed(2)})` : `unknown ✗ (server ${res.similarity.toFixed(2)})`);
+    setText($('#health-status'), res.health_flag ? 'possible issue' : 'ok');
+  }
+
+  // One authenticated socket per session; pings fall back to POST while it is not open
+  function openPingSocket(){
+    const tok = getToken();
+    if (!tok || !window.WebSocket) return;
+    try{
+      const ws = new WebSocket(`${API_BASE.replace(/^http/, 'ws')}/biometrics/voice/ws?token=${encodeURIComponent(tok)}`);
+      ws.onmessage = (ev) => {
+        try{
+          const res = JSON.parse(ev.data);
+          if (res.error) setText(di.status, `Ping error: ${res.status} ${res.error}`);
+          else showPing(res);
+        }catch{}
+      };
+      ws.onclose = () => { if (pingSocket === ws) pingSocket = null; };
+      pingSocket = ws;
+    }catch{ pingSocket = null; }
+  }
+
+  function closePingSocket(){
+    if (pingSocket){ try{ pingSocket.close(); }catch{} pingSocket = null; }
+  }
+
   async function sendPing(sample){
     if (!sessionId) return;
+    const body = {
+      session_id: sessionId,
+      pitch_hz: sample.pitch||0,
+      rms: sample.rms||0,
+      zcr: sample.zcr||0,
+      snr_db: sample.snr_db||0
+    };
+    if (pingSocket && pingSocket.readyState === WebSocket.OPEN){
+      pingSocket.send(JSON.stringify(body));
+      return;
+    }
     try{
-      const res = await postJSON('/biometrics/voice/ping', {
-        session_id: sessionId,
-        pitch_hz: sample.pitch||0,
-        rms: sample.rms||0,
-        zcr: sample.zcr||0,
-        snr_db: sample.snr_db||0
-      });
-      setText($('#mood-status'), res.emotion);
-      setText($('#snr-status'), (res.snr_db!=null?res.snr_db.toFixed(1):'–'));
-      setText($('#profile-status'), res.matched_profile_tag || '—');
-      setOwnerText(res.is_owner ? `owner ✓ (server ${res.similarity.toFixed(2)})` : `unknown ✗ (server ${res.similarity.toFixed(2)})`);
-      setText($('#health-status'), res.health_flag ? 'possible issue' : 'ok');
+      showPing(await postJSON('/biometrics/voice/ping', body));
     }catch(e){
       setText(di.status, `Ping error: ${e.message}`);
     }
@@ -482,6 +514,7 @@ const Voice = (() => {
         origin: location.origin, device_label: $('#mic-select')?.selectedOptions?.[0]?.textContent || null
       });
       sessionId = startRes.session_id;
+      openPingSocket();
     }catch(e){ setText(di.status, `Session start error: ${e.message}`); }
 
     running = true; setLED('listening','listening');
@@ -498,6 +531,7 @@ const Voice = (() => {
     if(ctx && ctx.state!=='closed') ctx.close();
     setLED('idle','idle'); setText(di.status,'Voice stopped.');
     const bar = $('#mic-bar'); if (bar) bar.style.width = '0%';
+    closePingSocket();
     if (sessionId){ postJSON('/biometrics/voice/session/stop?session_id='+sessionId, {} ).catch(()=>{}); sessionId=null; }
   }
 